@@ -0,0 +1,294 @@
+"""
+Caché semántica de respuestas (persistente en SQLite)
+"""
+from langchain_core.documents import Document
+from typing import Callable, Dict, List, Optional
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import numpy as np
+
+
+# Al superar `max_entries` se eliminan respuestas hasta dejar este margen libre,
+# así el borrado se hace una vez cada muchas inserciones y no en cada una
+_EVICTION_SLACK = 0.1
+
+
+def normalize_question(question: str) -> str:
+    """
+    Normaliza una pregunta para la búsqueda exacta en caché.
+
+    Args:
+        question: Pregunta del usuario
+
+    Returns:
+        Pregunta en minúsculas y con espacios colapsados
+    """
+    return " ".join(question.lower().split())
+
+
+class AnswerCache:
+    """
+    Caché de respuestas del sistema RAG.
+
+    - Búsqueda exacta: hash de la pregunta normalizada (sin calcular embeddings)
+    - Búsqueda semántica: similitud coseno entre el embedding de la consulta y
+      los de las preguntas ya respondidas
+    - Expiración por antigüedad (TTL) y por uso (LRU con `max_entries`)
+    - Invalidación automática cuando cambia la versión del índice
+    """
+
+    def __init__(self, path: str, similarity_threshold: float = 0.97,
+                 ttl_seconds: Optional[float] = None, max_entries: Optional[int] = None):
+        """
+        Args:
+            path: Ruta del archivo SQLite
+            similarity_threshold: Similitud coseno mínima para reutilizar una respuesta
+            ttl_seconds: Antigüedad máxima de una respuesta (None = sin límite)
+            max_entries: Número máximo de respuestas guardadas (None = sin límite)
+        """
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.index_version = None
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, tema TEXT, embedding BLOB, result TEXT NOT NULL, "
+            "index_version TEXT, created_at REAL NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.commit()
+        # Embeddings normalizados en memoria para la búsqueda semántica: las
+        # primeras len(self._keys) filas de `_matrix` (que reserva espacio de más)
+        self._keys = []
+        self._key_set = set()
+        self._temas = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._entries = 0
+
+    @staticmethod
+    def make_key(question: str, tema: Optional[str] = None) -> str:
+        raw = f"{tema or ''}\x1f{normalize_question(question)}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def set_index_version(self, version: str):
+        """
+        Fija la versión del índice y descarta las respuestas de otras versiones.
+
+        Args:
+            version: Identificador de la versión del índice
+        """
+        with self._lock:
+            self.index_version = version
+            self._conn.execute("DELETE FROM answers WHERE index_version IS NOT ?", (version,))
+            self._conn.commit()
+            self._reload_matrix()
+
+    def _reload_matrix(self):
+        """Carga en memoria los embeddings de las respuestas vigentes"""
+        self._expire()
+        self._entries = self._conn.execute("SELECT COUNT(*) FROM answers").fetchone()[0]
+        rows = self._conn.execute(
+            "SELECT key, tema, embedding FROM answers WHERE embedding IS NOT NULL"
+        ).fetchall()
+        self._keys = [row[0] for row in rows]
+        self._key_set = set(self._keys)
+        self._temas = [row[1] for row in rows]
+        if rows:
+            self._matrix = np.vstack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+        else:
+            self._matrix = np.zeros((0, 0), dtype=np.float32)
+
+    def _append_vector(self, key: str, tema: Optional[str], vector: np.ndarray):
+        """Agrega un embedding a la matriz, duplicando su capacidad cuando se llena"""
+        size = len(self._keys)
+        if not self._matrix.size or self._matrix.shape[1] != vector.shape[0]:
+            # Primer embedding (o cambió la dimensión): se empieza una matriz nueva
+            size = 0
+            self._matrix = np.empty((16, vector.shape[0]), dtype=np.float32)
+            self._keys = []
+            self._key_set = set()
+            self._temas = []
+        elif size == len(self._matrix):
+            matrix = np.empty((2 * size, vector.shape[0]), dtype=np.float32)
+            matrix[:size] = self._matrix[:size]
+            self._matrix = matrix
+        self._matrix[size] = vector
+        self._keys.append(key)
+        self._key_set.add(key)
+        self._temas.append(tema)
+
+    def _evict(self):
+        """Elimina las respuestas menos usadas hasta dejar libre `_EVICTION_SLACK` de `max_entries`"""
+        keep = int(self.max_entries * (1 - _EVICTION_SLACK))
+        evicted = [row[0] for row in self._conn.execute(
+            "SELECT key FROM answers ORDER BY last_access DESC LIMIT -1 OFFSET ?", (keep,)
+        )]
+        self._conn.executemany("DELETE FROM answers WHERE key = ?", [(key,) for key in evicted])
+        self._conn.commit()
+        self._entries -= len(evicted)
+
+        # Se compactan las filas que quedan al principio de la matriz, sin releer la base
+        evicted = set(evicted) & self._key_set
+        if not evicted:
+            return
+        kept = [i for i, key in enumerate(self._keys) if key not in evicted]
+        self._matrix[:len(kept)] = self._matrix[kept]
+        self._keys = [self._keys[i] for i in kept]
+        self._key_set -= evicted
+        self._temas = [self._temas[i] for i in kept]
+
+    def _expire(self):
+        """Elimina las respuestas caducadas y las menos usadas si sobran"""
+        if self.ttl_seconds:
+            self._conn.execute(
+                "DELETE FROM answers WHERE created_at < ?", (time.time() - self.ttl_seconds,)
+            )
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM answers WHERE key IN (SELECT key FROM answers "
+                "ORDER BY last_access DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,)
+            )
+        self._conn.commit()
+
+    def _fetch(self, key: str) -> Optional[Dict]:
+        """Lee una respuesta vigente por clave y actualiza su último acceso"""
+        row = self._conn.execute(
+            "SELECT result, created_at FROM answers WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if self.ttl_seconds and row[1] < time.time() - self.ttl_seconds:
+            return None
+        self._conn.execute("UPDATE answers SET last_access = ? WHERE key = ?", (time.time(), key))
+        self._conn.commit()
+        return self._deserialize(row[0])
+
+    def get(self, question: str, tema: Optional[str] = None,
+            embed: Optional[Callable[[str], List[float]]] = None) -> Optional[Dict]:
+        """
+        Busca una respuesta para la pregunta.
+
+        Primero se busca la pregunta exacta; si no está y se pasa `embed`,
+        se busca la pregunta guardada más parecida del mismo tema.
+
+        Args:
+            question: Pregunta del usuario
+            tema: Filtro de tema de la consulta
+            embed: Función que calcula el embedding de la pregunta
+
+        Returns:
+            Resultado guardado, o None si no hay ninguno aplicable
+        """
+        with self._lock:
+            result = self._fetch(self.make_key(question, tema))
+            if result is not None:
+                self.exact_hits += 1
+                result["query"] = question
+                result["cache"] = "exact"
+                return result
+            has_candidates = len(self._keys) > 0
+
+        if embed is not None and has_candidates:
+            vector = self._normalize(embed(question))
+            with self._lock:
+                if len(self._keys) and self._matrix.shape[1] == vector.shape[0]:
+                    similarities = self._matrix[:len(self._keys)] @ vector
+                    for i in np.argsort(-similarities)[:5]:
+                        if similarities[i] < self.similarity_threshold:
+                            break
+                        if self._temas[i] != (tema or None):
+                            continue
+                        result = self._fetch(self._keys[i])
+                        if result is not None:
+                            self.semantic_hits += 1
+                            result["query"] = question
+                            result["cache"] = "semantic"
+                            result["similarity"] = float(similarities[i])
+                            return result
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, question: str, result: Dict, tema: Optional[str] = None,
+            embedding: Optional[List[float]] = None):
+        """
+        Guarda la respuesta de una pregunta.
+
+        Args:
+            question: Pregunta del usuario
+            result: Resultado de la consulta (`result` y `source_documents`)
+            tema: Filtro de tema de la consulta
+            embedding: Embedding de la pregunta (para la búsqueda semántica)
+        """
+        key = self.make_key(question, tema)
+        vector = self._normalize(embedding) if embedding is not None else None
+        now = time.time()
+        with self._lock:
+            exists = self._conn.execute("SELECT 1 FROM answers WHERE key = ?", (key,)).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO answers "
+                "(key, tema, embedding, result, index_version, created_at, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, tema or None, vector.tobytes() if vector is not None else None,
+                 self._serialize(question, result), self.index_version, now, now)
+            )
+            self._conn.commit()
+            if exists is None:
+                self._entries += 1
+            if vector is not None and key not in self._key_set:
+                self._append_vector(key, tema or None, vector)
+            if self.max_entries and self._entries > self.max_entries:
+                self._evict()
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    @staticmethod
+    def _serialize(question: str, result: Dict) -> str:
+        return json.dumps({
+            "query": question,
+            "result": result.get("result"),
+            "source_documents": [
+                {"page_content": doc.page_content, "metadata": doc.metadata}
+                for doc in result.get("source_documents", [])
+            ]
+        }, ensure_ascii=False)
+
+    @staticmethod
+    def _deserialize(data: str) -> Dict:
+        result = json.loads(data)
+        result["source_documents"] = [
+            Document(page_content=doc["page_content"], metadata=doc["metadata"])
+            for doc in result["source_documents"]
+        ]
+        return result
+
+    def stats(self) -> Dict:
+        """
+        Devuelve las estadísticas de uso de la caché.
+
+        Returns:
+            Diccionario con aciertos exactos, semánticos, fallos y tasa de acierto
+        """
+        hits = self.exact_hits + self.semantic_hits
+        total = hits + self.misses
+        return {
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "entries": len(self._keys)
+        }
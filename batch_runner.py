@@ -0,0 +1,247 @@
+"""
+Modo por lotes: responde preguntas leídas de un JSONL y guarda las respuestas en otro
+"""
+from rag_system import RAGSystem
+from typing import Dict, Iterator, Optional, Set
+import asyncio
+import json
+import os
+import time
+import numpy as np
+
+
+def load_completed_ids(output_path: str) -> Set[str]:
+    """
+    Lee los ids ya respondidos sin error en un archivo de salida previo.
+
+    Las líneas incompletas (por ejemplo, si el proceso se cortó a mitad de
+    una escritura) se ignoran.
+
+    Args:
+        output_path: Ruta del JSONL de respuestas
+
+    Returns:
+        Conjunto de ids completados
+    """
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if "error" not in record:
+                completed.add(str(record.get("id")))
+    return completed
+
+
+def _ensure_trailing_newline(path: str):
+    """Termina con salto de línea una última línea cortada por una interrupción"""
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+
+
+def iter_questions(input_path: str, skip_ids: Set[str] = frozenset()) -> Iterator[Dict]:
+    """
+    Lee las preguntas del archivo de entrada línea a línea.
+
+    Cada línea es un objeto JSON con `question` (o `pregunta`) y,
+    opcionalmente, `id` y `tema`. Si no hay `id` se usa el número de línea.
+    Las líneas que no son JSON válido, no son un objeto o no traen pregunta
+    se entregan con un `error` en lugar de detener el lote.
+
+    Args:
+        input_path: Ruta del JSONL de preguntas
+        skip_ids: Ids que no hay que volver a responder
+
+    Yields:
+        Diccionarios con id, question y tema (y `error` si la línea no es válida)
+    """
+    with open(input_path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            item = {"id": line_number, "question": "", "tema": None}
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                item["error"] = f"Línea {line_number}: JSON no válido ({e.msg})"
+                record = None
+            if record is not None and not isinstance(record, dict):
+                item["error"] = f"Línea {line_number}: se esperaba un objeto JSON"
+                record = None
+
+            if record is not None:
+                item["id"] = record.get("id", line_number)
+                item["question"] = record.get("question") or record.get("pregunta") or ""
+                item["tema"] = record.get("tema")
+                if not isinstance(item["question"], str) or not item["question"].strip():
+                    item["error"] = f"Línea {line_number}: falta la pregunta"
+            if str(item["id"]) in skip_ids:
+                continue
+            yield item
+
+
+def to_record(item: Dict, result: Dict, latency: float) -> Dict:
+    """
+    Convierte el resultado de una consulta en una línea del archivo de salida.
+
+    Args:
+        item: Pregunta de entrada
+        result: Resultado de `RAGSystem.aquery`
+        latency: Tiempo de respuesta en segundos
+
+    Returns:
+        Registro serializable a JSON
+    """
+    record = {
+        "id": item["id"],
+        "question": item["question"],
+        "tema": item["tema"],
+        "latency_ms": round(latency * 1000, 1)
+    }
+    if "error" in result:
+        record["error"] = result["error"]
+        return record
+    record["answer"] = result.get("result")
+    record["sources"] = [
+        {
+            "row_id": doc.metadata.get("row_id"),
+            "tema": doc.metadata.get("tema"),
+            "pregunta": doc.metadata.get("pregunta")
+        }
+        for doc in result.get("source_documents", [])
+    ]
+    if result.get("cache"):
+        record["cache"] = result["cache"]
+    if result.get("fast_path"):
+        record["fast_path"] = True
+    return record
+
+
+async def arun_batch(rag_system: RAGSystem, input_path: str, output_path: str,
+                     max_concurrency: int = 8, tema: Optional[str] = None,
+                     progress_every: int = 100) -> Dict:
+    """
+    Responde todas las preguntas de `input_path` y las escribe en `output_path`.
+
+    Las preguntas se leen bajo demanda y las atienden `max_concurrency`
+    tareas a la vez, así que mientras una espera al LLM otras están
+    calculando embeddings o buscando en el índice. Cada respuesta se escribe
+    en cuanto termina; si el proceso se interrumpe, una nueva ejecución con
+    la misma salida continúa desde las preguntas que faltan (y reintenta las
+    que dieron error). Un reintento agrega una línea nueva con el mismo `id`
+    sin borrar la del error: para cada `id` vale la última línea.
+
+    Las líneas de entrada no válidas se escriben como errores y el lote sigue.
+
+    Args:
+        rag_system: Sistema RAG inicializado
+        input_path: JSONL de preguntas
+        output_path: JSONL de respuestas (se abre en modo append)
+        max_concurrency: Consultas simultáneas
+        tema: Tema por defecto para las preguntas que no indican uno
+        progress_every: Cada cuántas respuestas se muestra el progreso
+
+    Returns:
+        Resumen con número de respuestas, errores, throughput y latencias
+    """
+    completed = load_completed_ids(output_path)
+    if completed:
+        print(f"⏩ Reanudando: {len(completed)} preguntas ya respondidas en {output_path}")
+
+    _ensure_trailing_newline(output_path)
+    questions = iter_questions(input_path, completed)
+    latencies = []
+    errors = 0
+    start = time.perf_counter()
+
+    with open(output_path, "a", encoding="utf-8") as output:
+
+        async def worker():
+            nonlocal errors
+            # El generador es compartido: cada tarea toma la siguiente pregunta
+            for item in questions:
+                if "error" in item:
+                    output.write(json.dumps(to_record(item, item, 0.0), ensure_ascii=False) + "\n")
+                    output.flush()
+                    errors += 1
+                    continue
+                item_start = time.perf_counter()
+                result = await rag_system.aquery(item["question"], tema=item["tema"] or tema)
+                latency = time.perf_counter() - item_start
+                record = to_record(item, result, latency)
+                output.write(json.dumps(record, ensure_ascii=False) + "\n")
+                output.flush()
+
+                latencies.append(latency)
+                if "error" in record:
+                    errors += 1
+                if progress_every and len(latencies) % progress_every == 0:
+                    elapsed = time.perf_counter() - start
+                    print(f"   📊 {len(latencies)} preguntas respondidas "
+                          f"({len(latencies) / elapsed:.1f}/s)")
+
+        await asyncio.gather(*(worker() for _ in range(max(1, max_concurrency))))
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        "answered": len(latencies),
+        # Incluye las líneas de entrada no válidas, que no llegan a consultarse
+        "errors": errors,
+        "skipped": len(completed),
+        "elapsed_seconds": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0
+    }
+    if latencies:
+        p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+        summary.update({"p50_ms": p50, "p95_ms": p95, "p99_ms": p99})
+    return summary
+
+
+def run_batch(rag_system: RAGSystem, input_path: str, output_path: str,
+              max_concurrency: int = 8, tema: Optional[str] = None) -> Dict:
+    """
+    Ejecuta el modo por lotes y muestra el resumen final.
+
+    Args:
+        rag_system: Sistema RAG inicializado
+        input_path: JSONL de preguntas
+        output_path: JSONL de respuestas
+        max_concurrency: Consultas simultáneas
+        tema: Tema por defecto para las preguntas que no indican uno
+
+    Returns:
+        Resumen de la ejecución
+    """
+    print("\n" + "="*70)
+    print("📦 MODO POR LOTES")
+    print("="*70)
+    print(f"   Entrada: {input_path}")
+    print(f"   Salida: {output_path}")
+    print(f"   Concurrencia: {max_concurrency}\n")
+
+    summary = asyncio.run(
+        arun_batch(rag_system, input_path, output_path, max_concurrency=max_concurrency, tema=tema)
+    )
+
+    print("\n" + "="*70)
+    print("📊 RESUMEN DEL LOTE")
+    print("="*70)
+    print(f"   Preguntas respondidas: {summary['answered']}")
+    print(f"   Errores: {summary['errors']}")
+    if summary["skipped"]:
+        print(f"   Omitidas (ya respondidas): {summary['skipped']}")
+    print(f"   Tiempo total: {summary['elapsed_seconds']:.1f} s")
+    print(f"   Throughput: {summary['throughput']:.2f} preguntas/s")
+    if summary["answered"]:
+        print(f"   Latencia p50: {summary['p50_ms']:.0f} ms | "
+              f"p95: {summary['p95_ms']:.0f} ms | p99: {summary['p99_ms']:.0f} ms")
+    print("="*70)
+    return summary
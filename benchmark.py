@@ -0,0 +1,531 @@
+"""
+Benchmark reproducible del sistema RAG sin conexión
+
+Genera hojas sintéticas con las mismas columnas que `datos_ejemplo.csv`
+(tema, pregunta, respuesta), usa los servicios locales de
+`local_services.py` con latencia configurable y mide, para cada tamaño:
+
+- Tiempo de construcción, guardado y carga del índice
+- Memoria máxima del proceso (RSS)
+- Latencia de recuperación (p50/p95/p99)
+- Recall@k del índice frente a una búsqueda exacta
+- Consultas por segundo de extremo a extremo (recuperación + LLM)
+
+Los resultados se guardan en JSON para comparar entre versiones:
+
+    python benchmark.py --sizes 1000 100000 --output resultados.json
+    python benchmark.py --compare resultados_anteriores.json
+"""
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterator, List, Optional
+import argparse
+import csv
+import datetime
+import json
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+import numpy as np
+import config
+
+
+TEMAS = [
+    "Python", "LangChain", "RAG", "FAISS", "Embeddings", "Gemini", "Google Sheets",
+    "Bases de datos", "Redes", "Seguridad", "Docker", "Kubernetes", "Git", "Linux",
+    "Estadística", "Machine Learning", "APIs", "Testing", "Rendimiento", "Cloud"
+]
+
+CONCEPTOS = [
+    "un índice", "una caché", "un embedding", "una consulta", "un modelo", "una tabla",
+    "un contenedor", "un proceso", "una API", "un vector", "un lote", "una partición",
+    "un servidor", "un cliente", "una transacción", "un algoritmo", "una métrica", "un token"
+]
+
+PALABRAS = (
+    "permite procesar datos de forma eficiente escalable segura rápida distribuida "
+    "mediante una estructura que almacena consulta organiza transforma indexa los "
+    "documentos vectores registros resultados usuarios servicios con baja latencia "
+    "alto rendimiento bajo costo y gran precisión en sistemas modernos de producción"
+).split()
+
+# Métricas que se comparan con `--compare` (True = más alto es mejor)
+COMPARED_METRICS = {
+    "build_seconds": False,
+    "peak_rss_mb": False,
+    "retrieval_p50_ms": False,
+    "retrieval_p95_ms": False,
+    "recall_at_k": True,
+    "qps": True
+}
+
+
+def generate_rows(n: int, seed: int = 42) -> Iterator[Dict]:
+    """
+    Genera filas sintéticas con el formato de la hoja.
+
+    La misma semilla produce siempre las mismas filas, y cada pregunta es
+    única para que los `row_id` no se repitan.
+
+    Args:
+        n: Número de filas
+        seed: Semilla del generador
+
+    Yields:
+        Diccionarios con tema, pregunta y respuesta
+    """
+    rng = random.Random(seed)
+    for i in range(n):
+        tema = rng.choice(TEMAS)
+        concepto = rng.choice(CONCEPTOS)
+        respuesta = " ".join(rng.choices(PALABRAS, k=rng.randint(12, 40)))
+        yield {
+            "tema": tema,
+            "pregunta": f"¿Qué es {concepto} en {tema} (caso {i})?",
+            "respuesta": f"En {tema}, {concepto} {respuesta}."
+        }
+
+
+def synthetic_csv(data_dir: str, n: int, seed: int = 42) -> str:
+    """
+    Devuelve la ruta de la hoja sintética de `n` filas, creándola si no existe.
+
+    Args:
+        data_dir: Carpeta donde se guardan las hojas generadas
+        n: Número de filas
+        seed: Semilla del generador
+
+    Returns:
+        Ruta del CSV
+    """
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"sintetico_{n}_{seed}.csv")
+    if not os.path.exists(path):
+        print(f"📝 Generando {path}...")
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=["tema", "pregunta", "respuesta"])
+            writer.writeheader()
+            writer.writerows(generate_rows(n, seed))
+        os.replace(tmp_path, path)
+    return path
+
+
+def iter_csv_documents(path: str) -> Iterator:
+    """
+    Lee el CSV fila a fila y genera los documentos, sin tenerlo entero en memoria.
+
+    Args:
+        path: Ruta del CSV
+
+    Yields:
+        Document por cada fila
+    """
+    from data_loader import row_to_document
+
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        seen_ids = {}
+        for row in csv.DictReader(f):
+            yield row_to_document(row, seen_ids, source=path)
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Memoria residente máxima del proceso en MB.
+
+    Returns:
+        MB, o None si el sistema no lo permite (Windows)
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB y macOS en bytes
+    return peak / (1024 * 1024) if platform.system() == "Darwin" else peak / 1024
+
+
+def percentiles_ms(latencies: List[float]) -> Dict[str, float]:
+    """Percentiles 50/95/99 de una lista de latencias en segundos, en milisegundos"""
+    p50, p95, p99 = np.percentile(np.array(latencies) * 1000, [50, 95, 99])
+    return {"p50_ms": float(p50), "p95_ms": float(p95), "p99_ms": float(p99)}
+
+
+def exact_search(rag, embeddings, queries: np.ndarray, k: int,
+                 chunk_size: int = 10_000) -> np.ndarray:
+    """
+    Calcula los k vecinos exactos de cada consulta recorriendo todo el índice.
+
+    Los vectores se vuelven a calcular por bloques (los servicios locales son
+    deterministas), así que no hace falta tener una segunda copia del índice
+    en memoria. Como los vectores son unitarios, el producto escalar ordena
+    igual que la distancia L2.
+
+    Args:
+        rag: Sistema RAG con el vector store cargado
+        embeddings: Servicio de embeddings sin latencia
+        queries: Vectores de consulta (n x d)
+        k: Número de vecinos
+        chunk_size: Documentos por bloque
+
+    Returns:
+        Posiciones de los k vecinos de cada consulta (n x k)
+    """
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_positions = np.full((len(queries), k), -1, dtype=np.int64)
+
+    def merge(positions: List[int], texts: List[str]):
+        nonlocal best_scores, best_positions
+        vectors = np.array(embeddings.embed_documents(texts), dtype=np.float32)
+        scores = np.concatenate([best_scores, queries @ vectors.T], axis=1)
+        candidates = np.concatenate(
+            [best_positions, np.broadcast_to(np.array(positions), (len(queries), len(positions)))],
+            axis=1
+        )
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        best_scores = np.take_along_axis(scores, top, axis=1)
+        best_positions = np.take_along_axis(candidates, top, axis=1)
+
+    positions, texts = [], []
+    for position, _, doc in rag._iter_indexed_documents():
+        positions.append(position)
+        texts.append(doc.page_content)
+        if len(texts) == chunk_size:
+            merge(positions, texts)
+            positions, texts = [], []
+    if texts:
+        merge(positions, texts)
+    return best_positions
+
+
+def recall_at_k(approximate: np.ndarray, exact: np.ndarray) -> float:
+    """
+    Fracción media de los vecinos exactos que devuelve el índice.
+
+    Args:
+        approximate: Posiciones devueltas por el índice (n x k)
+        exact: Posiciones exactas (n x k)
+
+    Returns:
+        Recall@k entre 0 y 1
+    """
+    k = exact.shape[1]
+    hits = [len(set(a[a >= 0]) & set(e)) / k for a, e in zip(approximate, exact)]
+    return float(np.mean(hits))
+
+
+def run_size(n: int, options: Dict) -> Dict:
+    """
+    Mide el sistema con una hoja sintética de `n` filas.
+
+    Se ejecuta en un proceso propio para que la memoria máxima medida
+    corresponda solo a este tamaño.
+
+    Args:
+        n: Número de filas
+        options: Parámetros del benchmark (ver `main`)
+
+    Returns:
+        Resultados de este tamaño
+    """
+    from faiss_index import search_index
+    from local_services import FakeChatModel, FakeEmbeddingService
+    from rag_system import RAGSystem
+    import metrics
+
+    csv_path = synthetic_csv(options["data_dir"], n, options["seed"])
+    index_dir = tempfile.mkdtemp(prefix="rag_benchmark_")
+
+    # El índice va a una carpeta temporal y no se usan cachés ni cuotas,
+    # para medir siempre el mismo trabajo
+    config.FAISS_INDEX_PATH = index_dir
+    config.FAISS_INDEX_FACTORY = options["index_factory"]
+    config.EMBEDDING_REQUESTS_PER_MINUTE = None
+    config.ANSWER_CACHE_PATH = None
+    config.FAQ_FAST_PATH = False
+    config.TOP_K_DOCUMENTS = options["k"]
+    metrics.enable()
+
+    try:
+        result = {"rows": n, "baseline_rss_mb": peak_rss_mb()}
+        rag = RAGSystem()
+        rag.embeddings = FakeEmbeddingService(size=options["dim"], latency=options["embedding_latency"])
+
+        # 1. Construcción, guardado y carga del índice
+        start = time.perf_counter()
+        if not rag.create_vectorstore(iter_csv_documents(csv_path), save_local=False):
+            raise RuntimeError("No se pudo crear el vector store")
+        result["build_seconds"] = time.perf_counter() - start
+        result["build_docs_per_second"] = n / result["build_seconds"]
+
+        start = time.perf_counter()
+        rag.save_vectorstore()
+        result["save_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if not rag.load_vectorstore():
+            raise RuntimeError("No se pudo cargar el vector store")
+        result["load_seconds"] = time.perf_counter() - start
+        result["index_size_mb"] = sum(
+            os.path.getsize(os.path.join(index_dir, name)) for name in os.listdir(index_dir)
+        ) / (1024 * 1024)
+        result["index_factory"] = rag.index_params.get("factory")
+
+        rag.llm = FakeChatModel(latency=options["llm_latency"])
+        if not rag.setup_qa_chain():
+            raise RuntimeError("No se pudo crear la cadena de QA")
+
+        # Consultas: preguntas de filas al azar
+        rng = np.random.default_rng(options["seed"])
+        index = rag.vectorstore.index
+        sample = rng.choice(index.ntotal, size=min(options["queries"], index.ntotal), replace=False)
+        docstore = rag.vectorstore.docstore
+        docs = [docstore.search(rag.vectorstore.index_to_docstore_id[int(position)])
+                for position in sample]
+        questions = [doc.metadata["pregunta"] for doc in docs]
+
+        # 2. Latencia de recuperación (embedding de la pregunta + búsqueda + docstore)
+        retriever = rag._build_retriever()
+        latencies = []
+        for question in questions:
+            start = time.perf_counter()
+            retriever.get_relevant_documents(question)
+            latencies.append(time.perf_counter() - start)
+        result.update({f"retrieval_{key}": value for key, value in percentiles_ms(latencies).items()})
+
+        # 3. Recall@k: consultas cercanas a documentos del índice, con ruido
+        exact_embeddings = FakeEmbeddingService(size=options["dim"])
+        vectors = np.array(exact_embeddings.embed_documents([doc.page_content for doc in docs]),
+                           dtype=np.float32)
+        queries = vectors + rng.standard_normal(vectors.shape).astype(np.float32) \
+            * options["noise"] / np.sqrt(options["dim"])
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        approximate = np.array([
+            search_index(index, query[None, :], options["k"], rag.index_params)[1]
+            for query in queries
+        ])
+        exact = exact_search(rag, exact_embeddings, queries, options["k"])
+        result["recall_at_k"] = recall_at_k(approximate, exact)
+
+        # 4. Consultas por segundo de extremo a extremo
+        start = time.perf_counter()
+        answers = rag.query_batch(questions, max_concurrency=options["concurrency"])
+        elapsed = time.perf_counter() - start
+        result["qps"] = len(questions) / elapsed
+        result["query_errors"] = sum(1 for answer in answers if "error" in answer)
+
+        result["peak_rss_mb"] = peak_rss_mb()
+        result["stages"] = metrics.REGISTRY.to_json()
+        return result
+
+    finally:
+        shutil.rmtree(index_dir, ignore_errors=True)
+
+
+def environment_info() -> Dict:
+    """Versiones y máquina en las que se ejecutó el benchmark"""
+    import faiss
+
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "faiss": faiss.__version__
+    }
+
+
+def run_benchmark(options: Dict) -> Dict:
+    """
+    Ejecuta el benchmark para cada tamaño, cada uno en un proceso nuevo.
+
+    Args:
+        options: Parámetros del benchmark
+
+    Returns:
+        Diccionario con el entorno, los parámetros y los resultados por tamaño
+    """
+    report = {"environment": environment_info(), "settings": options, "results": []}
+    context = multiprocessing.get_context("spawn")
+    for n in options["sizes"]:
+        print("\n" + "="*70)
+        print(f"🏁 BENCHMARK: {n} filas")
+        print("="*70)
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            try:
+                result = executor.submit(run_size, n, options).result()
+            except Exception as e:
+                print(f"❌ Error en el benchmark de {n} filas: {str(e)}")
+                result = {"rows": n, "error": str(e)}
+        report["results"].append(result)
+    return report
+
+
+def print_report(report: Dict):
+    """Muestra una tabla con los resultados principales"""
+    print("\n" + "="*70)
+    print("📊 RESULTADOS DEL BENCHMARK")
+    print("="*70)
+    print(f"   {'filas':>9}{'build':>10}{'RSS máx':>10}{'p50':>9}{'p95':>9}"
+          f"{'recall@k':>10}{'QPS':>9}")
+    for result in report["results"]:
+        if "error" in result:
+            print(f"   {result['rows']:>9}  ❌ {result['error']}")
+            continue
+        rss = f"{result['peak_rss_mb']:.0f}MB" if result["peak_rss_mb"] is not None else "-"
+        print(f"   {result['rows']:>9}{result['build_seconds']:>9.1f}s{rss:>10}"
+              f"{result['retrieval_p50_ms']:>7.1f}ms{result['retrieval_p95_ms']:>7.1f}ms"
+              f"{result['recall_at_k']:>10.3f}{result['qps']:>9.1f}")
+    print("="*70 + "\n")
+
+
+def compare_results(previous: Dict, current: Dict):
+    """
+    Muestra la variación de cada métrica respecto a una ejecución anterior.
+
+    Args:
+        previous: Informe anterior (JSON de `--output`)
+        current: Informe actual
+    """
+    previous_by_rows = {result["rows"]: result for result in previous.get("results", [])}
+    print("="*70)
+    print(f"🔎 COMPARACIÓN CON {previous.get('environment', {}).get('commit') or 'la ejecución anterior'}")
+    print("="*70)
+    for result in current["results"]:
+        before = previous_by_rows.get(result["rows"])
+        if not before or "error" in before or "error" in result:
+            continue
+        print(f"   {result['rows']} filas:")
+        for name, higher_is_better in COMPARED_METRICS.items():
+            old, new = before.get(name), result.get(name)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            worse = change < 0 if higher_is_better else change > 0
+            mark = "⚠️ " if worse and abs(change) > 0.1 else "  "
+            print(f"   {mark} {name:<20}{old:>12.3f} → {new:>12.3f} ({change:+.1%})")
+    print("="*70 + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del sistema RAG sin conexión")
+    parser.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1_000, 100_000, 1_000_000],
+        help="Número de filas de cada hoja sintética"
+    )
+    parser.add_argument(
+        "--dim",
+        type=int,
+        default=768,
+        help="Dimensión de los embeddings locales"
+    )
+    parser.add_argument(
+        "--queries",
+        type=int,
+        default=200,
+        help="Consultas para medir latencia, recall y QPS"
+    )
+    parser.add_argument(
+        "--k",
+        type=int,
+        default=config.TOP_K_DOCUMENTS,
+        help="Documentos recuperados por consulta (el k de recall@k)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.QUERY_MAX_CONCURRENCY,
+        help="Consultas simultáneas al medir QPS"
+    )
+    parser.add_argument(
+        "--embedding-latency",
+        type=float,
+        default=0.0,
+        help="Latencia simulada por petición de embeddings (segundos)"
+    )
+    parser.add_argument(
+        "--llm-latency",
+        type=float,
+        default=0.05,
+        help="Latencia simulada por respuesta del LLM (segundos)"
+    )
+    parser.add_argument(
+        "--index-factory",
+        default=config.FAISS_INDEX_FACTORY,
+        help="Tipo de índice FAISS (por ejemplo Flat, IVF4096,Flat o HNSW32)"
+    )
+    parser.add_argument(
+        "--noise",
+        type=float,
+        default=0.5,
+        help="Ruido de las consultas de recall respecto a su documento de origen"
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=42,
+        help="Semilla de los datos y las consultas"
+    )
+    parser.add_argument(
+        "--data-dir",
+        default="benchmark_data",
+        help="Carpeta de las hojas sintéticas (se reutilizan entre ejecuciones)"
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        default="benchmark_results.json",
+        help="Archivo JSON de resultados"
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="FILE",
+        help="JSON de una ejecución anterior con el que comparar"
+    )
+    args = parser.parse_args()
+
+    options = {
+        "sizes": args.sizes,
+        "dim": args.dim,
+        "queries": args.queries,
+        "k": args.k,
+        "concurrency": args.concurrency,
+        "embedding_latency": args.embedding_latency,
+        "llm_latency": args.llm_latency,
+        "index_factory": args.index_factory,
+        "noise": args.noise,
+        "seed": args.seed,
+        "data_dir": args.data_dir
+    }
+    report = run_benchmark(options)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print_report(report)
+    print(f"💾 Resultados guardados en {args.output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare_results(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Índice invertido BM25 en memoria para búsqueda léxica
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import os
+import re
+import unicodedata
+import numpy as np
+
+
+BM25_FILE = "bm25.npz"
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Palabras muy frecuentes que no aportan a la búsqueda léxica
+STOPWORDS = frozenset(
+    "a al algo como con de del el en es esta este la las lo los mas me mi no o "
+    "para pero por que se si sin sobre su sus tema pregunta respuesta un una y ya".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Divide un texto en términos normalizados.
+
+    Pasa a minúsculas, quita tildes y descarta palabras vacías, para que
+    "Qué es FAISS" y "que es faiss" produzcan los mismos términos.
+
+    Args:
+        text: Texto a tokenizar
+
+    Returns:
+        Lista de términos
+    """
+    text = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return [token for token in _TOKEN_RE.findall(text) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    Índice invertido con puntuación BM25.
+
+    Las listas de postings se guardan en formato CSR (un array de
+    posiciones y otro de pesos, con desplazamientos por término). El peso
+    BM25 de cada posting se precalcula al construir el índice, así que una
+    consulta solo tiene que juntar las listas de sus términos y sumarlas
+    con numpy.
+    """
+
+    def __init__(self, vocabulary: Dict[str, int], offsets: np.ndarray,
+                 postings: np.ndarray, weights: np.ndarray):
+        """
+        Args:
+            vocabulary: Término -> id de término
+            offsets: Inicio de la lista de cada término (len = términos + 1)
+            postings: Posiciones de documento (int32)
+            weights: Peso BM25 de cada posting (float32)
+        """
+        self.vocabulary = vocabulary
+        self.offsets = offsets
+        self.postings = postings
+        self.weights = weights
+
+    @classmethod
+    def build(cls, documents: Iterable[Tuple[int, str]], k1: float = 1.2, b: float = 0.75) -> "BM25Index":
+        """
+        Construye el índice a partir de (posición, texto).
+
+        Args:
+            documents: Iterable de tuplas (posición en el índice FAISS, texto)
+            k1: Saturación de la frecuencia de término
+            b: Normalización por longitud del documento
+
+        Returns:
+            Índice BM25
+        """
+        vocabulary = {}
+        term_ids = []
+        doc_positions = []
+        doc_lengths = []
+        counts = []
+        for position, text in documents:
+            tokens = tokenize(text)
+            doc_lengths.append(len(tokens))
+            ids = np.fromiter(
+                (vocabulary.setdefault(token, len(vocabulary)) for token in tokens),
+                dtype=np.int32, count=len(tokens)
+            )
+            unique, tf = np.unique(ids, return_counts=True)
+            term_ids.append(unique)
+            counts.append(tf)
+            doc_positions.append(np.full(len(unique), position, dtype=np.int32))
+
+        if not term_ids:
+            return cls({}, np.zeros(1, dtype=np.int64), np.array([], dtype=np.int32),
+                       np.array([], dtype=np.float32))
+
+        lengths = np.repeat(np.array(doc_lengths, dtype=np.float32),
+                            [len(t) for t in term_ids])
+        term_ids = np.concatenate(term_ids)
+        tf = np.concatenate(counts).astype(np.float32)
+        positions = np.concatenate(doc_positions)
+
+        # Ordenar por término para obtener las listas de postings (CSR)
+        order = np.argsort(term_ids, kind="stable")
+        term_ids, tf, positions, lengths = term_ids[order], tf[order], positions[order], lengths[order]
+        df = np.bincount(term_ids, minlength=len(vocabulary))
+        offsets = np.concatenate([[0], np.cumsum(df)]).astype(np.int64)
+
+        n_docs = len(doc_lengths)
+        avgdl = max(float(np.mean(doc_lengths)), 1.0)
+        idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+        weights = idf[term_ids] * tf * (k1 + 1) / (tf + k1 * (1 - b + b * lengths / avgdl))
+
+        return cls(vocabulary, offsets, positions, weights.astype(np.float32))
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Devuelve los k documentos con mayor puntuación BM25.
+
+        Args:
+            query: Texto de la consulta
+            k: Número de resultados
+            allowed: Posiciones permitidas (ordenadas), para filtrar por tema
+
+        Returns:
+            Tupla (posiciones, puntuaciones) ordenada de mayor a menor
+        """
+        term_ids = {self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary}
+        if not term_ids:
+            return np.array([], dtype=np.int32), np.array([], dtype=np.float32)
+
+        slices = [slice(self.offsets[t], self.offsets[t + 1]) for t in term_ids]
+        positions = np.concatenate([self.postings[s] for s in slices])
+        weights = np.concatenate([self.weights[s] for s in slices])
+
+        if allowed is not None:
+            mask = np.isin(positions, allowed, assume_unique=False)
+            positions, weights = positions[mask], weights[mask]
+            if positions.size == 0:
+                return positions, weights
+
+        unique, inverse = np.unique(positions, return_inverse=True)
+        scores = np.bincount(inverse, weights=weights)
+
+        if len(unique) > k:
+            top = np.argpartition(-scores, k)[:k]
+        else:
+            top = np.arange(len(unique))
+        top = top[np.argsort(-scores[top])]
+        return unique[top], scores[top]
+
+    def save(self, folder_path: str):
+        """
+        Guarda el índice junto al índice FAISS.
+
+        Args:
+            folder_path: Carpeta del índice
+        """
+        terms = np.empty(len(self.vocabulary), dtype=object)
+        for term, term_id in self.vocabulary.items():
+            terms[term_id] = term
+        np.savez(
+            os.path.join(folder_path, BM25_FILE),
+            terms=terms.astype(str),
+            offsets=self.offsets,
+            postings=self.postings,
+            weights=self.weights
+        )
+
+    @classmethod
+    def load(cls, folder_path: str) -> Optional["BM25Index"]:
+        """
+        Carga el índice guardado junto al índice FAISS.
+
+        Args:
+            folder_path: Carpeta del índice
+
+        Returns:
+            Índice BM25, o None si no existe
+        """
+        path = os.path.join(folder_path, BM25_FILE)
+        if not os.path.exists(path):
+            return None
+        data = np.load(path)
+        vocabulary = {str(term): i for i, term in enumerate(data["terms"])}
+        return cls(vocabulary, data["offsets"], data["postings"], data["weights"])
@@ -1,44 +1,181 @@
 """
 Configuración del proyecto RAG con LangChain
+
+Importar este módulo no tiene efectos secundarios: los únicos valores que
+dependen del entorno (.env y variables de entorno), `GOOGLE_API_KEY` y
+`OFFLINE_MODE`, se resuelven la primera vez que se leen, a través de
+`get_settings()`. El resto son constantes del módulo que no se leen del
+entorno. Las advertencias de configuración se muestran con `print_warnings()`.
 """
+from dataclasses import dataclass
+from typing import List, Optional
+import functools
 import os
-from dotenv import load_dotenv
 
-# Cargar variables de entorno desde .env
-load_dotenv()
 
-# API Keys
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+@dataclass(frozen=True)
+class Settings:
+    """Configuración que depende del entorno (el resto de `config` son constantes)"""
+    google_api_key: Optional[str]
+    offline_mode: bool
+
+
+@functools.lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    """
+    Lee el archivo .env y las variables de entorno (solo la primera vez).
+    
+    Returns:
+        Settings con la configuración del entorno
+    """
+    from dotenv import load_dotenv
+    
+    # Cargar variables de entorno desde .env
+    load_dotenv()
+    return Settings(
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        # Modo sin conexión: embeddings y LLM locales (local_services.py) y datos
+        # desde un CSV. Pensado para pruebas; se activa con RAG_OFFLINE=1
+        offline_mode=os.getenv("RAG_OFFLINE", "").lower() in ("1", "true", "yes")
+    )
+
+
+# Atributos del módulo que se resuelven bajo demanda desde get_settings()
+_SETTINGS_ATTRIBUTES = {
+    "GOOGLE_API_KEY": "google_api_key",
+    "OFFLINE_MODE": "offline_mode"
+}
+
+
+def __getattr__(name: str):
+    if name in _SETTINGS_ATTRIBUTES:
+        return getattr(get_settings(), _SETTINGS_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# Archivo de datos (CSV, Parquet o JSONL con las columnas tema, pregunta y respuesta)
+# que se usa en lugar de Google Sheets; también se puede indicar con --source
+DATA_SOURCE = None
+FILE_CHUNK_ROWS = 50_000  # Filas por bloque al leer el archivo con --stream
+
+# Datos del modo sin conexión (RAG_OFFLINE=1)
+OFFLINE_DATA_PATH = "datos_ejemplo.csv"
+OFFLINE_SHEETS_DIR = None  # Carpeta con <spreadsheet_id>/<pestaña>.csv que sustituye a SHEET_SOURCES
+
+# Servidor HTTP (main.py --serve)
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 8080
+SERVER_WORKERS = 1  # Procesos worker (más de 1 = servidor pre-fork que comparte el índice)
+SERVER_MAX_REQUESTS = 10_000  # Peticiones antes de reciclar un worker (None = nunca)
+SERVER_MAX_REQUESTS_JITTER = 1_000  # Variación aleatoria para no reciclar todos a la vez
+
+# Métricas de latencia por etapa (main.py --metrics, GET /metrics en el servidor)
+METRICS_ENABLED = False
+METRICS_WINDOW = 10_000  # Mediciones recientes por etapa para calcular p50/p95/p99
 
 # Configuración de Google Sheets
 # IMPORTANTE: Reemplaza este ID con el ID de tu hoja de Google Sheets
 # El ID está en la URL: https://docs.google.com/spreadsheets/d/[ESTE_ES_EL_ID]/edit
 SPREADSHEET_ID = "TU_SPREADSHEET_ID_AQUI"
 SHEET_NAME = "Hoja 1"  # Nombre de la pestaña en tu Google Sheet
+SHEET_PAGE_SIZE = 5000  # Filas por página al leer la hoja en modo streaming
+COLUMNAR_LOADING = True  # Construir los documentos por columnas (pandas) y crearlos solo al usarlos
+
+# Varias fuentes: lista de ids de documento (se leen todas sus pestañas) o de tuplas
+# (id, pestaña). Vacía = solo SPREADSHEET_ID / SHEET_NAME
+SHEET_SOURCES = []
+SHEETS_MAX_WORKERS = 8  # Documentos que se descargan a la vez
+SHEETS_POOL_SIZE = 10  # Conexiones HTTP que se reutilizan entre peticiones
 
 # Configuración del modelo
 MODEL_NAME = "gemini-1.5-flash"  # O "gemini-pro" o "gemini-1.5-pro"
 TEMPERATURE = 0.7  # Entre 0 (más determinista) y 1 (más creativo)
 
 # Configuración de RAG
-CHUNK_SIZE = 1000  # Tamaño de los chunks de texto
+CHUNK_SIZE = 1000  # Tamaño máximo de los chunks de texto (caracteres)
 CHUNK_OVERLAP = 200  # Superposición entre chunks
+CHUNK_HEADER_LINES = 2  # Líneas iniciales (Tema y Pregunta) que se repiten en cada chunk
+MERGE_SIBLING_CHUNKS = True  # Unir los chunks recuperados de una misma fila antes del prompt
 TOP_K_DOCUMENTS = 3  # Número de documentos a recuperar
+QUERY_MAX_CONCURRENCY = 8  # Consultas simultáneas en query_batch / aquery_batch
+
+# Filas repetidas: las que solo cambian en mayúsculas, tildes o puntuación se unen en
+# un único documento, y también las casi iguales (MinHash + LSH sobre el contenido).
+# Con --stream solo se eliminan las repetidas exactas, para no guardar una firma por fila
+DEDUP_ENABLED = False
+DEDUP_THRESHOLD = 0.9  # Similitud de Jaccard mínima para considerar dos filas iguales
+DEDUP_NUM_PERM = 64  # Longitud de la firma MinHash
+DEDUP_BANDS = 16  # Bandas de LSH (más bandas = se comparan más candidatos)
+
+# Búsqueda híbrida: BM25 (palabras clave) + FAISS, combinadas con Reciprocal Rank Fusion
+HYBRID_SEARCH = False
+HYBRID_FETCH_K = 20  # Candidatos de cada búsqueda antes de fusionar
+RRF_K = 60  # Constante de suavizado de RRF
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Respuestas directas: si la pregunta casi coincide con una `pregunta` de la hoja,
+# se devuelve su `respuesta` sin llamar al LLM
+FAQ_FAST_PATH = False
+FAQ_SIMILARITY_THRESHOLD = 0.95  # Similitud coseno mínima para responder directamente
+FAQ_SEARCH_K = 10  # Preguntas candidatas cuando la consulta se filtra por tema
+
+# Caché semántica de respuestas (None para desactivar; p. ej. "answer_cache.sqlite").
+# Se invalida al cambiar el índice
+ANSWER_CACHE_PATH = None
+ANSWER_CACHE_SIMILARITY_THRESHOLD = 0.97  # Similitud coseno mínima para reutilizar una respuesta
+ANSWER_CACHE_TTL_SECONDS = 24 * 3600  # Antigüedad máxima de una respuesta (None = sin límite)
+ANSWER_CACHE_MAX_ENTRIES = 10_000  # Respuestas guardadas (se eliminan las menos usadas)
 
 # Configuración de embeddings
 EMBEDDING_MODEL = "models/embedding-001"  # Modelo de embeddings de Google
+EMBEDDING_CACHE_PATH = "embedding_cache.sqlite"  # Caché de embeddings en disco (None para desactivar)
+EMBEDDING_CACHE_MAX_ENTRIES = 1_000_000  # Máximo de vectores en caché (se eliminan los menos usados)
+EMBEDDING_BATCH_SIZE = 100  # Textos por petición de embeddings
+EMBEDDING_MAX_CONCURRENCY = 4  # Peticiones de embeddings simultáneas
+EMBEDDING_REQUESTS_PER_MINUTE = 1500  # Cuota de peticiones por minuto (None = sin límite)
+EMBEDDING_MAX_RETRIES = 5  # Reintentos por lote ante errores o 429
 
 # Rutas
 CREDENTIALS_PATH = "credentials.json"
 FAISS_INDEX_PATH = "faiss_index"  # Ruta donde se guardará el índice FAISS
 
-# Validación
-if not GOOGLE_API_KEY or GOOGLE_API_KEY == "tu_api_key_de_gemini_aqui":
-    print("⚠️  ADVERTENCIA: No se ha configurado GOOGLE_API_KEY en el archivo .env")
-    print("   Por favor, copia .env.example a .env y agrega tu API key")
+# Tipo de índice FAISS (factory string): "Flat" (exacto), "IVF4096,Flat",
+# "IVF4096,PQ64" o "HNSW32" para colecciones grandes
+FAISS_INDEX_FACTORY = "Flat"
+FAISS_TRAINING_SAMPLE_SIZE = 100_000  # Vectores usados para entrenar IVF/PQ
+FAISS_NPROBE = 16  # Listas IVF visitadas por consulta (más = más recall, más latencia)
+FAISS_EF_SEARCH = 64  # Candidatos explorados por consulta en HNSW
+FAISS_MMAP = False  # Cargar el índice mapeado en memoria (solo lectura, compartido entre procesos)
+DOCSTORE_BACKEND = "sqlite"  # "sqlite" (lectura bajo demanda) o "pickle" (todo en memoria)
+
 
-if SPREADSHEET_ID == "TU_SPREADSHEET_ID_AQUI":
-    print("⚠️  ADVERTENCIA: No se ha configurado SPREADSHEET_ID en config.py")
-    print("   Por favor, actualiza el SPREADSHEET_ID con el ID de tu Google Sheet")
+def validate() -> List[str]:
+    """
+    Comprueba la configuración.
+    
+    Returns:
+        Lista de advertencias (vacía si todo está configurado)
+    """
+    settings = get_settings()
+    if settings.offline_mode:
+        return []
+    
+    warnings = []
+    if not settings.google_api_key or settings.google_api_key == "tu_api_key_de_gemini_aqui":
+        warnings.append(
+            "No se ha configurado GOOGLE_API_KEY en el archivo .env\n"
+            "   Por favor, copia .env.example a .env y agrega tu API key"
+        )
+    if not DATA_SOURCE and not SHEET_SOURCES and SPREADSHEET_ID == "TU_SPREADSHEET_ID_AQUI":
+        warnings.append(
+            "No se ha configurado SPREADSHEET_ID en config.py\n"
+            "   Por favor, actualiza el SPREADSHEET_ID con el ID de tu Google Sheet"
+        )
+    return warnings
 
 
+def print_warnings():
+    """Muestra las advertencias de configuración"""
+    for warning in validate():
+        print(f"⚠️  ADVERTENCIA: {warning}")
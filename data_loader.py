@@ -1,69 +1,400 @@
 """
 Módulo para cargar datos desde Google Sheets
 """
-import gspread
-from google.oauth2.service_account import Credentials
-from langchain.schema import Document
-from typing import List
+from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from langchain_core.documents import Document
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional
+import contextlib
+import csv
+import hashlib
+import importlib.util
+import os
 import config
+import metrics
 
+# pandas solo se importa al usar la carga por columnas
+if TYPE_CHECKING:
+    import pandas as pd
 
-def load_data_from_google_sheets() -> List[Document]:
+# Columnas de la hoja que forman el contenido de cada documento
+SHEET_COLUMNS = ("tema", "pregunta", "respuesta")
+
+# Formatos de archivo que se pueden usar como fuente, por extensión
+FILE_FORMATS = {
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".jsonl": "jsonl",
+    ".ndjson": "jsonl"
+}
+
+PYARROW_MISSING = "Para leer archivos Parquet hay que instalar pyarrow (pip install pyarrow)"
+
+
+def make_row_id(row: Dict) -> str:
     """
-    Carga datos desde Google Sheets y los convierte en documentos de LangChain.
+    Genera un identificador estable para una fila de la hoja.
+    
+    El id depende del tema y la pregunta (no de la posición de la fila),
+    así que insertar o reordenar filas no cambia el id de las demás.
     
+    Args:
+        row: Fila de la hoja como diccionario
+        
     Returns:
-        List[Document]: Lista de documentos con contenido y metadata
+        Identificador hexadecimal de la fila
     """
-    print("📊 Conectando con Google Sheets...")
+    key = f"{row.get('tema', 'N/A')}\x1f{row.get('pregunta', 'N/A')}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+
+
+def compute_content_hash(content: str) -> str:
+    """
+    Calcula el hash del contenido de un documento.
+    
+    Args:
+        content: Texto del documento
+        
+    Returns:
+        Hash SHA-1 en hexadecimal
+    """
+    return hashlib.sha1(content.encode("utf-8")).hexdigest()
+
+
+def row_to_document(row: Dict, seen_ids: Dict[str, int], source: str = "Google Sheets") -> Document:
+    """
+    Convierte una fila de la hoja en un documento de LangChain.
+    
+    Args:
+        row: Fila de la hoja como diccionario (tema, pregunta, respuesta)
+        seen_ids: Contador de ids ya usados, para desambiguar filas repetidas
+        source: Origen de los datos (se guarda en la metadata)
+        
+    Returns:
+        Document con contenido y metadata
+    """
+    # Crear el contenido del documento
+    # Combinamos pregunta y respuesta para tener contexto completo
+    content = f"Tema: {row.get('tema', 'N/A')}\n"
+    content += f"Pregunta: {row.get('pregunta', 'N/A')}\n"
+    content += f"Respuesta: {row.get('respuesta', 'N/A')}"
+    
+    # Id estable de la fila (las filas repetidas reciben un sufijo)
+    row_id = make_row_id(row)
+    seen_ids[row_id] = seen_ids.get(row_id, 0) + 1
+    if seen_ids[row_id] > 1:
+        row_id = f"{row_id}-{seen_ids[row_id]}"
+    
+    # Crear metadata
+    metadata = {
+        "tema": row.get('tema', 'N/A'),
+        "pregunta": row.get('pregunta', 'N/A'),
+        "respuesta": row.get('respuesta', 'N/A'),
+        "source": source,
+        "row_id": row_id,
+        "content_hash": compute_content_hash(content)
+    }
+    
+    return Document(page_content=content, metadata=metadata)
+
+
+def open_spreadsheet():
+    """
+    Abre el documento configurado con el cliente compartido (que se
+    autentica con la cuenta de servicio solo la primera vez).
+    
+    Returns:
+        gspread.Spreadsheet de `config.SPREADSHEET_ID`
+    """
+    from sheets_client import get_google_client
     
-    # Definir los scopes necesarios
-    scopes = [
-        "https://www.googleapis.com/auth/spreadsheets.readonly",
-        "https://www.googleapis.com/auth/drive.readonly"
+    return get_google_client().open_by_key(config.SPREADSHEET_ID)
+
+
+def open_worksheet():
+    """
+    Abre la pestaña configurada de la hoja.
+    
+    Returns:
+        gspread.Worksheet de `config.SPREADSHEET_ID` / `config.SHEET_NAME`
+    """
+    return open_spreadsheet().worksheet(config.SHEET_NAME)
+
+
+def get_source_fingerprint() -> Optional[Dict]:
+    """
+    Calcula la huella de la fuente de datos sin descargar su contenido.
+    
+    Solo se consultan metadatos (fecha de última modificación y tamaño de
+    la hoja), así que es una llamada rápida. Incluye también el modelo de
+    embeddings y la configuración de chunks y de duplicados, que determinan
+    cómo se construyó el índice.
+    
+    Returns:
+        Diccionario con la huella, o None si no se pudo consultar la fuente
+    """
+    fingerprint = {
+        "embedding_model": "offline" if config.OFFLINE_MODE else config.EMBEDDING_MODEL,
+        "chunk_size": config.CHUNK_SIZE,
+        "chunk_overlap": config.CHUNK_OVERLAP,
+        "chunk_header_lines": config.CHUNK_HEADER_LINES,
+        "dedup_threshold": config.DEDUP_THRESHOLD if config.DEDUP_ENABLED else None,
+        # La firma y las bandas de LSH también cambian qué filas se consideran duplicadas
+        "dedup_num_perm": config.DEDUP_NUM_PERM if config.DEDUP_ENABLED else None,
+        "dedup_bands": config.DEDUP_BANDS if config.DEDUP_ENABLED else None
+    }
+    
+    try:
+        with metrics.timer("fingerprint"):
+            data_file = get_data_file()
+            if data_file:
+                stat = os.stat(data_file)
+                fingerprint.update({
+                    "source": data_file,
+                    "size": stat.st_size,
+                    "modified": stat.st_mtime
+                })
+            elif uses_sheet_sources():
+                fingerprint.update(get_sheet_sources_fingerprint())
+            else:
+                spreadsheet = open_spreadsheet()
+                sheet = spreadsheet.worksheet(config.SHEET_NAME)
+                fingerprint.update({
+                    "spreadsheet_id": config.SPREADSHEET_ID,
+                    "sheet_name": config.SHEET_NAME,
+                    "last_update_time": spreadsheet.get_lastUpdateTime(),
+                    "row_count": sheet.row_count,
+                    "col_count": sheet.col_count
+                })
+        return fingerprint
+        
+    except Exception as e:
+        print(f"⚠️  No se pudo consultar la huella de la fuente de datos: {str(e)}")
+        return None
+
+
+@dataclass(frozen=True)
+class SheetSource:
+    """Una pestaña de un documento de Google Sheets"""
+    spreadsheet_id: str
+    sheet_name: Optional[str] = None  # None = todas las pestañas del documento
+    
+    @property
+    def label(self) -> str:
+        """Texto con el que se etiquetan los documentos de la pestaña"""
+        return f"{self.spreadsheet_id}/{self.sheet_name}"
+
+
+def get_sheet_sources() -> List[SheetSource]:
+    """
+    Fuentes configuradas en `config.SHEET_SOURCES`.
+    
+    Cada entrada puede ser el id de un documento (todas sus pestañas) o una
+    tupla (id, pestaña). Si la lista está vacía se usa
+    `config.SPREADSHEET_ID` / `config.SHEET_NAME`.
+    
+    Returns:
+        Lista de fuentes
+    """
+    if not config.SHEET_SOURCES:
+        return [SheetSource(config.SPREADSHEET_ID, config.SHEET_NAME)]
+    return [
+        SheetSource(entry) if isinstance(entry, str) else SheetSource(*entry)
+        for entry in config.SHEET_SOURCES
     ]
+
+
+def uses_sheet_sources() -> bool:
+    """
+    Indica si los datos se leen de `config.SHEET_SOURCES`.
+    
+    No se usan si hay un archivo en `config.DATA_SOURCE`. En modo sin
+    conexión solo se usan si hay `config.OFFLINE_SHEETS_DIR`; si no, se lee
+    `config.OFFLINE_DATA_PATH`.
+    """
+    if config.DATA_SOURCE or not config.SHEET_SOURCES:
+        return False
+    return not config.OFFLINE_MODE or bool(config.OFFLINE_SHEETS_DIR)
+
+
+def get_data_file() -> Optional[str]:
+    """
+    Archivo del que se leen los datos, si no se leen de Google Sheets.
+    
+    Returns:
+        `config.DATA_SOURCE` si está definido; `config.OFFLINE_DATA_PATH` en
+        modo sin conexión (salvo que se usen `SHEET_SOURCES` locales); si
+        no, None
+    """
+    if config.DATA_SOURCE:
+        return config.DATA_SOURCE
+    if config.OFFLINE_MODE and not uses_sheet_sources():
+        return config.OFFLINE_DATA_PATH
+    return None
+
+
+def _group_by_spreadsheet(sources: List[SheetSource]) -> Dict[str, List[Optional[str]]]:
+    groups = {}
+    for source in sources:
+        groups.setdefault(source.spreadsheet_id, []).append(source.sheet_name)
+    return groups
+
+
+def get_sheet_sources_fingerprint(sources: List[SheetSource] = None, client=None) -> Dict:
+    """
+    Huella de varias fuentes: la fecha de modificación de cada documento,
+    consultadas en paralelo.
+    
+    Args:
+        sources: Fuentes a consultar (por defecto `get_sheet_sources()`)
+        client: Cliente de hojas (por defecto `sheets_client.get_sheets_client()`)
+        
+    Returns:
+        Diccionario con las fuentes y sus fechas de modificación
+    """
+    from sheets_client import get_sheets_client
+    
+    sources = sources or get_sheet_sources()
+    client = client or get_sheets_client()
+    spreadsheet_ids = list(_group_by_spreadsheet(sources))
+    with ThreadPoolExecutor(max_workers=min(config.SHEETS_MAX_WORKERS, len(spreadsheet_ids))) as executor:
+        update_times = list(executor.map(client.last_update_time, spreadsheet_ids))
+    return {
+        "sheet_sources": [[source.spreadsheet_id, source.sheet_name] for source in sources],
+        "last_update_time": dict(zip(spreadsheet_ids, update_times))
+    }
+
+
+def _fetch_spreadsheet(client, spreadsheet_id: str,
+                       sheet_names: List[Optional[str]]) -> List["pd.DataFrame"]:
+    """
+    Lee las pestañas pedidas de un documento con una sola petición por rangos.
+    
+    Returns:
+        Un DataFrame por pestaña, con la columna `source`
+    """
+    import pandas as pd
+    from sheets_client import quote_sheet_name
+    
+    if None in sheet_names:
+        sheet_names = client.worksheet_titles(spreadsheet_id)
+    # Sin repetir pestañas, manteniendo el orden
+    sheet_names = list(dict.fromkeys(sheet_names))
+    
+    ranges = [quote_sheet_name(name) for name in sheet_names]
+    frames = []
+    for sheet_name, values in zip(sheet_names, client.values_batch_get(spreadsheet_id, ranges)):
+        if not values:
+            continue
+        header, rows = values[0], values[1:]
+        # La API omite las celdas vacías del final de cada fila
+        rows = [row + [""] * (len(header) - len(row)) for row in rows]
+        frame = pd.DataFrame([row[:len(header)] for row in rows], columns=header, dtype=object)
+        frame["source"] = SheetSource(spreadsheet_id, sheet_name).label
+        frames.append(frame)
+    return frames
+
+
+def load_dataframe_from_sheet_sources(sources: List[SheetSource] = None, client=None,
+                                      max_workers: int = None) -> "pd.DataFrame":
+    """
+    Lee varias pestañas, de uno o varios documentos, en un único DataFrame.
+    
+    Los documentos se descargan en paralelo (con el pool de conexiones del
+    cliente compartido) y todas las pestañas de un mismo documento se leen
+    con una sola llamada a `values:batchGet`.
+    
+    Args:
+        sources: Fuentes a leer (por defecto `get_sheet_sources()`)
+        client: Cliente de hojas (por defecto `sheets_client.get_sheets_client()`)
+        max_workers: Documentos leídos a la vez (por defecto `config.SHEETS_MAX_WORKERS`)
+        
+    Returns:
+        DataFrame con una columna por encabezado y la columna `source`
+        (`<spreadsheet_id>/<pestaña>`)
+    """
+    import pandas as pd
+    from sheets_client import get_sheets_client
+    
+    sources = sources or get_sheet_sources()
+    client = client or get_sheets_client()
+    groups = _group_by_spreadsheet(sources)
+    max_workers = min(max_workers or config.SHEETS_MAX_WORKERS, len(groups))
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(lambda item: _fetch_spreadsheet(client, *item), groups.items())
+        frames = [frame for spreadsheet_frames in results for frame in spreadsheet_frames]
+    
+    if not frames:
+        return pd.DataFrame(columns=list(SHEET_COLUMNS) + ["source"])
+    return pd.concat(frames, ignore_index=True).fillna("")
+
+
+def load_sheet_sources(sources: List[SheetSource] = None, client=None) -> Optional["ColumnarDocuments"]:
+    """
+    Carga los documentos de todas las fuentes configuradas.
+    
+    Cada documento lleva en `source` la pestaña de la que viene. Si alguna
+    fuente falla no se devuelve nada, para no sincronizar el índice con
+    datos incompletos.
+    
+    Args:
+        sources: Fuentes a leer (por defecto `get_sheet_sources()`)
+        client: Cliente de hojas (por defecto `sheets_client.get_sheets_client()`)
+        
+    Returns:
+        ColumnarDocuments, o None si no se pudieron cargar
+    """
+    sources = sources or get_sheet_sources()
+    print(f"📊 Leyendo {len(sources)} fuentes de Google Sheets...")
     
     try:
-        # Autenticar con las credenciales
-        credentials = Credentials.from_service_account_file(
-            config.CREDENTIALS_PATH,
-            scopes=scopes
-        )
+        with metrics.timer("sheet_load"):
+            frame = load_dataframe_from_sheet_sources(sources, client)
+        print(f"✅ Se encontraron {len(frame)} filas de datos en {frame['source'].nunique()} pestañas")
         
-        # Conectar con Google Sheets
-        client = gspread.authorize(credentials)
+        with metrics.timer("document_build"):
+            documents = documents_from_frame(frame)
         
-        # Abrir la hoja por ID
-        spreadsheet = client.open_by_key(config.SPREADSHEET_ID)
-        sheet = spreadsheet.worksheet(config.SHEET_NAME)
+        print(f"✅ Se prepararon {len(documents)} documentos")
+        return documents
         
-        # Obtener todos los datos
-        data = sheet.get_all_records()
+    except FileNotFoundError as e:
+        print(f"❌ Error: No se encontró el archivo {e.filename}")
+        return None
+    except Exception as e:
+        print(f"❌ Error al cargar datos: {str(e)}")
+        return None
+
+
+def load_data_from_google_sheets() -> List[Document]:
+    """
+    Carga datos desde Google Sheets y los convierte en documentos de LangChain.
+    
+    Returns:
+        List[Document]: Lista de documentos con contenido y metadata
+    """
+    print("📊 Conectando con Google Sheets...")
+    
+    try:
+        with metrics.timer("sheet_load"):
+            sheet = open_worksheet()
+            
+            # Obtener todos los datos como texto, igual que la carga por
+            # columnas y por páginas (get_all_records convertiría "007" en 7 y
+            # cambiaría el content_hash según el camino de carga)
+            values = sheet.get_all_values()
+            header = values[0] if values else []
+            data = [dict(zip(header, raw)) for raw in values[1:] if any(raw)]
         
         print(f"✅ Se encontraron {len(data)} filas de datos")
         
         # Convertir a documentos de LangChain
-        documents = []
-        for row in data:
-            # Crear el contenido del documento
-            # Combinamos pregunta y respuesta para tener contexto completo
-            content = f"Tema: {row.get('tema', 'N/A')}\n"
-            content += f"Pregunta: {row.get('pregunta', 'N/A')}\n"
-            content += f"Respuesta: {row.get('respuesta', 'N/A')}"
-            
-            # Crear metadata
-            metadata = {
-                "tema": row.get('tema', 'N/A'),
-                "pregunta": row.get('pregunta', 'N/A'),
-                "source": "Google Sheets"
-            }
-            
-            # Crear documento
-            doc = Document(
-                page_content=content,
-                metadata=metadata
-            )
-            documents.append(doc)
+        with metrics.timer("document_build"):
+            seen_ids = {}
+            documents = [row_to_document(row, seen_ids) for row in data]
         
         print(f"✅ Se crearon {len(documents)} documentos")
         return documents
@@ -81,6 +412,423 @@ def load_data_from_google_sheets() -> List[Document]:
         return []
 
 
+def load_data_from_csv(path: str) -> List[Document]:
+    """
+    Carga los datos desde un CSV con las mismas columnas que la hoja
+    (tema, pregunta, respuesta). Se usa en el modo sin conexión.
+    
+    Args:
+        path: Ruta del archivo CSV
+        
+    Returns:
+        List[Document]: Lista de documentos con contenido y metadata
+    """
+    print(f"📄 Cargando datos desde {path}...")
+    
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            with metrics.timer("sheet_load"):
+                # Sin las filas vacías, igual que los demás cargadores
+                rows = [row for row in csv.DictReader(f) if any(row.values())]
+        with metrics.timer("document_build"):
+            seen_ids = {}
+            documents = [row_to_document(row, seen_ids, source=path) for row in rows]
+        
+        print(f"✅ Se crearon {len(documents)} documentos")
+        return documents
+        
+    except Exception as e:
+        print(f"❌ Error al cargar datos: {str(e)}")
+        return []
+
+
+def iter_documents_from_google_sheets(page_size: int = None) -> Iterator[Document]:
+    """
+    Lee la hoja por páginas y genera los documentos uno a uno.
+    
+    A diferencia de `load_data_from_google_sheets()`, nunca tiene la hoja
+    completa en memoria: cada página se pide con una lectura por rango y se
+    descarta en cuanto sus documentos se consumen.
+    
+    Args:
+        page_size: Filas por página (por defecto `config.SHEET_PAGE_SIZE`)
+        
+    Yields:
+        Document por cada fila con datos
+    """
+    page_size = page_size or config.SHEET_PAGE_SIZE
+    print("📊 Conectando con Google Sheets (lectura por páginas)...")
+    
+    from gspread.utils import rowcol_to_a1
+    
+    with metrics.timer("sheet_load"):
+        sheet = open_worksheet()
+        header = sheet.row_values(1)
+    last_column = rowcol_to_a1(1, len(header)).rstrip("0123456789")
+    
+    seen_ids = {}
+    total = 0
+    for start in range(2, sheet.row_count + 1, page_size):
+        end = min(start + page_size - 1, sheet.row_count)
+        with metrics.timer("sheet_load"):
+            values = sheet.get(f"A{start}:{last_column}{end}")
+        for raw in values:
+            if not any(raw):
+                continue
+            # La API omite las celdas vacías del final de la fila: se rellenan con ''
+            # como en get_all_values(), para que el contenido y el hash no cambien
+            row = dict(zip(header, list(raw) + [""] * (len(header) - len(raw))))
+            yield row_to_document(row, seen_ids)
+            total += 1
+        print(f"   📄 {total} filas leídas...")
+    
+    print(f"✅ Se generaron {total} documentos")
+
+
+class ColumnarDocuments(Sequence):
+    """
+    Colección de documentos guardada por columnas.
+    
+    El contenido y la metadata de todas las filas viven en un DataFrame
+    (una columna por campo), y cada `Document` se crea solo cuando se pide:
+    al iterar (por ejemplo, mientras se indexa, lote a lote) o al acceder
+    por posición. Así no hay un objeto `Document` y un diccionario de
+    metadata por fila ocupando memoria durante toda la carga.
+    
+    Se comporta como una lista de solo lectura: `len()`, índices, slices
+    e iteración.
+    """
+    
+    def __init__(self, frame: "pd.DataFrame"):
+        """
+        Args:
+            frame: DataFrame con la columna `page_content` y una columna por
+                campo de metadata (los valores None no se incluyen)
+        """
+        self.frame = frame
+        self._names = [name for name in frame.columns if name != "page_content"]
+        self._content = frame["page_content"].to_numpy(dtype=object)
+        self._values = [frame[name].to_numpy(dtype=object) for name in self._names]
+    
+    def __len__(self) -> int:
+        return len(self._content)
+    
+    def _document(self, content: str, values) -> Document:
+        metadata = {name: value for name, value in zip(self._names, values) if value is not None}
+        return Document(page_content=content, metadata=metadata)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return ColumnarDocuments(self.frame.iloc[index].reset_index(drop=True))
+        return self._document(self._content[index], [values[index] for values in self._values])
+    
+    def __iter__(self) -> Iterator[Document]:
+        for content, *values in zip(self._content, *self._values):
+            yield self._document(content, values)
+    
+    def column(self, name: str):
+        """
+        Valores de un campo para todas las filas, sin crear documentos.
+        
+        Args:
+            name: `page_content` o un campo de metadata
+            
+        Returns:
+            Array de numpy
+        """
+        if name == "page_content":
+            return self._content
+        return self._values[self._names.index(name)]
+    
+    def take(self, positions) -> "ColumnarDocuments":
+        """
+        Selecciona algunas filas.
+        
+        Args:
+            positions: Posiciones de las filas a conservar
+            
+        Returns:
+            Nueva colección con esas filas
+        """
+        return ColumnarDocuments(self.frame.iloc[positions].reset_index(drop=True))
+
+
+def documents_from_frame(frame: "pd.DataFrame", source: str = "Google Sheets",
+                         seen_ids: Dict[str, int] = None) -> ColumnarDocuments:
+    """
+    Construye los documentos de todas las filas de una vez, por columnas.
+    
+    Produce el mismo contenido, `row_id` y `content_hash` que
+    `row_to_document`, pero arma los textos con operaciones sobre columnas
+    enteras en lugar de un bucle con concatenaciones por fila. Las filas
+    vacías se descartan.
+    
+    Args:
+        frame: Filas de la hoja (una columna por encabezado, valores de texto)
+        source: Origen de los datos (se guarda en la metadata); si `frame`
+            tiene una columna `source`, se usa esa
+        seen_ids: Contador de ids ya usados en bloques anteriores (se
+            actualiza), para desambiguar filas repetidas entre bloques
+        
+    Returns:
+        ColumnarDocuments con los documentos
+    """
+    import pandas as pd
+    
+    cells = frame.drop(columns="source", errors="ignore")
+    frame = frame[(cells.astype(str) != "").any(axis=1)].reset_index(drop=True)
+    if "source" in frame.columns:
+        source = frame["source"]
+    fields = {
+        name: frame[name].astype(str) if name in frame.columns
+        else pd.Series("N/A", index=frame.index, dtype=object)
+        for name in SHEET_COLUMNS
+    }
+    content = ("Tema: " + fields["tema"] + "\nPregunta: " + fields["pregunta"]
+               + "\nRespuesta: " + fields["respuesta"])
+    
+    # Los hashes son por fila (SHA-1), pero sin crear diccionarios ni Document
+    keys = fields["tema"] + "\x1f" + fields["pregunta"]
+    row_id = pd.Series([hashlib.sha1(key.encode("utf-8")).hexdigest()[:16] for key in keys],
+                       index=frame.index, dtype=object)
+    occurrence = row_id.groupby(row_id).cumcount() + 1
+    if seen_ids:
+        occurrence += row_id.map(seen_ids).fillna(0).astype(int)
+    if seen_ids is not None:
+        for key, count in row_id.value_counts().items():
+            seen_ids[key] = seen_ids.get(key, 0) + count
+    row_id = row_id.where(occurrence == 1, row_id + "-" + occurrence.astype(str))
+    content_hash = [compute_content_hash(text) for text in content]
+    
+    return ColumnarDocuments(pd.DataFrame({
+        "page_content": content,
+        **fields,
+        "source": source,
+        "row_id": row_id,
+        "content_hash": content_hash
+    }))
+
+
+def load_dataframe_from_google_sheets() -> "pd.DataFrame":
+    """
+    Lee la hoja completa en un DataFrame de texto.
+    
+    Usa `get_all_values()` (una lista por fila), la misma lectura que
+    `load_data_from_google_sheets()`, así que los textos y el `content_hash`
+    coinciden con los de la carga por filas.
+    
+    Returns:
+        DataFrame con una columna por encabezado
+    """
+    import pandas as pd
+    
+    sheet = open_worksheet()
+    values = sheet.get_all_values()
+    if not values:
+        return pd.DataFrame(columns=list(SHEET_COLUMNS))
+    return pd.DataFrame(values[1:], columns=values[0])
+
+
+def load_dataframe_from_csv(path: str) -> "pd.DataFrame":
+    """
+    Lee un CSV con las columnas de la hoja en un DataFrame de texto.
+    
+    Si pyarrow está instalado se usa su lector, que es multihilo.
+    
+    Args:
+        path: Ruta del archivo CSV
+        
+    Returns:
+        DataFrame con una columna por encabezado
+    """
+    import pandas as pd
+    
+    try:
+        import pyarrow  # noqa: F401
+        engine = {"engine": "pyarrow"}
+    except ImportError:
+        engine = {}
+    return pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8", **engine)
+
+
+def file_format(path: str) -> str:
+    """
+    Formato de un archivo de datos según su extensión.
+    
+    Args:
+        path: Ruta del archivo
+        
+    Returns:
+        "csv", "parquet" o "jsonl"
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FILE_FORMATS:
+        raise ValueError(f"Formato de archivo no soportado: {path} "
+                         f"(se admiten {', '.join(sorted(FILE_FORMATS))})")
+    return FILE_FORMATS[extension]
+
+
+def check_data_file(path: str):
+    """
+    Comprueba, antes de leer nada, que el archivo se puede cargar: que su
+    formato está soportado y que están instaladas sus dependencias opcionales.
+    
+    Args:
+        path: Ruta del archivo
+        
+    Raises:
+        ValueError: Si la extensión no corresponde a un formato soportado
+        ImportError: Si es un archivo Parquet y no está instalado pyarrow
+    """
+    # find_spec no importa pyarrow, solo comprueba que está instalado
+    if file_format(path) == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise ImportError(PYARROW_MISSING)
+
+
+def iter_dataframes_from_file(path: str, chunk_rows: int = None) -> Iterator["pd.DataFrame"]:
+    """
+    Lee un archivo CSV, Parquet o JSONL por bloques de filas.
+    
+    Solo hay un bloque en memoria a la vez, así que sirve para exportaciones
+    más grandes que la memoria. Los valores se devuelven como texto.
+    
+    Args:
+        path: Ruta del archivo (con las columnas tema, pregunta y respuesta)
+        chunk_rows: Filas por bloque (por defecto `config.FILE_CHUNK_ROWS`)
+        
+    Yields:
+        DataFrame con las filas de cada bloque
+    """
+    import pandas as pd
+    
+    chunk_rows = chunk_rows or config.FILE_CHUNK_ROWS
+    file_type = file_format(path)
+    
+    if file_type == "csv":
+        chunks = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8",
+                             chunksize=chunk_rows)
+    elif file_type == "jsonl":
+        chunks = pd.read_json(path, lines=True, dtype=False, encoding="utf-8", chunksize=chunk_rows)
+    else:
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError(PYARROW_MISSING)
+        chunks = (batch.to_pandas() for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows))
+    
+    # Cerrar el archivo aunque no se consuman todos los bloques
+    with contextlib.closing(chunks):
+        for chunk in chunks:
+            # JSONL y Parquet pueden traer números o nulos
+            yield chunk if file_type == "csv" else chunk.fillna("").astype(str)
+
+
+def load_dataframe_from_file(path: str) -> "pd.DataFrame":
+    """
+    Lee un archivo CSV, Parquet o JSONL completo en un DataFrame de texto.
+    
+    Args:
+        path: Ruta del archivo
+        
+    Returns:
+        DataFrame con una columna por encabezado
+    """
+    import pandas as pd
+    
+    if file_format(path) == "csv":
+        return load_dataframe_from_csv(path)
+    frames = list(iter_dataframes_from_file(path))
+    if not frames:
+        return pd.DataFrame(columns=list(SHEET_COLUMNS))
+    return pd.concat(frames, ignore_index=True)
+
+
+def iter_documents_from_file(path: str, chunk_rows: int = None) -> Iterator[Document]:
+    """
+    Lee un archivo por bloques y genera sus documentos.
+    
+    Como `iter_documents_from_google_sheets()`, pero para exportaciones en
+    CSV, Parquet o JSONL: cada bloque se convierte por columnas y se
+    descarta en cuanto sus documentos se consumen.
+    
+    Args:
+        path: Ruta del archivo
+        chunk_rows: Filas por bloque (por defecto `config.FILE_CHUNK_ROWS`)
+        
+    Yields:
+        Document por cada fila con datos
+    """
+    print(f"📄 Leyendo {path} por bloques...")
+    
+    seen_ids = {}
+    total = 0
+    frames = iter_dataframes_from_file(path, chunk_rows)
+    while True:
+        with metrics.timer("sheet_load"):
+            frame = next(frames, None)
+        if frame is None:
+            break
+        with metrics.timer("document_build"):
+            documents = documents_from_frame(frame, source=path, seen_ids=seen_ids)
+        yield from documents
+        total += len(documents)
+        print(f"   📄 {total} filas leídas...")
+    
+    print(f"✅ Se generaron {total} documentos")
+
+
+def load_data_from_file(path: str) -> List[Document]:
+    """
+    Carga todos los documentos de un archivo CSV, Parquet o JSONL.
+    
+    Args:
+        path: Ruta del archivo
+        
+    Returns:
+        List[Document]: Lista de documentos con contenido y metadata
+    """
+    try:
+        if file_format(path) == "csv":
+            return load_data_from_csv(path)
+        return list(iter_documents_from_file(path))
+        
+    except Exception as e:
+        print(f"❌ Error al cargar datos: {str(e)}")
+        return []
+
+
+def load_columnar_documents(path: str = None) -> Optional[ColumnarDocuments]:
+    """
+    Carga los documentos por columnas desde Google Sheets o, si se indica,
+    desde un archivo CSV, Parquet o JSONL.
+    
+    Args:
+        path: Ruta de un archivo con las columnas de la hoja (None = Google Sheets)
+        
+    Returns:
+        ColumnarDocuments, o None si no se pudieron cargar
+    """
+    print(f"📄 Cargando datos desde {path}..." if path else "📊 Conectando con Google Sheets...")
+    
+    try:
+        with metrics.timer("sheet_load"):
+            frame = load_dataframe_from_file(path) if path else load_dataframe_from_google_sheets()
+        print(f"✅ Se encontraron {len(frame)} filas de datos")
+        
+        with metrics.timer("document_build"):
+            documents = documents_from_frame(frame, source=path or "Google Sheets")
+        
+        print(f"✅ Se prepararon {len(documents)} documentos")
+        return documents
+        
+    except FileNotFoundError as e:
+        print(f"❌ Error: No se encontró el archivo {e.filename}")
+        return None
+    except Exception as e:
+        print(f"❌ Error al cargar datos: {str(e)}")
+        return None
+
+
 def print_documents_summary(documents: List[Document]):
     """
     Imprime un resumen de los documentos cargados.
@@ -97,7 +845,10 @@ def print_documents_summary(documents: List[Document]):
         return
     
     # Contar temas únicos
-    temas = set(doc.metadata.get('tema', 'N/A') for doc in documents)
+    if isinstance(documents, ColumnarDocuments):
+        temas = set(documents.column('tema'))
+    else:
+        temas = set(doc.metadata.get('tema', 'N/A') for doc in documents)
     print(f"\n📊 Total de documentos: {len(documents)}")
     print(f"📑 Temas únicos: {len(temas)}")
     print(f"🏷️  Temas: {', '.join(sorted(temas))}")
@@ -0,0 +1,409 @@
+"""
+Eliminación de filas duplicadas y casi duplicadas antes de embeber
+"""
+from langchain_core.documents import Document
+from data_loader import ColumnarDocuments, compute_content_hash
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import hashlib
+import itertools
+import re
+import unicodedata
+import zlib
+import metrics
+import numpy as np
+
+
+# Las permutaciones de MinHash son hashes multiply-shift: (a·x + b) mod 2^64, bits altos.
+# La aritmética de uint64 de numpy ya es módulo 2^64, así que no hace falta ninguna división
+_SHIFT = np.uint64(32)
+_SHINGLE_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_WORD_CACHE_MAX_ENTRIES = 2_000_000
+# n-gramas que se permutan a la vez: la matriz intermedia ocupa num_perm x 4096 uint64 (2 MB con 64)
+_SHINGLE_SLICE = 4096
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normaliza un texto para compararlo: minúsculas, sin tildes ni signos de
+    puntuación y con los espacios colapsados.
+
+    Args:
+        text: Texto original
+
+    Returns:
+        Texto normalizado
+    """
+    text = unicodedata.normalize("NFKD", text.casefold()).encode("ascii", "ignore").decode("ascii")
+    return _NON_WORD.sub(" ", text).strip()
+
+
+class Deduplicator:
+    """
+    Detecta documentos repetidos en una sola pasada.
+
+    1. Duplicados exactos: hash del texto normalizado (mayúsculas, tildes,
+       puntuación y espacios no cuentan).
+    2. Casi duplicados: firma MinHash de los n-gramas de palabras y LSH por
+       bandas. Cada documento solo se compara con los representantes que
+       comparten alguna banda con él, y el par se acepta si la similitud de
+       Jaccard estimada con la firma completa supera `threshold`.
+
+    Solo los documentos nuevos (representantes) se registran en las
+    estructuras, así que el coste es lineal en el número de documentos.
+    Las firmas se calculan con numpy por lotes.
+
+    Con `exact_only=True` se omite el paso 2: no se calculan firmas ni se
+    guardan bandas, y por cada representante solo se conserva su hash
+    (unos 100 bytes).
+    """
+
+    def __init__(self, threshold: float = 0.9, num_perm: int = 64, bands: int = 16,
+                 shingle_size: int = 3, seed: int = 1, exact_only: bool = False):
+        """
+        Args:
+            threshold: Similitud de Jaccard mínima para considerar dos documentos iguales
+            num_perm: Permutaciones (longitud de la firma MinHash)
+            bands: Bandas de LSH (debe dividir a `num_perm`)
+            shingle_size: Palabras por n-grama
+            seed: Semilla de las permutaciones
+            exact_only: Detectar solo los duplicados exactos (tras normalizar)
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm debe ser múltiplo de bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.exact_only = exact_only
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(0, 2**64 - 1, size=(num_perm, 1), dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**64 - 1, size=(num_perm, 1), dtype=np.uint64)
+
+        self.count = 0
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+        self._exact: Dict[bytes, int] = {}
+        self._buckets: List[Dict[bytes, int]] = [{} for _ in range(bands)]
+        self._signatures: Dict[int, np.ndarray] = {}
+        self._word_hashes: Dict[str, int] = {}
+
+    def _hash_word(self, word: str) -> int:
+        if len(self._word_hashes) >= _WORD_CACHE_MAX_ENTRIES:
+            self._word_hashes.clear()
+        value = self._word_hashes[word] = zlib.crc32(word.encode("utf-8"))
+        return value
+
+    def signatures(self, texts: List[str]) -> np.ndarray:
+        """
+        Calcula las firmas MinHash de varios textos normalizados a la vez.
+
+        Args:
+            texts: Textos normalizados
+
+        Returns:
+            Array (len(texts) x num_perm) de uint32
+        """
+        size = self.shingle_size
+        cache = self._word_hashes
+        word_hashes = []
+        lengths = []
+        for text in texts:
+            words = text.split()
+            if len(words) < size:
+                # Los textos cortos forman un único n-grama
+                words += [""] * (size - len(words))
+            word_hashes.extend([cache[word] if word in cache else self._hash_word(word)
+                                for word in words])
+            lengths.append(len(words))
+
+        # Los n-gramas de todo el lote se combinan a la vez, sin cruzar documentos
+        flat = np.array(word_hashes, dtype=np.uint64)
+        lengths = np.array(lengths, dtype=np.int64)
+        counts = lengths - size + 1
+        offsets = np.cumsum(counts) - counts
+        starts = np.repeat(np.cumsum(lengths) - lengths, counts)
+        positions = starts + np.arange(counts.sum()) - np.repeat(offsets, counts)
+        shingles = flat[positions]
+        for i in range(1, size):
+            shingles = shingles * _SHINGLE_MULTIPLIER + flat[positions + i]
+
+        # Las permutaciones se aplican por tramos de n-gramas para acotar la memoria;
+        # un documento que cae en varios tramos combina sus mínimos parciales
+        owners = np.repeat(np.arange(len(texts)), counts)
+        result = np.full((self.num_perm, len(texts)), np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(shingles), _SHINGLE_SLICE):
+            chunk = shingles[start:start + _SHINGLE_SLICE]
+            chunk_owners = owners[start:start + _SHINGLE_SLICE]
+            permuted = (self._a * chunk[None, :] + self._b) >> _SHIFT
+            bounds = np.flatnonzero(np.diff(chunk_owners)) + 1
+            bounds = np.concatenate(([0], bounds))
+            docs = chunk_owners[bounds]
+            mins = np.minimum.reduceat(permuted, bounds, axis=1)
+            result[:, docs] = np.minimum(result[:, docs], mins)
+        return result.T.astype(np.uint32)
+
+    def find_duplicates(self, documents: List[Document]) -> List[Optional[int]]:
+        """
+        Clasifica un lote de documentos.
+
+        Args:
+            documents: Documentos del lote (en orden de lectura)
+
+        Returns:
+            Por cada documento, el número de orden del representante del que
+            es duplicado, o None si es nuevo (y pasa a ser representante)
+        """
+        return self.find_duplicate_texts([doc.page_content for doc in documents])
+
+    def find_duplicate_texts(self, texts: Iterable[str]) -> List[Optional[int]]:
+        """Igual que `find_duplicates`, a partir del contenido de los documentos"""
+        normalized = [normalize_text(text) for text in texts]
+        if self.exact_only:
+            return [self._exact_duplicate(text) for text in normalized]
+        signatures = self.signatures(normalized)
+
+        band_bytes = self.rows * signatures.itemsize
+        results = []
+        for text, signature in zip(normalized, signatures):
+            index = self.count
+            self.count += 1
+
+            digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+            original = self._exact.get(digest)
+            if original is not None:
+                self.exact_duplicates += 1
+                results.append(original)
+                continue
+
+            raw = signature.tobytes()
+            keys = [raw[start:start + band_bytes] for start in range(0, len(raw), band_bytes)]
+            original = self._near_duplicate(signature, keys)
+            if original is not None:
+                self.near_duplicates += 1
+                results.append(original)
+                continue
+
+            self._exact[digest] = index
+            self._signatures[index] = signature
+            for bucket, key in zip(self._buckets, keys):
+                bucket.setdefault(key, index)
+            results.append(None)
+        return results
+
+    def _exact_duplicate(self, text: str) -> Optional[int]:
+        """Representante con el mismo texto normalizado, o None si el texto es nuevo"""
+        index = self.count
+        self.count += 1
+        digest = hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+        original = self._exact.setdefault(digest, index)
+        if original == index:
+            return None
+        self.exact_duplicates += 1
+        return original
+
+    def _near_duplicate(self, signature: np.ndarray, keys: List[bytes]) -> Optional[int]:
+        """Primer representante con una banda en común y similitud suficiente"""
+        checked = set()
+        for bucket, key in zip(self._buckets, keys):
+            candidate = bucket.get(key)
+            if candidate is None or candidate in checked:
+                continue
+            checked.add(candidate)
+            similarity = np.count_nonzero(self._signatures[candidate] == signature) / self.num_perm
+            if similarity >= self.threshold:
+                return candidate
+        return None
+
+    def stats(self) -> Dict:
+        """Documentos leídos, duplicados encontrados y documentos únicos"""
+        removed = self.exact_duplicates + self.near_duplicates
+        return {
+            "input": self.count,
+            "exact_duplicates": self.exact_duplicates,
+            "near_duplicates": self.near_duplicates,
+            "output": self.count - removed,
+            "embeddings_saved": removed
+        }
+
+
+def merge_duplicates(representative: Document, duplicates: List[Document]) -> Document:
+    """
+    Une un documento con sus duplicados.
+
+    Se conserva el contenido y el `row_id` del representante. La metadata
+    agrega los `row_id` y las preguntas distintas de los duplicados, y el
+    `content_hash` pasa a cubrir todas las filas, así que al sincronizar
+    el documento se vuelve a indexar si cambia cualquiera de ellas.
+
+    Args:
+        representative: Primera aparición
+        duplicates: Documentos repetidos
+
+    Returns:
+        Documento combinado
+    """
+    if not duplicates:
+        return representative
+    metadata = dict(representative.metadata)
+    metadata["duplicate_row_ids"] = [doc.metadata.get("row_id") for doc in duplicates]
+    preguntas = []
+    for doc in duplicates:
+        pregunta = doc.metadata.get("pregunta")
+        if pregunta and pregunta != metadata.get("pregunta") and pregunta not in preguntas:
+            preguntas.append(pregunta)
+    if preguntas:
+        metadata["duplicate_preguntas"] = preguntas
+    metadata["content_hash"] = compute_content_hash("\x1f".join(
+        str(doc.metadata.get("content_hash")) for doc in [representative] + duplicates
+    ))
+    return Document(page_content=representative.page_content, metadata=metadata)
+
+
+def _batches(documents: Iterable[Document], size: int) -> Iterator[List[Document]]:
+    iterator = iter(documents)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def deduplicate_documents(documents: Iterable[Document], threshold: float = 0.9,
+                          num_perm: int = 64, bands: int = 16,
+                          batch_size: int = 1000) -> Tuple[List[Document], Dict]:
+    """
+    Elimina los documentos duplicados y casi duplicados.
+
+    Cada grupo de duplicados se reduce a su primera aparición, con la
+    metadata combinada (ver `merge_duplicates`). Si se pasa un
+    `ColumnarDocuments`, se trabaja sobre su columna de contenido y el
+    resultado también es un `ColumnarDocuments`.
+
+    Args:
+        documents: Documentos a depurar
+        threshold: Similitud de Jaccard mínima para considerar dos documentos iguales
+        num_perm: Longitud de la firma MinHash
+        bands: Bandas de LSH
+        batch_size: Documentos por lote al calcular las firmas
+
+    Returns:
+        Tupla (documentos únicos, estadísticas)
+    """
+    deduplicator = Deduplicator(threshold=threshold, num_perm=num_perm, bands=bands)
+    if isinstance(documents, ColumnarDocuments):
+        with metrics.timer("dedup"):
+            unique = _deduplicate_columnar(documents, deduplicator, batch_size)
+        stats = deduplicator.stats()
+        print_dedup_stats(stats)
+        return unique, stats
+
+    unique: List[Document] = []
+    duplicates: Dict[int, List[Document]] = {}
+    position_of: Dict[int, int] = {}
+
+    with metrics.timer("dedup"):
+        for batch in _batches(documents, batch_size):
+            start = deduplicator.count
+            for offset, (doc, original) in enumerate(zip(batch, deduplicator.find_duplicates(batch))):
+                if original is None:
+                    position_of[start + offset] = len(unique)
+                    unique.append(doc)
+                else:
+                    duplicates.setdefault(position_of[original], []).append(doc)
+
+        for position, docs in duplicates.items():
+            unique[position] = merge_duplicates(unique[position], docs)
+
+    stats = deduplicator.stats()
+    print_dedup_stats(stats)
+    return unique, stats
+
+
+def _deduplicate_columnar(documents: ColumnarDocuments, deduplicator: Deduplicator,
+                          batch_size: int) -> ColumnarDocuments:
+    """
+    Deduplica por columnas: solo se crean `Document` para las filas que
+    tienen duplicados, al combinar su metadata.
+    """
+    texts = documents.column("page_content")
+    originals = []
+    for start in range(0, len(texts), batch_size):
+        originals.extend(deduplicator.find_duplicate_texts(texts[start:start + batch_size]))
+
+    keep = []
+    groups: Dict[int, List[int]] = {}
+    for position, original in enumerate(originals):
+        if original is None:
+            keep.append(position)
+        else:
+            groups.setdefault(original, []).append(position)
+
+    unique = documents.take(keep)
+    if not groups:
+        return unique
+
+    frame = unique.frame
+    columns = {}
+    for name in ("duplicate_row_ids", "duplicate_preguntas", "content_hash"):
+        # Arrays de objetos rellenados uno a uno: numpy no debe convertir las listas en dimensiones
+        values = np.empty(len(frame), dtype=object)
+        if name in frame.columns:
+            for position, value in enumerate(frame[name]):
+                values[position] = value
+        columns[name] = values
+    new_positions = np.searchsorted(keep, list(groups))
+    for new_position, (original, positions) in zip(new_positions, groups.items()):
+        merged = merge_duplicates(documents[original], [documents[p] for p in positions])
+        for name, values in columns.items():
+            values[new_position] = merged.metadata.get(name)
+    for name, values in columns.items():
+        frame[name] = values
+    return ColumnarDocuments(frame)
+
+
+def iter_unique_documents(documents: Iterable[Document], threshold: float = 0.9,
+                          num_perm: int = 64, bands: int = 16,
+                          batch_size: int = 1000, exact_only: bool = True) -> Iterator[Document]:
+    """
+    Versión en streaming de `deduplicate_documents`.
+
+    Entrega cada documento nuevo en cuanto se lee su lote y descarta los
+    duplicados. Como el representante ya se entregó, su metadata no se
+    combina con la de los duplicados que aparecen después.
+
+    Por defecto solo se eliminan los duplicados exactos: las firmas y las
+    bandas de LSH de todos los representantes crecerían con la hoja, y el
+    modo streaming debe usar memoria acotada.
+
+    Args:
+        documents: Iterable (por ejemplo, un generador por páginas)
+        threshold: Similitud de Jaccard mínima para considerar dos documentos iguales
+        num_perm: Longitud de la firma MinHash
+        bands: Bandas de LSH
+        batch_size: Documentos por lote al calcular las firmas
+        exact_only: Detectar solo los duplicados exactos (tras normalizar)
+
+    Yields:
+        Documentos únicos
+    """
+    deduplicator = Deduplicator(threshold=threshold, num_perm=num_perm, bands=bands,
+                                exact_only=exact_only)
+    for batch in _batches(documents, batch_size):
+        with metrics.timer("dedup"):
+            originals = deduplicator.find_duplicates(batch)
+        for doc, original in zip(batch, originals):
+            if original is None:
+                yield doc
+    print_dedup_stats(deduplicator.stats())
+
+
+def print_dedup_stats(stats: Dict):
+    """Muestra cuántos duplicados se eliminaron y cuántos embeddings se ahorran"""
+    saved = stats["embeddings_saved"]
+    percent = 100 * saved / stats["input"] if stats["input"] else 0.0
+    print(f"🧹 Duplicados: {stats['exact_duplicates']} exactos y {stats['near_duplicates']} "
+          f"casi iguales → {stats['output']} documentos únicos de {stats['input']}")
+    print(f"   💰 Embeddings ahorrados: {saved} ({percent:.1f}%)")
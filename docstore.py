@@ -0,0 +1,287 @@
+"""
+Docstore en SQLite: documentos por id, leídos bajo demanda
+"""
+from collections.abc import MutableMapping
+from langchain_community.docstore.base import AddableMixin, Docstore
+from langchain_core.documents import Document
+from typing import Dict, Iterator, List, Optional, Union
+import json
+import os
+import sqlite3
+import threading
+
+
+DOCSTORE_FILE = "docstore.sqlite"
+
+
+class SQLiteDocstore(Docstore, AddableMixin):
+    """
+    Docstore que guarda `page_content` y metadata en una base SQLite.
+
+    A diferencia del docstore en memoria (que se guarda con pickle), no hay
+    que deserializar todo el corpus al arrancar: cada búsqueda lee solo las
+    filas que se piden. `tema`, `pregunta` y `source` tienen columna propia;
+    el resto de la metadata se guarda como JSON.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Ruta del archivo SQLite (se crea si no existe)
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = self._connect(path)
+
+    @staticmethod
+    def _connect(path: str) -> sqlite3.Connection:
+        conn = sqlite3.connect(path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            "id TEXT PRIMARY KEY, page_content TEXT NOT NULL, "
+            "tema TEXT, pregunta TEXT, source TEXT, metadata TEXT NOT NULL)"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS index_map ("
+            "position INTEGER PRIMARY KEY, doc_id TEXT NOT NULL)"
+        )
+        conn.commit()
+        return conn
+
+    @staticmethod
+    def _to_document(row) -> Document:
+        page_content, metadata = row
+        return Document(page_content=page_content, metadata=json.loads(metadata))
+
+    def search(self, search: str) -> Union[str, Document]:
+        """
+        Busca un documento por id.
+
+        Args:
+            search: Id del documento
+
+        Returns:
+            El documento, o un mensaje si no existe (igual que InMemoryDocstore)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_content, metadata FROM documents WHERE id = ?", (search,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return self._to_document(row)
+
+    def mget(self, ids: List[str]) -> List[Optional[Document]]:
+        """
+        Busca varios documentos en una sola consulta.
+
+        Args:
+            ids: Ids de los documentos
+
+        Returns:
+            Documentos en el mismo orden (None si no existe)
+        """
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(ids))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, page_content, metadata FROM documents WHERE id IN ({placeholders})",
+                list(ids)
+            ).fetchall()
+        found = {row[0]: self._to_document(row[1:]) for row in rows}
+        return [found.get(id_) for id_ in ids]
+
+    def add(self, texts: Dict[str, Document]) -> None:
+        """
+        Agrega documentos al docstore.
+
+        Args:
+            texts: Diccionario id -> documento
+        """
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents "
+                "(id, page_content, tema, pregunta, source, metadata) VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        id_,
+                        doc.page_content,
+                        doc.metadata.get("tema"),
+                        doc.metadata.get("pregunta"),
+                        doc.metadata.get("source"),
+                        json.dumps(doc.metadata, ensure_ascii=False)
+                    )
+                    for id_, doc in texts.items()
+                ]
+            )
+            self._conn.commit()
+
+    def delete(self, ids: List) -> None:
+        """
+        Elimina documentos por id.
+
+        Args:
+            ids: Ids a eliminar
+        """
+        with self._lock:
+            self._conn.executemany("DELETE FROM documents WHERE id = ?", [(id_,) for id_ in ids])
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+
+    def save_index_map(self, index_to_docstore_id: Dict[int, str]):
+        """
+        Guarda la correspondencia posición FAISS -> id de documento.
+
+        Args:
+            index_to_docstore_id: Diccionario del vector store
+        """
+        if isinstance(index_to_docstore_id, SQLiteIndexMap) and index_to_docstore_id.docstore is self:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM index_map")
+            self._conn.executemany(
+                "INSERT INTO index_map (position, doc_id) VALUES (?, ?)",
+                index_to_docstore_id.items()
+            )
+            self._conn.commit()
+
+    def reconnect(self):
+        """
+        Abre una conexión nueva al mismo archivo.
+
+        Una conexión SQLite no puede usarse en un proceso hijo creado con
+        fork(); cada worker llama a este método antes de atender consultas.
+        """
+        with self._lock:
+            self._conn = self._connect(self.path)
+
+    def stage(self):
+        """
+        Sigue trabajando sobre una copia temporal del docstore.
+
+        Los cambios posteriores (`add`, `delete`, el mapa de posiciones) no
+        tocan el archivo guardado hasta que `persist()` pone la copia en su
+        lugar; si algo falla antes, basta con `discard()`.
+        """
+        staged_path = self.path + ".tmp"
+        with self._lock:
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(staged_path + suffix):
+                    os.remove(staged_path + suffix)
+            target = sqlite3.connect(staged_path)
+            self._conn.backup(target)
+            target.close()
+            self._conn.close()
+            self.path = staged_path
+            self._conn = self._connect(staged_path)
+
+    def discard(self):
+        """Cierra y elimina la copia temporal creada con `stage()`"""
+        with self._lock:
+            self._conn.close()
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(self.path + suffix):
+                    os.remove(self.path + suffix)
+
+    def persist(self, path: str):
+        """
+        Deja el docstore guardado en `path`.
+
+        Si el docstore se construyó en un archivo temporal, se mueve a su
+        ubicación final y se sigue usando desde ahí.
+
+        Args:
+            path: Ruta final del archivo SQLite
+        """
+        with self._lock:
+            self._conn.commit()
+            if os.path.abspath(path) == os.path.abspath(self.path):
+                return
+            self._conn.close()
+            for suffix in ("-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            os.replace(self.path, path)
+            self.path = path
+            self._conn = self._connect(path)
+
+
+class SQLiteIndexMap(MutableMapping):
+    """
+    Correspondencia posición FAISS -> id de documento leída desde SQLite.
+
+    Sustituye al diccionario `index_to_docstore_id` del vector store para no
+    cargar millones de ids en memoria al arrancar.
+    """
+
+    def __init__(self, docstore: SQLiteDocstore):
+        self.docstore = docstore
+
+    def _execute(self, sql: str, params=()):
+        with self.docstore._lock:
+            return self.docstore._conn.execute(sql, params).fetchall()
+
+    def __getitem__(self, position: int) -> str:
+        rows = self._execute("SELECT doc_id FROM index_map WHERE position = ?", (int(position),))
+        if not rows:
+            raise KeyError(position)
+        return rows[0][0]
+
+    def __setitem__(self, position: int, doc_id: str):
+        self.update({position: doc_id})
+
+    def __delitem__(self, position: int):
+        self._execute("DELETE FROM index_map WHERE position = ?", (int(position),))
+
+    def __iter__(self) -> Iterator[int]:
+        return iter([row[0] for row in self._execute("SELECT position FROM index_map ORDER BY position")])
+
+    def __len__(self) -> int:
+        return self._execute("SELECT COUNT(*) FROM index_map")[0][0]
+
+    def update(self, other=(), **kwargs):
+        items = dict(other, **kwargs)
+        with self.docstore._lock:
+            self.docstore._conn.executemany(
+                "INSERT OR REPLACE INTO index_map (position, doc_id) VALUES (?, ?)",
+                [(int(position), doc_id) for position, doc_id in items.items()]
+            )
+            self.docstore._conn.commit()
+
+    def remove(self, positions: List[int]):
+        """Elimina varias posiciones en una sola transacción"""
+        with self.docstore._lock:
+            self.docstore._conn.executemany(
+                "DELETE FROM index_map WHERE position = ?", [(int(position),) for position in positions]
+            )
+            self.docstore._conn.commit()
+
+    def max_position(self) -> int:
+        """Mayor posición guardada (-1 si no hay ninguna)"""
+        value = self._execute("SELECT MAX(position) FROM index_map")[0][0]
+        return -1 if value is None else value
+
+    def items(self):
+        return self._execute("SELECT position, doc_id FROM index_map ORDER BY position")
+
+    def values(self):
+        return [row[0] for row in self._execute("SELECT doc_id FROM index_map ORDER BY position")]
+
+
+def load_sqlite_docstore(folder_path: str):
+    """
+    Abre el docstore SQLite guardado junto a un índice FAISS.
+
+    Args:
+        folder_path: Carpeta del índice
+
+    Returns:
+        Tupla (docstore, index_to_docstore_id)
+    """
+    docstore = SQLiteDocstore(os.path.join(folder_path, DOCSTORE_FILE))
+    return docstore, SQLiteIndexMap(docstore)
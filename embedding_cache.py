@@ -0,0 +1,234 @@
+"""
+Caché persistente de embeddings en disco (SQLite)
+"""
+from langchain_core.embeddings import Embeddings
+from typing import Dict, List, Optional
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+# Los últimos accesos se acumulan en memoria y se escriben juntos, sin un commit por lectura
+_TOUCH_FLUSH_SIZE = 1000
+# Al superar `max_entries` se eliminan vectores hasta dejar este margen libre
+_EVICTION_SLACK = 0.1
+
+
+class EmbeddingCache:
+    """
+    Almacén de embeddings direccionado por contenido.
+
+    Cada vector se guarda bajo el hash de (modelo + texto), así que el
+    mismo texto con el mismo modelo nunca se vuelve a pagar. Cuando se
+    supera `max_entries` se eliminan los vectores usados hace más tiempo.
+
+    El último acceso de cada vector es aproximado: las lecturas lo anotan
+    en memoria y se guarda con la siguiente escritura (o cada
+    `_TOUCH_FLUSH_SIZE` lecturas), así leer no bloquea la base a los demás
+    procesos. El número de vectores también se lleva en memoria y solo se
+    vuelve a contar al superar el límite.
+    """
+
+    def __init__(self, path: str, model: str, max_entries: Optional[int] = None):
+        """
+        Inicializa la caché.
+
+        Args:
+            path: Ruta del archivo SQLite
+            model: Nombre del modelo de embeddings (forma parte de la clave)
+            max_entries: Número máximo de vectores a conservar (None = sin límite)
+        """
+        self.path = path
+        self.model = model
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "key TEXT PRIMARY KEY, vector BLOB NOT NULL, last_access REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_access ON embeddings (last_access)"
+        )
+        self._conn.commit()
+        self._touched: Dict[str, float] = {}
+        self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def make_key(self, text: str, kind: str = "document") -> str:
+        """
+        Calcula la clave de caché de un texto.
+
+        Args:
+            text: Texto a embeber
+            kind: "document" o "query" (Google usa tareas distintas para cada uno)
+
+        Returns:
+            Hash SHA-256 en hexadecimal
+        """
+        raw = f"{self.model}\x1f{kind}\x1f{text}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        """
+        Busca varios vectores en una sola consulta.
+
+        Args:
+            keys: Claves a buscar
+
+        Returns:
+            Diccionario clave -> vector con las claves encontradas
+        """
+        import numpy as np
+
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite limita el número de parámetros por consulta
+            for start in range(0, len(unique_keys), 500):
+                batch = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(batch))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            now = time.time()
+            self._touched.update((key, now) for key in found)
+            if len(self._touched) >= _TOUCH_FLUSH_SIZE:
+                self._flush_touched()
+                self._conn.commit()
+
+            self.hits += sum(1 for key in keys if key in found)
+            self.misses += sum(1 for key in keys if key not in found)
+        return found
+
+    def put_many(self, items: Dict[str, List[float]]):
+        """
+        Guarda varios vectores en una sola transacción.
+
+        Args:
+            items: Diccionario clave -> vector
+        """
+        if not items:
+            return
+        import numpy as np
+
+        now = time.time()
+        with self._lock:
+            changes = self._conn.total_changes
+            # El mismo texto con el mismo modelo siempre da el mismo vector
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (key, vector, last_access) VALUES (?, ?, ?)",
+                [
+                    (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+                    for key, vector in items.items()
+                ]
+            )
+            self._count += self._conn.total_changes - changes
+            self._flush_touched()
+            if self.max_entries and self._count > self.max_entries:
+                self._evict()
+            self._conn.commit()
+
+    def _flush_touched(self):
+        """Escribe los últimos accesos pendientes (sin hacer commit)"""
+        if self._touched:
+            self._conn.executemany(
+                "UPDATE embeddings SET last_access = ? WHERE key = ?",
+                [(now, key) for key, now in self._touched.items()]
+            )
+            self._touched = {}
+
+    def _evict(self):
+        """Elimina los vectores menos usados hasta dejar libre `_EVICTION_SLACK` de `max_entries`"""
+        # Otros procesos pueden haber escrito en la misma base: se cuenta de nuevo
+        count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        excess = count - int(self.max_entries * (1 - _EVICTION_SLACK))
+        if count > self.max_entries and excess > 0:
+            self._conn.execute(
+                "DELETE FROM embeddings WHERE key IN ("
+                "SELECT key FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                (excess,)
+            )
+            count -= excess
+        self._count = count
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._count = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            return self._count
+
+    def stats(self) -> Dict:
+        """
+        Devuelve las estadísticas de uso de la caché.
+
+        Returns:
+            Diccionario con aciertos, fallos, tasa de acierto y tamaño
+        """
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": len(self)
+        }
+
+    def close(self):
+        """Guarda los últimos accesos pendientes y cierra la conexión"""
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Envoltorio de un modelo de embeddings que consulta primero la caché.
+
+    Solo los textos que no están en caché se envían al modelo subyacente.
+    """
+
+    def __init__(self, underlying: Embeddings, cache: EmbeddingCache, document_kind: str = "document"):
+        """
+        Args:
+            underlying: Modelo de embeddings real (p. ej. GoogleGenerativeAIEmbeddings)
+            cache: Caché donde guardar y buscar los vectores
+            document_kind: Tipo de clave de `embed_documents` ("query" si el
+                modelo subyacente embebe los documentos como consultas)
+        """
+        self.underlying = underlying
+        self.cache = cache
+        self.document_kind = document_kind
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self.cache.make_key(text, kind=self.document_kind) for text in texts]
+        cached = self.cache.get_many(keys)
+
+        # Embeber solo los textos que faltan (sin repetir)
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in cached and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.underlying.embed_documents(list(missing.values()))
+            new_items = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(new_items)
+            cached.update(new_items)
+
+        return [cached[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache.make_key(text, kind="query")
+        cached = self.cache.get_many([key])
+        if key in cached:
+            return cached[key]
+        vector = self.underlying.embed_query(text)
+        self.cache.put_many({key: vector})
+        return vector
@@ -0,0 +1,198 @@
+"""
+Pipeline de embeddings por lotes, concurrente y con control de cuota
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from langchain_core.embeddings import Embeddings
+from langchain_core.documents import Document
+from typing import Iterable, Iterator, List, Optional, Tuple
+import itertools
+import metrics
+import random
+import threading
+import time
+
+
+class RateLimitError(Exception):
+    """Error de cuota excedida (HTTP 429) devuelto por el servicio de embeddings"""
+
+
+def is_rate_limit_error(error: BaseException) -> bool:
+    """
+    Indica si una excepción corresponde a un límite de cuota (HTTP 429).
+
+    El wrapper de Google envuelve el error original, así que se revisa
+    también la cadena de causas.
+
+    Args:
+        error: Excepción a revisar
+
+    Returns:
+        True si el error es un 429 / cuota agotada
+    """
+    while error is not None:
+        if isinstance(error, RateLimitError):
+            return True
+        if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+            return True
+        text = f"{type(error).__name__} {error}"
+        if "429" in text or "ResourceExhausted" in text or "quota" in text.lower():
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+class TokenBucket:
+    """
+    Limitador de peticiones por minuto (token bucket), seguro entre hilos.
+    """
+
+    def __init__(self, requests_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            requests_per_minute: Peticiones permitidas por minuto
+            capacity: Ráfaga máxima permitida (por defecto, 1 segundo de cuota)
+        """
+        self.rate = requests_per_minute / 60.0
+        self.capacity = capacity or max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Bloquea hasta que haya un token disponible y lo consume"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait_time = (1 - self.tokens) / self.rate
+            time.sleep(wait_time)
+
+
+def batched(items: Iterable, size: int) -> Iterator[List]:
+    """
+    Agrupa un iterable en listas de tamaño `size` sin materializarlo entero.
+
+    Args:
+        items: Iterable de elementos
+        size: Tamaño de cada lote
+
+    Yields:
+        Listas con hasta `size` elementos
+    """
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+class EmbeddingPipeline:
+    """
+    Calcula embeddings de documentos por lotes con concurrencia acotada.
+
+    - Divide los documentos en lotes de `batch_size`
+    - Ejecuta hasta `max_concurrency` lotes en paralelo
+    - Respeta un límite de peticiones por minuto (token bucket)
+    - Reintenta los errores con backoff exponencial con jitter
+    - Entrega cada lote en cuanto termina (en orden de llegada)
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        batch_size: int = 100,
+        max_concurrency: int = 4,
+        requests_per_minute: Optional[float] = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0
+    ):
+        """
+        Args:
+            embeddings: Modelo de embeddings
+            batch_size: Textos por petición
+            max_concurrency: Peticiones simultáneas
+            requests_per_minute: Cuota de peticiones por minuto (None = sin límite)
+            max_retries: Reintentos por lote antes de fallar
+            base_delay: Espera base del backoff en segundos
+            max_delay: Espera máxima del backoff en segundos
+        """
+        self.embeddings = embeddings
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        # Los lotes se embeben en hilos del pool: el contador se actualiza bajo el lock
+        self._lock = threading.Lock()
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        """Embebe un lote respetando la cuota y reintentando si falla"""
+        attempt = 0
+        while True:
+            if self.bucket:
+                self.bucket.acquire()
+            try:
+                with metrics.timer("embedding_batch"):
+                    return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries:
+                    raise
+                with self._lock:
+                    self.retries += 1
+                # Backoff exponencial con "full jitter"; los 429 esperan más
+                delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+                if is_rate_limit_error(e):
+                    delay = min(self.max_delay, delay * 2)
+                time.sleep(random.uniform(0, delay))
+
+    def embed_documents(
+        self, documents: Iterable[Document]
+    ) -> Iterator[Tuple[List[Document], List[List[float]]]]:
+        """
+        Embebe los documentos y entrega los lotes a medida que terminan.
+
+        Solo se mantienen en vuelo `2 * max_concurrency` lotes, así que el
+        iterable de entrada puede ser un generador arbitrariamente grande.
+
+        Args:
+            documents: Iterable de documentos
+
+        Yields:
+            Tuplas (documentos del lote, vectores del lote)
+        """
+        batches = batched(documents, self.batch_size)
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            pending = {}
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < 2 * self.max_concurrency:
+                    batch = next(batches, None)
+                    if batch is None:
+                        exhausted = True
+                        break
+                    texts = [doc.page_content for doc in batch]
+                    pending[executor.submit(self._embed_batch, texts)] = batch
+
+                if not pending:
+                    return
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    batch = pending.pop(future)
+                    try:
+                        vectors = future.result()
+                    except Exception:
+                        # No seguir gastando cuota en lotes que ya no se usarán
+                        for other in pending:
+                            other.cancel()
+                        raise
+                    yield batch, vectors
@@ -0,0 +1,449 @@
+"""
+Construcción y ajuste de índices FAISS (Flat, IVF, IVF-PQ, HNSW)
+"""
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+from docstore import DOCSTORE_FILE, SQLiteIndexMap, load_sqlite_docstore
+from typing import Dict
+import json
+import os
+import pickle
+import shutil
+import faiss
+import numpy as np
+
+
+INDEX_PARAMS_FILE = "index_params.json"
+
+# Subcarpeta donde se escriben los archivos del índice antes de reemplazar los guardados
+STAGING_DIR = ".guardando"
+
+
+def create_index(dimension: int, factory: str):
+    """
+    Crea un índice FAISS vacío a partir de un "factory string".
+
+    Ejemplos de factory: "Flat" (búsqueda exacta), "IVF4096,Flat",
+    "IVF4096,PQ64" o "HNSW32". Los índices IVF/PQ quedan sin entrenar
+    (`index.is_trained` es False) hasta llamar a `train_index()`.
+
+    Args:
+        dimension: Dimensión de los vectores
+        factory: Factory string de FAISS
+
+    Returns:
+        Índice FAISS
+    """
+    return faiss.index_factory(dimension, factory, faiss.METRIC_L2)
+
+
+def train_index(index, training_vectors: np.ndarray):
+    """
+    Entrena los codebooks IVF/PQ del índice con una muestra de vectores.
+
+    Si la muestra es demasiado pequeña para el número de listas IVF, se
+    devuelve un índice Flat en su lugar.
+
+    Args:
+        index: Índice FAISS sin entrenar
+        training_vectors: Muestra de vectores (float32)
+
+    Returns:
+        Índice entrenado, listo para agregar vectores
+    """
+    ivf = _extract_ivf(index)
+    if ivf is not None and len(training_vectors) < ivf.nlist:
+        print(f"⚠️  Muestra de entrenamiento insuficiente ({len(training_vectors)} vectores "
+              f"para {ivf.nlist} listas IVF). Usando índice Flat.")
+        return faiss.IndexFlatL2(index.d)
+
+    print(f"🏋️  Entrenando índice FAISS con {len(training_vectors)} vectores...")
+    try:
+        index.train(np.ascontiguousarray(training_vectors, dtype=np.float32))
+    except RuntimeError as e:
+        # p. ej. PQ necesita al menos 2^nbits vectores por sub-cuantizador
+        print(f"⚠️  No se pudo entrenar el índice ({str(e).splitlines()[0]}). Usando índice Flat.")
+        return faiss.IndexFlatL2(index.d)
+    return index
+
+
+def with_explicit_ids(index):
+    """
+    Prepara un índice entrenado para agregar vectores con ids explícitos.
+
+    Los índices IVF guardan el id de cada vector en sus listas y lo
+    conservan al borrar otros vectores. El resto (Flat, HNSW...) solo
+    conocen su posición, que cambia al borrar, así que se envuelven en un
+    `IndexIDMap2`. Con ids estables, `index_to_docstore_id` no hay que
+    renumerarlo nunca.
+
+    Args:
+        index: Índice FAISS vacío y entrenado
+
+    Returns:
+        Índice que acepta `add_with_ids`
+    """
+    if _extract_ivf(index) is not None:
+        return index
+    return faiss.IndexIDMap2(index)
+
+
+def _id_map(index):
+    """Devuelve el índice como IndexIDMap, o None si no lo es"""
+    index = faiss.downcast_index(index)
+    return index if isinstance(index, faiss.IndexIDMap) else None
+
+
+def _unwrap(index):
+    """Devuelve el índice interno de un IndexIDMap (o el propio índice)"""
+    id_map = _id_map(index)
+    return faiss.downcast_index(id_map.index) if id_map is not None else index
+
+
+def has_explicit_ids(index) -> bool:
+    """
+    Indica si los vectores del índice tienen ids estables.
+
+    Los índices Flat o HNSW guardados antes de usar `with_explicit_ids` se
+    identifican por posición, y esas posiciones cambian al borrar vectores.
+    """
+    return _id_map(index) is not None or _extract_ivf(index) is not None
+
+
+def supports_removal(index) -> bool:
+    """Indica si el índice permite borrar vectores (HNSW, por ejemplo, no)"""
+    try:
+        index.remove_ids(np.array([], dtype=np.int64))
+        return True
+    except RuntimeError:
+        return False
+
+
+def add_vectors(index, vectors: np.ndarray, ids: np.ndarray):
+    """
+    Agrega vectores con sus ids.
+
+    Args:
+        index: Índice preparado con `with_explicit_ids`
+        vectors: Vectores (n x d)
+        ids: Id de cada vector (int64)
+    """
+    index.add_with_ids(np.ascontiguousarray(vectors, dtype=np.float32),
+                       np.ascontiguousarray(ids, dtype=np.int64))
+
+
+def _id_array(id_map) -> np.ndarray:
+    """Vista numpy (sin copia) de los ids de un IndexIDMap, por posición interna"""
+    return faiss.rev_swig_ptr(id_map.id_map.data(), id_map.id_map.size())
+
+
+def make_selector(index, ids: np.ndarray):
+    """
+    Crea un IDSelector de FAISS que solo deja pasar ciertos ids.
+
+    En un IndexIDMap la búsqueda se hace sobre el índice interno (FAISS
+    1.7 no admite parámetros de búsqueda en IndexIDMap), así que los ids se
+    traducen a posiciones internas. El selector deja de ser válido si se
+    agregan o borran vectores.
+
+    Args:
+        index: Índice FAISS
+        ids: Ids permitidos (int64)
+
+    Returns:
+        faiss.IDSelectorBatch
+    """
+    id_map = _id_map(index)
+    if id_map is not None:
+        ids = np.flatnonzero(np.isin(_id_array(id_map), ids))
+    ids = np.ascontiguousarray(ids, dtype=np.int64)
+    return faiss.IDSelectorBatch(ids.size, faiss.swig_ptr(ids))
+
+
+def _extract_ivf(index):
+    """Devuelve la parte IVF del índice, o None si no es un índice IVF"""
+    try:
+        return faiss.extract_index_ivf(index)
+    except RuntimeError:
+        return None
+
+
+def _extract_hnsw(index):
+    """Devuelve el índice HNSW, o None si no es un índice HNSW"""
+    index = _unwrap(faiss.downcast_index(index))
+    return index if hasattr(index, "hnsw") else None
+
+
+def apply_search_params(index, params: Dict):
+    """
+    Aplica los parámetros de búsqueda (`nprobe`, `efSearch`) al índice.
+
+    Los parámetros que no corresponden al tipo de índice se ignoran.
+
+    Args:
+        index: Índice FAISS
+        params: Diccionario con `nprobe` y/o `efSearch`
+    """
+    ivf = _extract_ivf(index)
+    if ivf is not None and params.get("nprobe"):
+        ivf.nprobe = int(params["nprobe"])
+
+    hnsw = _extract_hnsw(index)
+    if hnsw is not None and params.get("efSearch"):
+        hnsw.hnsw.efSearch = int(params["efSearch"])
+
+
+def save_index_params(folder_path: str, params: Dict):
+    """
+    Guarda los parámetros del índice junto al índice.
+
+    Args:
+        folder_path: Carpeta del índice FAISS
+        params: Parámetros a guardar
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    path = os.path.join(folder_path, INDEX_PARAMS_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(params, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def staging_folder(folder_path: str) -> str:
+    """
+    Crea (vacía) la carpeta donde preparar una nueva versión del índice.
+
+    Args:
+        folder_path: Carpeta del índice
+
+    Returns:
+        Ruta de la carpeta temporal
+    """
+    staging_path = os.path.join(folder_path, STAGING_DIR)
+    shutil.rmtree(staging_path, ignore_errors=True)
+    os.makedirs(staging_path)
+    return staging_path
+
+
+def commit_staged_files(folder_path: str, staging_path: str):
+    """
+    Mueve los archivos preparados a la carpeta del índice con `os.replace`.
+
+    Cada archivo se reemplaza de forma atómica, así que un proceso que lee
+    el índice (o lo tiene mapeado en memoria) ve la versión anterior o la
+    nueva, nunca un archivo a medio escribir.
+
+    Args:
+        folder_path: Carpeta del índice
+        staging_path: Carpeta creada con `staging_folder`
+    """
+    for name in os.listdir(staging_path):
+        os.replace(os.path.join(staging_path, name), os.path.join(folder_path, name))
+    os.rmdir(staging_path)
+
+
+def load_index_params(folder_path: str) -> Dict:
+    """
+    Carga los parámetros guardados junto al índice.
+
+    Args:
+        folder_path: Carpeta del índice FAISS
+
+    Returns:
+        Diccionario de parámetros (vacío si el índice no tiene)
+    """
+    path = os.path.join(folder_path, INDEX_PARAMS_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def load_local_vectorstore(
+    folder_path: str, embeddings: Embeddings, mmap: bool = False, index_name: str = "index"
+) -> FAISS:
+    """
+    Carga un vector store guardado en `folder_path`.
+
+    El docstore se abre desde SQLite si existe `docstore.sqlite` (sin
+    deserializar el corpus); si no, se lee el pickle de `save_local`.
+
+    Con `mmap=True` el índice se abre con `IO_FLAG_MMAP`: FAISS no copia las
+    listas invertidas de los índices IVF al heap, sino que se leen del
+    archivo bajo demanda y el sistema operativo las comparte entre procesos
+    a través de la caché de páginas. En índices Flat o HNSW los vectores se
+    siguen leyendo en memoria, por eso este modo tiene sentido sobre todo con
+    `FAISS_INDEX_FACTORY` de tipo IVF. El índice queda en solo lectura.
+
+    Args:
+        folder_path: Carpeta del índice
+        embeddings: Modelo de embeddings para las consultas
+        mmap: Si True, mapea el índice en memoria en lugar de copiarlo
+        index_name: Nombre base de los archivos del índice
+
+    Returns:
+        Vector store FAISS
+    """
+    flags = faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY if mmap else 0
+    index = faiss.read_index(os.path.join(folder_path, f"{index_name}.faiss"), flags)
+
+    if os.path.exists(os.path.join(folder_path, DOCSTORE_FILE)):
+        docstore, index_to_docstore_id = load_sqlite_docstore(folder_path)
+    else:
+        with open(os.path.join(folder_path, f"{index_name}.pkl"), "rb") as f:
+            docstore, index_to_docstore_id = pickle.load(f)
+    return FAISS(embeddings, index, docstore, index_to_docstore_id)
+
+
+def save_local_vectorstore(vectorstore: FAISS, folder_path: str, index_name: str = "index",
+                           staging_path: str = None):
+    """
+    Guarda un vector store cuyo docstore es SQLite.
+
+    Escribe el índice FAISS y deja el docstore (con la correspondencia
+    posición -> id) en `docstore.sqlite`, sin ningún pickle.
+
+    El índice se escribe primero en `staging_path` (por defecto, una carpeta
+    temporal nueva) junto con lo que el llamador haya preparado ahí; después
+    se mueven todos los archivos a `folder_path` y, por último, el docstore
+    temporal (ver `SQLiteDocstore.stage`) reemplaza al guardado.
+
+    Args:
+        vectorstore: Vector store con un SQLiteDocstore
+        folder_path: Carpeta del índice
+        index_name: Nombre base de los archivos del índice
+        staging_path: Carpeta creada con `staging_folder`
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    staging_path = staging_path or staging_folder(folder_path)
+    faiss.write_index(vectorstore.index, os.path.join(staging_path, f"{index_name}.faiss"))
+
+    docstore = vectorstore.docstore
+    docstore.save_index_map(vectorstore.index_to_docstore_id)
+    commit_staged_files(folder_path, staging_path)
+    docstore.persist(os.path.join(folder_path, DOCSTORE_FILE))
+    vectorstore.index_to_docstore_id = SQLiteIndexMap(docstore)
+
+    # Un pickle de una versión anterior del índice ya no corresponde
+    stale_pickle = os.path.join(folder_path, f"{index_name}.pkl")
+    if os.path.exists(stale_pickle):
+        os.remove(stale_pickle)
+
+
+TEMA_IDS_FILE = "tema_ids.npz"
+
+
+def build_tema_ids(positions_and_temas) -> Dict[str, np.ndarray]:
+    """
+    Agrupa las posiciones del índice FAISS por tema.
+
+    Args:
+        positions_and_temas: Iterable de tuplas (posición en el índice, tema)
+
+    Returns:
+        Diccionario tema -> array ordenado de posiciones (int64)
+    """
+    groups = {}
+    for position, tema in positions_and_temas:
+        groups.setdefault(tema, []).append(position)
+    return {tema: np.sort(np.array(ids, dtype=np.int64)) for tema, ids in groups.items()}
+
+
+def save_tema_ids(folder_path: str, tema_ids: Dict[str, np.ndarray]):
+    """
+    Guarda los conjuntos de posiciones por tema junto al índice.
+
+    Se guardan como un único array de posiciones más los desplazamientos de
+    cada tema, para no depender de que el nombre del tema sea un nombre de
+    archivo válido.
+
+    Args:
+        folder_path: Carpeta del índice
+        tema_ids: Diccionario tema -> posiciones
+    """
+    temas = sorted(tema_ids)
+    arrays = [tema_ids[tema] for tema in temas]
+    offsets = np.cumsum([0] + [len(a) for a in arrays]).astype(np.int64)
+    positions = np.concatenate(arrays) if arrays else np.array([], dtype=np.int64)
+    np.savez(
+        os.path.join(folder_path, TEMA_IDS_FILE),
+        temas=np.array(temas, dtype=str),
+        offsets=offsets,
+        positions=positions
+    )
+
+
+def load_tema_ids(folder_path: str) -> Dict[str, np.ndarray]:
+    """
+    Carga los conjuntos de posiciones por tema guardados con el índice.
+
+    Args:
+        folder_path: Carpeta del índice
+
+    Returns:
+        Diccionario tema -> posiciones (vacío si no hay archivo)
+    """
+    path = os.path.join(folder_path, TEMA_IDS_FILE)
+    if not os.path.exists(path):
+        return {}
+    data = np.load(path)
+    offsets = data["offsets"]
+    positions = data["positions"]
+    return {
+        str(tema): positions[offsets[i]:offsets[i + 1]]
+        for i, tema in enumerate(data["temas"])
+    }
+
+
+def search_parameters(index, params: Dict, selector=None):
+    """
+    Construye los parámetros de búsqueda de FAISS para una consulta.
+
+    Args:
+        index: Índice FAISS
+        params: Parámetros del índice (`nprobe`, `efSearch`)
+        selector: IDSelector opcional para restringir los resultados
+
+    Returns:
+        SearchParameters adecuado al tipo de índice
+    """
+    if _extract_ivf(index) is not None:
+        search_params = faiss.SearchParametersIVF(sel=selector)
+        if params.get("nprobe"):
+            search_params.nprobe = int(params["nprobe"])
+        return search_params
+    if _extract_hnsw(index) is not None:
+        search_params = faiss.SearchParametersHNSW(sel=selector)
+        if params.get("efSearch"):
+            search_params.efSearch = int(params["efSearch"])
+        return search_params
+    return faiss.SearchParameters(sel=selector)
+
+
+def search_index(index, vector: np.ndarray, k: int, params: Dict, selector=None):
+    """
+    Busca los k vecinos más cercanos, opcionalmente solo entre ciertas posiciones.
+
+    Si se pasa un selector, el filtro se aplica dentro de la búsqueda de
+    FAISS, así que no hace falta pedir más resultados y filtrarlos después.
+
+    Args:
+        index: Índice FAISS
+        vector: Vector de consulta (1 x d, float32)
+        k: Número de resultados
+        params: Parámetros del índice (`nprobe`, `efSearch`)
+        selector: faiss.IDSelector opcional creado con `make_selector`
+
+    Returns:
+        Tupla (distancias, ids) de la primera consulta
+    """
+    id_map = _id_map(index)
+    if id_map is None:
+        distances, ids = index.search(vector, k, params=search_parameters(index, params, selector))
+        return distances[0], ids[0]
+
+    inner = _unwrap(index)
+    distances, positions = inner.search(vector, k, params=search_parameters(inner, params, selector))
+    positions = positions[0]
+    # -1 indica que hubo menos de k resultados
+    ids = np.where(positions >= 0, _id_array(id_map)[np.maximum(positions, 0)], -1)
+    return distances[0], ids
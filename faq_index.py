@@ -0,0 +1,101 @@
+"""
+Índice de preguntas frecuentes para responder sin llamar al LLM
+"""
+from typing import List, Optional, Tuple
+import json
+import os
+import faiss
+import numpy as np
+
+
+FAQ_INDEX_FILE = "faq.faiss"
+FAQ_IDS_FILE = "faq_ids.json"
+# Tarea de embeddings de las preguntas: la misma que la consulta del usuario
+FAQ_TASK_TYPE = "retrieval_query"
+
+
+class FAQIndex:
+    """
+    Índice vectorial sobre el campo `pregunta` de cada fila.
+
+    Los vectores se normalizan y se guardan en un índice de producto
+    interno, así que la puntuación de una búsqueda es directamente la
+    similitud coseno entre la consulta y la pregunta almacenada.
+    """
+
+    def __init__(self, index, doc_ids: List[str]):
+        """
+        Args:
+            index: Índice FAISS de producto interno con vectores normalizados
+            doc_ids: Id del documento (en el docstore principal) de cada vector
+        """
+        self.index = index
+        self.doc_ids = doc_ids
+
+    @classmethod
+    def build(cls, vectors: np.ndarray, doc_ids: List[str]) -> "FAQIndex":
+        """
+        Construye el índice a partir de los embeddings de las preguntas.
+
+        Args:
+            vectors: Embeddings de las preguntas (n x d)
+            doc_ids: Id del documento de cada pregunta
+
+        Returns:
+            Índice de preguntas
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        index = faiss.IndexFlatIP(vectors.shape[1])
+        index.add(vectors)
+        return cls(index, list(doc_ids))
+
+    def search(self, embedding: List[float], k: int = 1) -> List[Tuple[float, str]]:
+        """
+        Busca las preguntas almacenadas más parecidas a la consulta.
+
+        Args:
+            embedding: Embedding de la consulta
+            k: Número de preguntas a devolver
+
+        Returns:
+            Lista de tuplas (similitud coseno, id del documento), de más a
+            menos parecida (vacía si el índice está vacío)
+        """
+        if self.index.ntotal == 0:
+            return []
+        vector = np.array([embedding], dtype=np.float32)
+        faiss.normalize_L2(vector)
+        scores, positions = self.index.search(vector, min(k, self.index.ntotal))
+        return [(float(score), self.doc_ids[position])
+                for score, position in zip(scores[0], positions[0]) if position != -1]
+
+    def save(self, folder_path: str):
+        """
+        Guarda el índice junto al índice FAISS principal.
+
+        Args:
+            folder_path: Carpeta del índice
+        """
+        faiss.write_index(self.index, os.path.join(folder_path, FAQ_INDEX_FILE))
+        with open(os.path.join(folder_path, FAQ_IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self.doc_ids, f)
+
+    @classmethod
+    def load(cls, folder_path: str) -> Optional["FAQIndex"]:
+        """
+        Carga el índice guardado junto al índice FAISS principal.
+
+        Args:
+            folder_path: Carpeta del índice
+
+        Returns:
+            Índice de preguntas, o None si no existe
+        """
+        index_path = os.path.join(folder_path, FAQ_INDEX_FILE)
+        ids_path = os.path.join(folder_path, FAQ_IDS_FILE)
+        if not (os.path.exists(index_path) and os.path.exists(ids_path)):
+            return None
+        with open(ids_path, "r", encoding="utf-8") as f:
+            doc_ids = json.load(f)
+        return cls(faiss.read_index(index_path), doc_ids)
@@ -0,0 +1,166 @@
+"""
+Servicios locales de prueba (sin conexión) que imitan a los de Google
+"""
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models.chat_models import SimpleChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from embedding_pipeline import RateLimitError
+from typing import Any, AsyncIterator, Iterator, List, Optional
+import asyncio
+import hashlib
+import random
+import threading
+import time
+import numpy as np
+
+
+class FakeEmbeddingService(Embeddings):
+    """
+    Servicio de embeddings local y determinista.
+
+    El mismo texto produce siempre el mismo vector. Permite inyectar latencia
+    por petición y errores 429 para probar el pipeline de embeddings sin
+    gastar cuota real.
+    """
+
+    def __init__(
+        self,
+        size: int = 768,
+        latency: float = 0.0,
+        rate_limit_probability: float = 0.0,
+        max_requests_per_second: Optional[float] = None,
+        seed: int = 0
+    ):
+        """
+        Args:
+            size: Dimensión de los vectores
+            latency: Latencia simulada por petición en segundos
+            rate_limit_probability: Probabilidad de responder con un 429
+            max_requests_per_second: Si se supera, responde con un 429
+            seed: Semilla para la inyección de errores
+        """
+        self.size = size
+        self.latency = latency
+        self.rate_limit_probability = rate_limit_probability
+        self.max_requests_per_second = max_requests_per_second
+        self.requests = 0
+        self.rate_limited = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window_start = time.monotonic()
+        self._window_requests = 0
+
+    def _vector(self, text: str) -> List[float]:
+        """Genera un vector unitario determinista a partir del texto"""
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(self.size).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        return vector.tolist()
+
+    def _request(self):
+        """Simula una petición: cuenta, aplica latencia y decide si hay 429"""
+        with self._lock:
+            self.requests += 1
+            now = time.monotonic()
+            if now - self._window_start >= 1.0:
+                self._window_start = now
+                self._window_requests = 0
+            self._window_requests += 1
+            throttled = (
+                self._random.random() < self.rate_limit_probability
+                or (self.max_requests_per_second is not None
+                    and self._window_requests > self.max_requests_per_second)
+            )
+            if throttled:
+                self.rate_limited += 1
+        if self.latency:
+            time.sleep(self.latency)
+        if throttled:
+            raise RateLimitError("429 Resource has been exhausted (e.g. check quota).")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self._request()
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self._request()
+        return self._vector(text)
+
+
+class FakeChatModel(SimpleChatModel):
+    """
+    Modelo de chat local y determinista.
+
+    Responde con la primera `Respuesta:` que aparece en el contexto del
+    prompt (o con "No lo sé" si no hay ninguna), con latencia simulada antes
+    de la respuesta y entre tokens. Implementa las variantes síncronas,
+    asíncronas y en streaming para probar el sistema sin conexión.
+    """
+
+    latency: float = 0.0
+    token_latency: float = 0.0
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    @staticmethod
+    def _answer(messages: List[BaseMessage]) -> str:
+        """Extrae la respuesta del primer documento del contexto"""
+        for line in str(messages[-1].content).splitlines():
+            if line.startswith("Respuesta:") and line[len("Respuesta:"):].strip():
+                return line[len("Respuesta:"):].strip()
+        return "No lo sé."
+
+    def _call(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._answer(messages)
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        message = AIMessage(content=self._answer(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> Iterator[ChatGenerationChunk]:
+        if self.latency:
+            time.sleep(self.latency)
+        for token in self._answer(messages).split(" "):
+            if self.token_latency:
+                time.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token + " "))
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        for token in self._answer(messages).split(" "):
+            if self.token_latency:
+                await asyncio.sleep(self.token_latency)
+            yield ChatGenerationChunk(message=AIMessageChunk(content=token + " "))
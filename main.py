@@ -2,16 +2,24 @@
 Script principal para ejecutar el sistema RAG
 """
 import argparse
-from data_loader import load_data_from_google_sheets, print_documents_summary
-from rag_system import RAGSystem
+from typing import TYPE_CHECKING
+import config
+import json
+import time
 
+# Los módulos del sistema (y con ellos LangChain, FAISS, gspread, aiohttp...)
+# se importan dentro de las funciones, solo cuando el modo elegido los usa
+if TYPE_CHECKING:
+    from rag_system import RAGSystem
 
-def run_example_queries(rag_system: RAGSystem):
+
+def run_example_queries(rag_system: "RAGSystem", tema: str = None):
     """
     Ejecuta consultas de ejemplo para demostrar el sistema.
     
     Args:
         rag_system: Sistema RAG inicializado
+        tema: Si se indica, solo se buscan documentos de ese tema
     """
     print("\n" + "="*70)
     print("🎯 EJECUTANDO CONSULTAS DE EJEMPLO")
@@ -31,18 +39,116 @@ def run_example_queries(rag_system: RAGSystem):
         print(f"Ejemplo {i}/{len(example_questions)}")
         print(f"{'='*70}")
         
-        rag_system.query(question, verbose=True)
+        rag_system.query(question, verbose=True, tema=tema)
         
         if i < len(example_questions):
             input("\n⏸️  Presiona Enter para continuar con el siguiente ejemplo...")
 
 
-def run_interactive_mode(rag_system: RAGSystem):
+def load_documents(stream: bool = False):
+    """
+    Carga los documentos de la fuente configurada.
+    
+    Args:
+        stream: Si True, devuelve un generador que lee la hoja por páginas
+            (o el archivo de datos por bloques)
+        
+    Returns:
+        Lista (o generador) de documentos, o None si no se pudieron cargar
+    """
+    from data_loader import (
+        get_data_file,
+        iter_documents_from_file,
+        iter_documents_from_google_sheets,
+        load_columnar_documents,
+        load_data_from_file,
+        load_data_from_google_sheets,
+        load_sheet_sources,
+        print_documents_summary,
+        uses_sheet_sources
+    )
+    
+    data_file = get_data_file()
+    sheet_sources = uses_sheet_sources()
+    if stream and sheet_sources:
+        print("⚠️  --stream lee una sola pestaña: se cargan completas las fuentes de SHEET_SOURCES")
+    elif stream:
+        # Los documentos se leen por páginas (o bloques del archivo) mientras se indexan
+        if data_file:
+            documents = iter_documents_from_file(data_file)
+        else:
+            documents = iter_documents_from_google_sheets()
+        if config.DEDUP_ENABLED:
+            from dedup import iter_unique_documents
+            
+            # Solo duplicados exactos: los casi duplicados necesitan guardar una firma por fila
+            documents = iter_unique_documents(documents, exact_only=True)
+        return documents
+    
+    if data_file:
+        if config.COLUMNAR_LOADING:
+            documents = load_columnar_documents(data_file)
+        else:
+            documents = load_data_from_file(data_file)
+    elif sheet_sources:
+        documents = load_sheet_sources()
+    elif config.COLUMNAR_LOADING:
+        documents = load_columnar_documents()
+    else:
+        documents = load_data_from_google_sheets()
+    
+    if not documents:
+        print("\n❌ No se pudieron cargar los datos. Verifica la configuración.")
+        print("   Revisa el README.md para más información sobre cómo configurar Google Sheets.")
+        return None
+    
+    # Unir las filas repetidas antes de pagar por sus embeddings
+    if config.DEDUP_ENABLED:
+        from dedup import deduplicate_documents
+        
+        documents, _ = deduplicate_documents(
+            documents,
+            threshold=config.DEDUP_THRESHOLD,
+            num_perm=config.DEDUP_NUM_PERM,
+            bands=config.DEDUP_BANDS
+        )
+    
+    # Mostrar resumen de documentos
+    print_documents_summary(documents)
+    return documents
+
+
+def print_streamed_answer(rag_system: "RAGSystem", question: str, tema: str = None):
+    """
+    Muestra la respuesta token a token y luego los documentos fuente.
+    
+    Args:
+        rag_system: Sistema RAG inicializado
+        question: Pregunta del usuario
+        tema: Si se indica, solo se buscan documentos de ese tema
+    """
+    print("🔍 Buscando información relevante...\n")
+    print("="*70)
+    print("💡 RESPUESTA:")
+    print("="*70)
+    
+    for event in rag_system.stream_query(question, tema=tema):
+        if event["type"] == "token":
+            print(event["content"], end="", flush=True)
+        elif event["type"] == "end":
+            print()
+            rag_system.print_sources(event.get("source_documents", []))
+        elif event["type"] == "error":
+            print(f"\n❌ Error: {event['error']}")
+
+
+def run_interactive_mode(rag_system: "RAGSystem", tema: str = None):
     """
     Modo interactivo para hacer preguntas al sistema.
     
     Args:
         rag_system: Sistema RAG inicializado
+        tema: Si se indica, solo se buscan documentos de ese tema
     """
     print("\n" + "="*70)
     print("💬 MODO INTERACTIVO")
@@ -61,8 +167,8 @@ def run_interactive_mode(rag_system: RAGSystem):
                 print("\n👋 ¡Hasta luego!")
                 break
             
-            # Procesar la pregunta
-            rag_system.query(question, verbose=True)
+            # Procesar la pregunta mostrando la respuesta a medida que se genera
+            print_streamed_answer(rag_system, question, tema=tema)
             
         except KeyboardInterrupt:
             print("\n\n👋 ¡Hasta luego!")
@@ -89,8 +195,125 @@ def main():
         action="store_true",
         help="Usar índice FAISS existente en lugar de crear uno nuevo"
     )
+    parser.add_argument(
+        "--sync",
+        "-s",
+        action="store_true",
+        help="Sincronizar el índice existente re-indexando solo las filas modificadas"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Con --use-existing-index, leer la hoja y sincronizar aunque el índice parezca al día"
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Leer la hoja por páginas (o el archivo por bloques) e indexar por lotes "
+             "(para fuentes muy grandes)"
+    )
+    parser.add_argument(
+        "--source",
+        metavar="ARCHIVO",
+        default=config.DATA_SOURCE,
+        help="Leer los datos de un archivo CSV, Parquet o JSONL en lugar de Google Sheets"
+    )
+    parser.add_argument(
+        "--tema",
+        "-t",
+        help="Restringir las consultas a los documentos de un tema"
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="PREGUNTAS.jsonl",
+        help="Responder las preguntas de un archivo JSONL (una por línea) sin interacción"
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        default="respuestas.jsonl",
+        help="Archivo JSONL donde se escriben las respuestas del modo --batch "
+             "(si ya existe, se continúa desde donde quedó y las preguntas con error se "
+             "reintentan: para cada id vale su última línea)"
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.QUERY_MAX_CONCURRENCY,
+        help="Consultas simultáneas en el modo --batch"
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="Iniciar un servidor HTTP para hacer consultas"
+    )
+    parser.add_argument(
+        "--host",
+        default=config.SERVER_HOST,
+        help="Dirección del servidor HTTP"
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=config.SERVER_PORT,
+        help="Puerto del servidor HTTP"
+    )
+    parser.add_argument(
+        "--workers",
+        "-w",
+        type=int,
+        default=config.SERVER_WORKERS,
+        help="Procesos worker del servidor HTTP (comparten el índice cargado una vez)"
+    )
+    
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Mostrar cuánto tarda en importarse cada módulo al arrancar"
+    )
+    parser.add_argument(
+        "--metrics",
+        action="store_true",
+        help="Medir la latencia de cada etapa y mostrarla al terminar"
+    )
+    parser.add_argument(
+        "--metrics-output",
+        metavar="FILE",
+        help="Guardar las latencias por etapa en un archivo JSON al terminar (implica --metrics)"
+    )
     
     args = parser.parse_args()
+    config.DATA_SOURCE = args.source
+    
+    profiler = None
+    if args.profile_startup:
+        from startup_profile import ImportProfiler
+        profiler = ImportProfiler().start()
+    startup_start = time.perf_counter()
+    
+    config.print_warnings()
+    
+    from data_loader import (
+        check_data_file,
+        get_data_file,
+        get_sheet_sources,
+        get_source_fingerprint,
+        uses_sheet_sources
+    )
+    from rag_system import RAGSystem
+    import metrics
+    
+    # Un formato no soportado o una dependencia que falta se informan antes de empezar
+    data_file = get_data_file()
+    if data_file:
+        try:
+            check_data_file(data_file)
+        except (ImportError, ValueError) as e:
+            print(f"❌ Error: {str(e)}")
+            return
+    
+    if args.metrics or args.metrics_output or config.METRICS_ENABLED:
+        metrics.enable(window=config.METRICS_WINDOW)
     
     print("\n" + "="*70)
     print("🎓 TUTORIAL DE LANGCHAIN CON RAG")
@@ -98,17 +321,26 @@ def main():
     print("="*70 + "\n")
     
     # Paso 1: Cargar datos
-    print("PASO 1: Cargando datos desde Google Sheets")
+    if data_file:
+        source = data_file
+    elif uses_sheet_sources():
+        source = f"Google Sheets ({len(get_sheet_sources())} fuentes de SHEET_SOURCES)"
+    else:
+        source = "Google Sheets"
+    print(f"PASO 1: Cargando datos desde {source}")
     print("-"*70)
-    documents = load_data_from_google_sheets()
     
-    if not documents:
-        print("\n❌ No se pudieron cargar los datos. Verifica la configuración.")
-        print("   Revisa el README.md para más información sobre cómo configurar Google Sheets.")
-        return
+    # La huella de la fuente (solo metadatos) indica si el índice guardado sigue al día
+    fingerprint = get_source_fingerprint()
+    index_status = RAGSystem.index_status(fingerprint)
     
-    # Mostrar resumen de documentos
-    print_documents_summary(documents)
+    if args.use_existing_index and not args.refresh and index_status == "current":
+        print("⚡ El índice guardado está al día: no hace falta volver a leer los datos")
+        documents = None
+    else:
+        documents = load_documents(stream=args.stream)
+        if documents is None:
+            return
     
     # Paso 2: Inicializar sistema RAG
     print("\nPASO 2: Inicializando sistema RAG")
@@ -117,26 +349,59 @@ def main():
     rag = RAGSystem()
     
     # Intentar usar índice existente si se solicita
-    if args.use_existing_index:
+    if documents is None:
         success = rag.initialize(use_existing_index=True)
         if not success:
             print("\n⚠️  No se pudo cargar índice existente. Creando uno nuevo...")
-            success = rag.initialize(documents=documents)
+            documents = load_documents(stream=args.stream)
+            if documents is None:
+                return
+            success = rag.initialize(documents=documents, fingerprint=fingerprint)
+    elif args.sync or (args.use_existing_index and index_status != "rebuild"):
+        if index_status == "stale" and not args.sync:
+            print("🔄 Los datos cambiaron desde que se guardó el índice: se sincroniza")
+        success = rag.initialize(documents=documents, sync=True, fingerprint=fingerprint)
     else:
-        success = rag.initialize(documents=documents)
+        success = rag.initialize(documents=documents, fingerprint=fingerprint)
     
     if not success:
         print("\n❌ No se pudo inicializar el sistema RAG")
         return
     
+    if profiler:
+        profiler.stop()
+        profiler.print_report(elapsed=time.perf_counter() - startup_start)
+    
     # Paso 3: Ejecutar consultas
     print("\nPASO 3: Realizando consultas")
     print("-"*70)
     
-    if args.interactive:
-        run_interactive_mode(rag)
+    if args.serve and args.workers > 1:
+        from prefork import run_prefork_server
+        run_prefork_server(
+            rag, args.host, args.port, args.workers,
+            max_requests=config.SERVER_MAX_REQUESTS,
+            max_requests_jitter=config.SERVER_MAX_REQUESTS_JITTER
+        )
+    elif args.serve:
+        from server import run_server
+        run_server(rag, args.host, args.port)
+    elif args.batch:
+        from batch_runner import run_batch
+        run_batch(rag, args.batch, args.output, max_concurrency=args.concurrency, tema=args.tema)
+    elif args.interactive:
+        run_interactive_mode(rag, tema=args.tema)
     else:
-        run_example_queries(rag)
+        run_example_queries(rag, tema=args.tema)
+    
+    rag.print_answer_cache_stats()
+    
+    if metrics.enabled():
+        metrics.REGISTRY.print_report()
+        if args.metrics_output:
+            with open(args.metrics_output, "w", encoding="utf-8") as f:
+                json.dump(metrics.REGISTRY.to_json(), f, indent=2)
+            print(f"💾 Métricas guardadas en {args.metrics_output}")
     
     print("\n" + "="*70)
     print("✅ TUTORIAL COMPLETADO")
@@ -144,6 +409,12 @@ def main():
     print("\n💡 Consejos:")
     print("   - Ejecuta con --interactive para modo interactivo")
     print("   - Ejecuta con --use-existing-index para usar el índice guardado")
+    print("     (solo se descarga la hoja si cambió desde la última vez)")
+    print("   - Ejecuta con --sync para re-indexar solo las filas que cambiaron")
+    print("   - Ejecuta con --batch preguntas.jsonl para responder preguntas en lote")
+    print("   - Ejecuta con --serve para consultar el sistema por HTTP")
+    print("   - Ejecuta con --metrics para ver la latencia de cada etapa")
+    print("   - Ejecuta con --source datos.parquet para indexar un archivo (CSV, Parquet o JSONL)")
     print("   - Agrega más datos a tu Google Sheet para mejores resultados")
     print("   - Revisa el README.md para más información\n")
 
@@ -0,0 +1,282 @@
+"""
+Métricas de latencia por etapa del pipeline RAG
+"""
+from collections import deque
+from langchain_core.callbacks import BaseCallbackHandler
+from typing import Any, Dict, List, Optional
+import bisect
+import threading
+import time
+
+
+# Límites de los buckets del histograma (segundos), como los de Prometheus
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """
+    Distribución de duraciones de una etapa.
+
+    Guarda los contadores por bucket (para Prometheus) y una ventana con las
+    últimas `window` muestras, de la que se calculan p50/p95/p99.
+    """
+
+    def __init__(self, window: int = 10_000):
+        self.bucket_counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, seconds: float):
+        self.bucket_counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.samples.append(seconds)
+
+    def quantiles(self) -> Dict[float, float]:
+        if not self.samples:
+            return {q: 0.0 for q in QUANTILES}
+        import numpy as np
+
+        values = np.quantile(np.fromiter(self.samples, dtype=np.float64), QUANTILES)
+        return dict(zip(QUANTILES, values.tolist()))
+
+
+class MetricsRegistry:
+    """
+    Registro de histogramas por etapa.
+
+    Desactivado por defecto: `timer()` devuelve entonces un context manager
+    vacío compartido, así que la instrumentación no cuesta más que una
+    comprobación de un atributo.
+    """
+
+    def __init__(self, window: int = 10_000):
+        self.enabled = False
+        self.window = window
+        self._histograms: Dict[str, Histogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        """
+        Registra la duración de una etapa.
+
+        Args:
+            stage: Nombre de la etapa
+            seconds: Duración en segundos
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.window)
+            histogram.observe(seconds)
+
+    def reset(self):
+        """Descarta todas las mediciones"""
+        with self._lock:
+            self._histograms = {}
+
+    def to_json(self) -> Dict[str, Dict]:
+        """
+        Resume cada etapa: número de mediciones, total, media, máximo y p50/p95/p99.
+
+        Returns:
+            Diccionario etapa -> estadísticas (en segundos)
+        """
+        with self._lock:
+            histograms = dict(self._histograms)
+            summary = {}
+            for stage, histogram in sorted(histograms.items()):
+                quantiles = histogram.quantiles()
+                summary[stage] = {
+                    "count": histogram.count,
+                    "sum": histogram.sum,
+                    "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                    "max": histogram.max,
+                    "p50": quantiles[0.5],
+                    "p95": quantiles[0.95],
+                    "p99": quantiles[0.99]
+                }
+        return summary
+
+    def to_prometheus(self) -> str:
+        """
+        Exporta las métricas en el formato de texto de Prometheus.
+
+        Returns:
+            Histograma `rag_stage_duration_seconds` y resumen
+            `rag_stage_latency_seconds` (p50/p95/p99), con la etiqueta `stage`
+        """
+        lines = [
+            "# HELP rag_stage_duration_seconds Duración de cada etapa del pipeline RAG",
+            "# TYPE rag_stage_duration_seconds histogram"
+        ]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            quantiles = {stage: histogram.quantiles() for stage, histogram in histograms}
+            for stage, histogram in histograms:
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (float("inf"),), histogram.bucket_counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(f'rag_stage_duration_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                lines.append(f'rag_stage_duration_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'rag_stage_duration_seconds_count{{stage="{stage}"}} {histogram.count}')
+
+            lines.append("# HELP rag_stage_latency_seconds Cuantiles recientes de cada etapa")
+            lines.append("# TYPE rag_stage_latency_seconds summary")
+            for stage, histogram in histograms:
+                for quantile, value in quantiles[stage].items():
+                    lines.append(f'rag_stage_latency_seconds{{stage="{stage}",quantile="{quantile}"}} {value}')
+                lines.append(f'rag_stage_latency_seconds_sum{{stage="{stage}"}} {histogram.sum}')
+                lines.append(f'rag_stage_latency_seconds_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+    def print_report(self):
+        """Muestra una tabla con las latencias de cada etapa"""
+        summary = self.to_json()
+        print("\n" + "="*70)
+        print("⏱️  LATENCIA POR ETAPA")
+        print("="*70)
+        if not summary:
+            print("   Sin mediciones")
+        else:
+            print(f"   {'etapa':<22}{'n':>7}{'total':>10}{'p50':>10}{'p95':>10}{'p99':>10}")
+            for stage, stats in summary.items():
+                print(f"   {stage:<22}{stats['count']:>7}{stats['sum']:>9.2f}s"
+                      f"{stats['p50'] * 1000:>8.1f}ms{stats['p95'] * 1000:>8.1f}ms"
+                      f"{stats['p99'] * 1000:>8.1f}ms")
+        print("="*70 + "\n")
+
+
+class _NullTimer:
+    """Context manager vacío que se usa cuando las métricas están desactivadas"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _Timer:
+    __slots__ = ("stage", "start")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        REGISTRY.observe(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+REGISTRY = MetricsRegistry()
+_NULL_TIMER = _NullTimer()
+
+
+def enable(window: int = 10_000):
+    """
+    Activa la recogida de métricas.
+
+    Args:
+        window: Muestras recientes por etapa para calcular los cuantiles
+    """
+    REGISTRY.window = window
+    REGISTRY.enabled = True
+
+
+def enabled() -> bool:
+    return REGISTRY.enabled
+
+
+def timer(stage: str):
+    """
+    Mide la duración de un bloque `with`.
+
+    Args:
+        stage: Nombre de la etapa
+
+    Returns:
+        Context manager (vacío si las métricas están desactivadas)
+    """
+    if not REGISTRY.enabled:
+        return _NULL_TIMER
+    return _Timer(stage)
+
+
+def observe(stage: str, seconds: float):
+    """Registra una duración medida por el llamador"""
+    REGISTRY.observe(stage, seconds)
+
+
+class StageTimingCallback(BaseCallbackHandler):
+    """
+    Callback de LangChain que mide las etapas dentro de una cadena RetrievalQA.
+
+    - retrieval: desde que empieza hasta que termina el retriever
+    - prompt_assembly: desde que termina el retriever hasta que se llama al LLM
+    - generation: la llamada al LLM
+
+    Se crea uno por consulta y solo cuando las métricas están activas.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self._retrieval_run = None
+        self._retrieval_start: Optional[float] = None
+        self._retrieval_end: Optional[float] = None
+        self._generation_start: Optional[float] = None
+
+    def on_retriever_start(self, serialized: Dict[str, Any], query: str, **kwargs: Any) -> None:
+        # Solo cuenta el retriever exterior, no los que envuelve
+        if self._retrieval_run is None:
+            self._retrieval_run = kwargs.get("run_id")
+            self._retrieval_start = time.perf_counter()
+
+    def on_retriever_end(self, documents, **kwargs: Any) -> None:
+        if kwargs.get("run_id") != self._retrieval_run or self._retrieval_start is None:
+            return
+        self._retrieval_end = time.perf_counter()
+        observe("retrieval", self._retrieval_end - self._retrieval_start)
+
+    def _on_generation_start(self):
+        self._generation_start = time.perf_counter()
+        if self._retrieval_end is not None:
+            observe("prompt_assembly", self._generation_start - self._retrieval_end)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], **kwargs: Any) -> None:
+        self._on_generation_start()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages, **kwargs: Any) -> None:
+        self._on_generation_start()
+
+    def on_llm_end(self, response, **kwargs: Any) -> None:
+        if self._generation_start is not None:
+            observe("generation", time.perf_counter() - self._generation_start)
+
+    def on_llm_error(self, error: BaseException, **kwargs: Any) -> None:
+        self.on_llm_end(None)
+
+
+def chain_callbacks() -> List[BaseCallbackHandler]:
+    """
+    Callbacks a pasar a `chain.invoke(..., config={"callbacks": ...})`.
+
+    Returns:
+        Lista vacía si las métricas están desactivadas
+    """
+    if not REGISTRY.enabled:
+        return []
+    return [StageTimingCallback()]
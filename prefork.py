@@ -0,0 +1,237 @@
+"""
+Servidor pre-fork: varios procesos worker que comparten un único índice en memoria
+"""
+from aiohttp import web
+from rag_system import RAGSystem
+from server import create_app, run_server
+from typing import Dict, Optional
+import asyncio
+import gc
+import os
+import random
+import signal
+import socket
+import time
+
+
+class PreforkServer:
+    """
+    Servidor HTTP con un proceso padre y N workers creados con fork().
+
+    El padre carga el índice una sola vez y abre el socket; cada worker
+    hereda ambos. Como el índice FAISS y las demás estructuras no se
+    modifican al consultar, sus páginas de memoria quedan compartidas entre
+    todos los procesos (copy-on-write, o mapeadas desde disco con
+    FAISS_MMAP), así que la memoria no crece con el número de workers y la
+    parte de CPU de cada consulta escala con los núcleos.
+
+    - Un worker que muere se vuelve a crear.
+    - Un worker se recicla (termina ordenadamente y se reemplaza) tras
+      `max_requests` peticiones.
+    - SIGHUP recarga el índice desde disco en el padre y reemplaza los
+      workers: arranca los nuevos y después detiene los antiguos, que
+      terminan sus peticiones en curso.
+    - SIGTERM / Ctrl+C detiene todos los workers y termina.
+    """
+
+    def __init__(self, rag_system: RAGSystem, host: str, port: int, workers: int,
+                 max_requests: Optional[int] = None, max_requests_jitter: int = 0,
+                 shutdown_timeout: float = 30.0):
+        """
+        Args:
+            rag_system: Sistema RAG inicializado en el proceso padre
+            host: Dirección en la que escuchar
+            port: Puerto en el que escuchar
+            workers: Número de procesos worker
+            max_requests: Peticiones antes de reciclar un worker (None = nunca)
+            max_requests_jitter: Variación aleatoria de `max_requests` por worker
+            shutdown_timeout: Segundos de espera antes de forzar el cierre de un worker
+        """
+        self.rag_system = rag_system
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.max_requests = max_requests
+        self.max_requests_jitter = max_requests_jitter
+        self.shutdown_timeout = shutdown_timeout
+        self._socket = None
+        self._children: Dict[int, bool] = {}  # pid -> debe reemplazarse al terminar
+        self._stopping = False
+        self._reload_requested = False
+
+    def run(self):
+        """Abre el socket, crea los workers y los supervisa hasta recibir SIGTERM"""
+        self._socket = socket.create_server((self.host, self.port), backlog=2048)
+        self._socket.set_inheritable(True)
+
+        signal.signal(signal.SIGHUP, self._on_reload)
+        signal.signal(signal.SIGTERM, self._on_stop)
+        signal.signal(signal.SIGINT, self._on_stop)
+
+        print("\n" + "="*70)
+        print(f"🌐 SERVIDOR PRE-FORK en http://{self.host}:{self.port} "
+              f"({self.workers} workers, pid {os.getpid()})")
+        print("="*70)
+        print(f"   kill -HUP {os.getpid()}   recarga el índice y reemplaza los workers")
+        print("="*70 + "\n")
+
+        self._freeze_heap()
+        for _ in range(self.workers):
+            self._spawn()
+
+        try:
+            while not self._stopping:
+                self._reap()
+                if self._reload_requested:
+                    self._reload_requested = False
+                    self._reload()
+                time.sleep(0.2)
+        finally:
+            self._shutdown()
+            self._socket.close()
+
+    def _on_reload(self, signum, frame):
+        self._reload_requested = True
+
+    def _on_stop(self, signum, frame):
+        self._stopping = True
+
+    @staticmethod
+    def _freeze_heap():
+        """
+        Saca los objetos actuales del recolector de basura antes de hacer fork,
+        para que sus recorridos no escriban en páginas compartidas y las copien.
+        """
+        gc.collect()
+        gc.freeze()
+
+    def _spawn(self):
+        """Crea un worker"""
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._run_worker()
+            except BaseException as e:
+                print(f"❌ Worker {os.getpid()} terminó con error: {str(e)}")
+                code = 1
+            finally:
+                # No volver al bucle del padre ni ejecutar sus manejadores de salida
+                os._exit(code)
+        self._children[pid] = True
+        print(f"👷 Worker {pid} iniciado")
+
+    def _run_worker(self):
+        """Código del proceso worker: atiende peticiones hasta que lo detienen"""
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        random.seed()
+
+        self.rag_system.after_fork()
+        app = create_app(self.rag_system)
+
+        if self.max_requests:
+            limit = self.max_requests + random.randint(0, self.max_requests_jitter)
+            served = 0
+
+            @web.middleware
+            async def recycle(request, handler):
+                nonlocal served
+                try:
+                    return await handler(request)
+                finally:
+                    served += 1
+                    if served == limit:
+                        # Terminar ordenadamente: aiohttp deja de aceptar conexiones
+                        # y espera a que acaben las peticiones en curso
+                        asyncio.get_running_loop().call_soon(os.kill, os.getpid(), signal.SIGTERM)
+
+            app.middlewares.append(recycle)
+
+        web.run_app(app, sock=self._socket, print=None,
+                    shutdown_timeout=self.shutdown_timeout)
+
+    def _reap(self):
+        """Recoge los workers terminados y reemplaza los que corresponda"""
+        while self._children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            replace = self._children.pop(pid, False)
+            if replace and not self._stopping:
+                print(f"♻️  Worker {pid} terminado (código {os.waitstatus_to_exitcode(status)}), "
+                      "creando uno nuevo")
+                self._spawn()
+
+    def _reload(self):
+        """Recarga el índice en el padre y reemplaza todos los workers"""
+        print("🔄 Recargando índice...")
+        gc.unfreeze()
+        if not (self.rag_system.load_vectorstore() and self.rag_system.setup_qa_chain()):
+            print("❌ No se pudo recargar el índice; se mantienen los workers actuales")
+            self._freeze_heap()
+            return
+        self._freeze_heap()
+
+        old_workers = list(self._children)
+        for pid in old_workers:
+            # Los workers antiguos terminan sin ser reemplazados uno por uno
+            self._children[pid] = False
+        for _ in range(self.workers):
+            self._spawn()
+        for pid in old_workers:
+            self._signal(pid, signal.SIGTERM)
+        print(f"✅ Índice recargado ({len(old_workers)} workers reemplazados)")
+
+    def _signal(self, pid: int, signum: int):
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _shutdown(self):
+        """Detiene los workers, forzando el cierre si no terminan a tiempo"""
+        print("\n🛑 Deteniendo workers...")
+        for pid in self._children:
+            self._children[pid] = False
+            self._signal(pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.shutdown_timeout
+        while self._children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self._children):
+            self._signal(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+            self._children.pop(pid)
+        print("👋 Servidor detenido")
+
+
+def run_prefork_server(rag_system: RAGSystem, host: str, port: int, workers: int,
+                       max_requests: Optional[int] = None, max_requests_jitter: int = 0):
+    """
+    Inicia el servidor pre-fork y bloquea hasta que se detiene.
+
+    En sistemas sin fork() (Windows) se usa un único proceso.
+
+    Args:
+        rag_system: Sistema RAG inicializado
+        host: Dirección en la que escuchar
+        port: Puerto en el que escuchar
+        workers: Número de procesos worker
+        max_requests: Peticiones antes de reciclar un worker (None = nunca)
+        max_requests_jitter: Variación aleatoria de `max_requests` por worker
+    """
+    if not hasattr(os, "fork"):
+        print("⚠️  Este sistema no permite fork(); se usa un único proceso")
+        run_server(rag_system, host, port)
+        return
+    PreforkServer(
+        rag_system, host, port, workers,
+        max_requests=max_requests,
+        max_requests_jitter=max_requests_jitter
+    ).run()
@@ -1,14 +1,29 @@
 """
 Sistema RAG (Retrieval-Augmented Generation) con FAISS y Gemini
 """
-from langchain_google_genai import ChatGoogleGenerativeAI, GoogleGenerativeAIEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains import RetrievalQA
-from langchain.prompts import PromptTemplate
-from langchain.schema import Document
-from typing import List, Dict
+from langchain_core.documents import Document
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Iterable, Iterator, List, Dict, Optional, Tuple
+from embedding_cache import CachedEmbeddings, EmbeddingCache
+from embedding_pipeline import EmbeddingPipeline
+import asyncio
 import config
+import functools
+import metrics
 import os
+import uuid
+
+# Las dependencias pesadas (FAISS, numpy, cliente de Gemini, cadenas de
+# LangChain, servicios locales, BM25, docstore) se importan dentro de los
+# métodos que las usan, así que solo se cargan si el flujo las necesita
+if TYPE_CHECKING:
+    import numpy as np
+    from langchain.chains import RetrievalQA
+    from langchain_community.vectorstores import FAISS
+
+
+# Campos de la huella de la fuente que cambian cómo se construye el índice:
+# si difieren, el índice se reconstruye en lugar de sincronizarse
+INDEX_BUILD_SETTINGS = ("embedding_model", "chunk_size", "chunk_overlap", "chunk_header_lines")
 
 
 class RAGSystem:
@@ -23,43 +38,97 @@ class RAGSystem:
     def __init__(self):
         """Inicializa el sistema RAG"""
         self.embeddings = None
+        # Embeddings de las preguntas del atajo FAQ (None = los de `embeddings`)
+        self.question_embeddings = None
         self.vectorstore = None
         self.llm = None
         self.qa_chain = None
+        self.index_params = {}
+        self.index_read_only = False
+        self._next_position = 0
+        self.tema_ids = {}
+        self._tema_selectors = {}
+        self.bm25 = None
+        self.faq_index = None
+        self.answer_cache = None
+        self.prompt = None
         
     def setup_embeddings(self):
         """Configura el modelo de embeddings"""
+        if config.OFFLINE_MODE:
+            from local_services import FakeEmbeddingService
+            
+            # Embeddings locales: sin caché para no mezclarlos con los reales
+            self.embeddings = FakeEmbeddingService()
+            self.question_embeddings = None
+            print("🔌 Modo sin conexión: embeddings locales")
+            return True
+        
         print("🔧 Configurando embeddings de Google...")
         
         try:
+            from faq_index import FAQ_TASK_TYPE
+            from langchain_google_genai import GoogleGenerativeAIEmbeddings
+            
             self.embeddings = GoogleGenerativeAIEmbeddings(
                 model=config.EMBEDDING_MODEL,
                 google_api_key=config.GOOGLE_API_KEY
             )
+            # Las preguntas del atajo FAQ se comparan con la consulta del usuario,
+            # así que se embeben con la misma tarea (retrieval_query), por lotes
+            self.question_embeddings = GoogleGenerativeAIEmbeddings(
+                model=config.EMBEDDING_MODEL,
+                google_api_key=config.GOOGLE_API_KEY,
+                task_type=FAQ_TASK_TYPE
+            )
+            
+            # Envolver con la caché en disco para no volver a pagar vectores ya calculados
+            if config.EMBEDDING_CACHE_PATH:
+                cache = EmbeddingCache(
+                    config.EMBEDDING_CACHE_PATH,
+                    model=config.EMBEDDING_MODEL,
+                    max_entries=config.EMBEDDING_CACHE_MAX_ENTRIES
+                )
+                self.embeddings = CachedEmbeddings(self.embeddings, cache)
+                self.question_embeddings = CachedEmbeddings(self.question_embeddings, cache,
+                                                            document_kind="query")
+                print(f"🗃️  Caché de embeddings: {config.EMBEDDING_CACHE_PATH} ({len(cache)} vectores)")
+            
             print("✅ Embeddings configurados correctamente")
             return True
         except Exception as e:
             print(f"❌ Error al configurar embeddings: {str(e)}")
             return False
     
-    def create_vectorstore(self, documents: List[Document], save_local: bool = True):
+    def create_vectorstore(self, documents: Iterable[Document], save_local: bool = True):
         """
         Crea el vector store con FAISS a partir de los documentos.
         
         Args:
-            documents: Lista de documentos a indexar
+            documents: Lista de documentos a indexar, o un generador
+                (p. ej. `iter_documents_from_google_sheets()`) para indexar
+                por lotes sin cargar todo el corpus en memoria
             save_local: Si True, guarda el índice localmente
         """
-        print(f"🔨 Creando vector store con {len(documents)} documentos...")
+        if isinstance(documents, list):
+            print(f"🔨 Creando vector store con {len(documents)} documentos...")
+        else:
+            print("🔨 Creando vector store por lotes...")
         
         try:
-            # Crear el vector store con FAISS
-            self.vectorstore = FAISS.from_documents(
-                documents=documents,
-                embedding=self.embeddings
-            )
+            # Crear el vector store con FAISS, embebiendo por lotes
+            with metrics.timer("index_build"):
+                self.vectorstore = None
+                total = self._index_documents(documents)
+                if self.vectorstore is None:
+                    raise ValueError("No hay documentos para indexar")
+                self._refresh_search_structures()
+                if config.FAQ_FAST_PATH:
+                    self._build_faq_index()
+                self._new_index_version()
             
-            print("✅ Vector store creado correctamente")
+            print(f"✅ Vector store creado correctamente ({total} documentos)")
+            self.print_embedding_cache_stats()
             
             # Guardar localmente si se solicita
             if save_local:
@@ -70,25 +139,685 @@ class RAGSystem:
             print(f"❌ Error al crear vector store: {str(e)}")
             return False
     
-    def save_vectorstore(self):
-        """Guarda el vector store localmente"""
+    def _index_documents(self, documents: Iterable[Document]) -> int:
+        """
+        Embebe los documentos por lotes y los agrega al vector store.
+        
+        Los lotes se calculan en paralelo respetando la cuota configurada y
+        se agregan al índice en cuanto llegan. Si aún no existe un vector
+        store, se crea con el primer lote.
+        
+        Args:
+            documents: Iterable de documentos a indexar
+            
+        Returns:
+            Número de documentos indexados
+        """
+        from faiss_index import create_index
+        from text_splitter import OffsetTextSplitter
+        import numpy as np
+        
+        pipeline = EmbeddingPipeline(
+            self.embeddings,
+            batch_size=config.EMBEDDING_BATCH_SIZE,
+            max_concurrency=config.EMBEDDING_MAX_CONCURRENCY,
+            requests_per_minute=config.EMBEDDING_REQUESTS_PER_MINUTE,
+            max_retries=config.EMBEDDING_MAX_RETRIES
+        )
+        
+        # Las filas largas se dividen en chunks a medida que se leen
+        splitter = OffsetTextSplitter(
+            config.CHUNK_SIZE,
+            config.CHUNK_OVERLAP,
+            header_lines=config.CHUNK_HEADER_LINES
+        )
+        documents = splitter.split_documents(documents)
+        
+        total = 0
+        needs_training = None
+        # Mientras se junta la muestra para entrenar IVF/PQ, los documentos ya
+        # se guardan en el docstore y solo se retienen sus ids y sus vectores,
+        # copiados a un único array float32
+        docstore = None
+        sample = None
+        sample_ids = []
+        for batch, vectors in pipeline.embed_documents(documents):
+            vectors = np.asarray(vectors, dtype=np.float32)
+            total += len(batch)
+            if self.vectorstore is not None:
+                self._add_batch(batch, vectors)
+                continue
+            
+            if needs_training is None:
+                needs_training = not create_index(vectors.shape[1], config.FAISS_INDEX_FACTORY).is_trained
+            if not needs_training:
+                self.vectorstore = self._new_vectorstore(vectors)
+                self._add_batch(batch, vectors)
+                continue
+            
+            if sample is None:
+                docstore = self._new_docstore()
+                sample = np.empty((config.FAISS_TRAINING_SAMPLE_SIZE, vectors.shape[1]), dtype=np.float32)
+            ids = self._store_documents(docstore, batch)
+            taken = min(len(ids), len(sample) - len(sample_ids))
+            sample[len(sample_ids):len(sample_ids) + taken] = vectors[:taken]
+            sample_ids.extend(ids[:taken])
+            if len(sample_ids) < len(sample):
+                continue
+            
+            self.vectorstore = self._new_vectorstore(sample, docstore)
+            self._add_vectors(sample, sample_ids)
+            self._add_vectors(vectors[taken:], ids[taken:])
+            sample = None
+        
+        if self.vectorstore is None and sample_ids:
+            # Hay menos documentos que la muestra de entrenamiento: se entrena con todos
+            sample = sample[:len(sample_ids)]
+            self.vectorstore = self._new_vectorstore(sample, docstore)
+            self._add_vectors(sample, sample_ids)
+        
+        if pipeline.retries:
+            print(f"🔁 Se reintentaron {pipeline.retries} lotes de embeddings")
+        return total
+    
+    def _new_vectorstore(self, training_vectors: "np.ndarray", docstore=None) -> "FAISS":
+        """
+        Crea un vector store vacío con el tipo de índice configurado.
+        
+        Args:
+            training_vectors: Muestra de vectores para entrenar IVF/PQ
+            docstore: Docstore a usar (si no se indica, se crea uno vacío)
+            
+        Returns:
+            Vector store FAISS sin vectores
+        """
+        from faiss_index import apply_search_params, create_index, train_index, with_explicit_ids
+        
+        factory = config.FAISS_INDEX_FACTORY
+        index = create_index(training_vectors.shape[1], factory)
+        if not index.is_trained:
+            trained = train_index(index, training_vectors)
+            if trained is not index:
+                factory = "Flat"
+            index = trained
+        index = with_explicit_ids(index)
+        self._next_position = 0
+        self.index_read_only = False
+        
+        self.index_params = {
+            "factory": factory,
+            "dimension": int(training_vectors.shape[1]),
+            "nprobe": config.FAISS_NPROBE,
+            "efSearch": config.FAISS_EF_SEARCH
+        }
+        apply_search_params(index, self.index_params)
+        
+        from langchain_community.vectorstores import FAISS
+        
+        if docstore is None:
+            docstore = self._new_docstore()
+        return FAISS(self.embeddings, index, docstore, {})
+    
+    def _new_docstore(self):
+        """Crea un docstore vacío con el backend configurado"""
+        from docstore import DOCSTORE_FILE, SQLiteDocstore
+        
+        if config.DOCSTORE_BACKEND == "sqlite":
+            # Se construye en un archivo temporal para no pisar el índice guardado
+            os.makedirs(config.FAISS_INDEX_PATH, exist_ok=True)
+            path = os.path.join(config.FAISS_INDEX_PATH, DOCSTORE_FILE + ".tmp")
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+            return SQLiteDocstore(path)
+        
+        from langchain_community.docstore.in_memory import InMemoryDocstore
+        
+        return InMemoryDocstore()
+    
+    def _add_batch(self, batch: List[Document], vectors: "np.ndarray"):
+        """
+        Agrega un lote de documentos ya embebidos al vector store.
+        
+        Args:
+            batch: Documentos del lote
+            vectors: Embeddings de cada documento (float32)
+        """
+        ids = self._store_documents(self.vectorstore.docstore, batch)
+        self._add_vectors(vectors, ids)
+    
+    def _store_documents(self, docstore, batch: List[Document]) -> List[str]:
+        """
+        Guarda un lote de documentos en el docstore.
+        
+        Returns:
+            Ids con los que se guardaron
+        """
+        # Los lotes llegan en cualquier orden, así que siempre usamos ids explícitos
+        ids = self._document_ids(batch) or [str(uuid.uuid4()) for _ in batch]
+        with metrics.timer("index_add"):
+            docstore.add(dict(zip(ids, batch)))
+        return ids
+    
+    def _add_vectors(self, vectors: "np.ndarray", ids: List[str]):
+        """
+        Agrega al índice los vectores de documentos ya guardados en el docstore.
+        
+        Args:
+            vectors: Embeddings (float32), en el mismo orden que `ids`
+            ids: Ids de los documentos en el docstore
+        """
+        from faiss_index import add_vectors
+        import numpy as np
+        
+        # Cada vector recibe un id numérico nuevo que no cambia al borrar otros
+        positions = np.arange(self._next_position, self._next_position + len(ids), dtype=np.int64)
+        self._next_position += len(ids)
+        with metrics.timer("index_add"):
+            add_vectors(self.vectorstore.index, vectors, positions)
+            self.vectorstore.index_to_docstore_id.update(zip(positions.tolist(), ids))
+    
+    def _document_ids(self, documents: List[Document]) -> Optional[List[str]]:
+        """
+        Devuelve los ids estables de los documentos, si todos lo tienen.
+        
+        Los chunks de una fila dividida usan su `chunk_id` (`row_id#n`).
+        
+        Args:
+            documents: Lista de documentos
+            
+        Returns:
+            Lista de ids o None si algún documento no tiene `row_id`
+        """
+        ids = [doc.metadata.get("chunk_id") or doc.metadata.get("row_id") for doc in documents]
+        if not all(ids):
+            return None
+        return ids
+    
+    def _iter_indexed_documents(self) -> Iterator[Tuple[int, str, Document]]:
+        """
+        Recorre los documentos del vector store en orden de posición.
+        
+        Yields:
+            Tuplas (posición en el índice FAISS, id del documento, documento)
+        """
+        from docstore import SQLiteDocstore
+        
+        items = sorted(self.vectorstore.index_to_docstore_id.items())
+        docstore = self.vectorstore.docstore
+        for start in range(0, len(items), 500):
+            chunk = items[start:start + 500]
+            doc_ids = [doc_id for _, doc_id in chunk]
+            if isinstance(docstore, SQLiteDocstore):
+                # Leer en bloques en lugar de una consulta por documento
+                docs = docstore.mget(doc_ids)
+            else:
+                docs = [docstore.search(doc_id) for doc_id in doc_ids]
+            for (position, doc_id), doc in zip(chunk, docs):
+                yield position, doc_id, doc
+    
+    def _indexed_rows(self) -> Dict[str, Dict]:
+        """
+        Agrupa los documentos del vector store por fila de origen.
+        
+        Returns:
+            Diccionario row_id -> {"content_hash": ..., "ids": [...], "positions": [...]}
+        """
+        rows = {}
+        for position, doc_id, doc in self._iter_indexed_documents():
+            metadata = getattr(doc, "metadata", {})
+            row_id = metadata.get("row_id", doc_id)
+            entry = rows.setdefault(
+                row_id, {"content_hash": metadata.get("content_hash"), "ids": [], "positions": []}
+            )
+            entry["ids"].append(doc_id)
+            entry["positions"].append(position)
+        return rows
+    
+    def _remove_documents(self, positions: List[int], doc_ids: List[str]):
+        """
+        Borra documentos del índice, de la correspondencia id -> documento y del docstore.
+        
+        Los ids de los demás vectores no cambian, así que no hay que renumerar
+        `index_to_docstore_id` (a diferencia de `FAISS.delete` de LangChain,
+        que solo es correcto con índices Flat).
+        
+        Args:
+            positions: Ids de los vectores en el índice FAISS
+            doc_ids: Ids de los documentos en el docstore
+        """
+        from docstore import SQLiteIndexMap
+        import numpy as np
+        
+        self.vectorstore.index.remove_ids(np.array(positions, dtype=np.int64))
+        index_map = self.vectorstore.index_to_docstore_id
+        if isinstance(index_map, SQLiteIndexMap):
+            index_map.remove(positions)
+        else:
+            for position in positions:
+                index_map.pop(position, None)
+        self.vectorstore.docstore.delete(doc_ids)
+    
+    def _max_position(self) -> int:
+        """Mayor id de vector en uso (-1 si el índice está vacío)"""
+        from docstore import SQLiteIndexMap
+        
+        index_map = self.vectorstore.index_to_docstore_id
+        if isinstance(index_map, SQLiteIndexMap):
+            return index_map.max_position()
+        return max(index_map, default=-1)
+    
+    def _refresh_search_structures(self):
+        """
+        Recalcula las estructuras auxiliares que dependen de las posiciones
+        del índice: los conjuntos de posiciones por tema y, si la búsqueda
+        híbrida está activa, el índice BM25.
+        """
+        from bm25_index import BM25Index
+        from faiss_index import build_tema_ids
+        
+        temas = []
+        texts = []
+        for position, _, doc in self._iter_indexed_documents():
+            temas.append((position, getattr(doc, "metadata", {}).get("tema", "N/A")))
+            if config.HYBRID_SEARCH:
+                texts.append((position, getattr(doc, "page_content", "")))
+        
+        self.tema_ids = build_tema_ids(temas)
+        self._tema_selectors = {}
+        self.bm25 = BM25Index.build(texts, k1=config.BM25_K1, b=config.BM25_B) \
+            if config.HYBRID_SEARCH else None
+    
+    def _build_faq_index(self):
+        """
+        Construye el índice de preguntas para el atajo de respuestas directas.
+        
+        Embebe el campo `pregunta` de cada fila indexada como consulta, igual
+        que la pregunta del usuario en `_faq_answer`, para que ambas estén en
+        el mismo espacio (con la caché de embeddings, las preguntas que no
+        cambiaron no se vuelven a pagar).
+        """
+        from faq_index import FAQ_TASK_TYPE, FAQIndex
+        import numpy as np
+        
+        questions = []
+        seen_rows = set()
+        for _, doc_id, doc in self._iter_indexed_documents():
+            metadata = getattr(doc, "metadata", {})
+            row_id = metadata.get("row_id", doc_id)
+            # De una fila dividida en chunks, solo el primero guarda la `respuesta`
+            if "respuesta" not in metadata or row_id in seen_rows:
+                continue
+            seen_rows.add(row_id)
+            questions.append(Document(page_content=str(metadata.get("pregunta", "")),
+                                      metadata={"doc_id": doc_id}))
+        
+        if not questions:
+            self.faq_index = None
+            return
+        
+        print(f"⚡ Indexando {len(questions)} preguntas para respuestas directas...")
+        pipeline = EmbeddingPipeline(
+            self.question_embeddings or self.embeddings,
+            batch_size=config.EMBEDDING_BATCH_SIZE,
+            max_concurrency=config.EMBEDDING_MAX_CONCURRENCY,
+            requests_per_minute=config.EMBEDDING_REQUESTS_PER_MINUTE,
+            max_retries=config.EMBEDDING_MAX_RETRIES
+        )
+        doc_ids = []
+        vectors = []
+        for batch, batch_vectors in pipeline.embed_documents(questions):
+            doc_ids.extend(doc.metadata["doc_id"] for doc in batch)
+            vectors.extend(batch_vectors)
+        self.faq_index = FAQIndex.build(np.array(vectors, dtype=np.float32), doc_ids)
+        self.index_params["faq_task"] = FAQ_TASK_TYPE
+    
+    def _new_index_version(self):
+        """
+        Asigna una nueva versión al índice.
+        
+        La versión se guarda con los parámetros del índice; la caché de
+        respuestas descarta todo lo calculado con otra versión.
+        """
+        self.index_params["version"] = uuid.uuid4().hex
+        if self.answer_cache:
+            self.answer_cache.set_index_version(self.index_params["version"])
+    
+    def setup_answer_cache(self):
+        """Configura la caché semántica de respuestas, si está activa"""
+        if not config.ANSWER_CACHE_PATH:
+            return
+        
+        from answer_cache import AnswerCache
+        
+        self.answer_cache = AnswerCache(
+            config.ANSWER_CACHE_PATH,
+            similarity_threshold=config.ANSWER_CACHE_SIMILARITY_THRESHOLD,
+            ttl_seconds=config.ANSWER_CACHE_TTL_SECONDS,
+            max_entries=config.ANSWER_CACHE_MAX_ENTRIES
+        )
+        self.answer_cache.set_index_version(self.index_params.get("version", "sin-version"))
+        print(f"🗃️  Caché de respuestas: {config.ANSWER_CACHE_PATH} "
+              f"({self.answer_cache.stats()['entries']} respuestas)")
+    
+    def after_fork(self):
+        """
+        Prepara el sistema para usarse en un proceso hijo creado con fork().
+        
+        El índice FAISS, el BM25 y el resto de estructuras en memoria se
+        comparten con el proceso padre (copy-on-write), pero las conexiones
+        SQLite y los clientes de red no sobreviven a un fork: se vuelven a
+        crear aquí.
+        """
+        from docstore import SQLiteDocstore
+        
+        if isinstance(self.vectorstore.docstore, SQLiteDocstore):
+            self.vectorstore.docstore.reconnect()
+        self.setup_embeddings()
+        self.vectorstore.embedding_function = self.embeddings
+        self.setup_answer_cache()
+        self.setup_llm()
+        self.setup_qa_chain()
+    
+    def _faq_answer(self, question: str, tema: str = None,
+                    embed: Callable[[str], List[float]] = None) -> Optional[Dict]:
+        """
+        Intenta responder directamente con la respuesta de una pregunta almacenada.
+        
+        Args:
+            question: Pregunta del usuario
+            tema: Si se indica, la pregunta almacenada debe ser de ese tema
+            embed: Función para embeber la pregunta (por defecto, el modelo de embeddings)
+            
+        Returns:
+            Resultado con la respuesta almacenada, o None si no hay una
+            pregunta suficientemente parecida
+        """
+        embed = embed or self.embeddings.embed_query
+        # Con tema se revisan varias candidatas: la más parecida puede ser de otro tema
+        k = config.FAQ_SEARCH_K if tema else 1
+        for score, doc_id in self.faq_index.search(embed(question), k=k):
+            if score < config.FAQ_SIMILARITY_THRESHOLD:
+                break
+            doc = self.vectorstore.docstore.search(doc_id)
+            if not isinstance(doc, Document) or "respuesta" not in doc.metadata:
+                continue
+            if tema and doc.metadata.get("tema") != tema:
+                continue
+            return {
+                "query": question,
+                "result": doc.metadata["respuesta"],
+                "source_documents": [doc],
+                "fast_path": True,
+                "similarity": score
+            }
+        return None
+    
+    def get_temas(self) -> List[str]:
+        """
+        Devuelve los temas disponibles para filtrar consultas.
+        
+        Returns:
+            Lista ordenada de temas
+        """
+        return sorted(self.tema_ids)
+    
+    def sync_vectorstore(self, documents: Iterable[Document], save_local: bool = True):
+        """
+        Sincroniza el vector store existente con los documentos actuales.
+        
+        Compara el id estable y el hash de contenido de cada fila con lo que
+        ya está indexado: solo se generan embeddings para las filas nuevas o
+        modificadas, y se eliminan del índice las filas que ya no existen.
+        
+        Args:
+            documents: Lista completa y actual de documentos
+            save_local: Si True, guarda el índice actualizado
+        """
+        from docstore import SQLiteDocstore
+        from faiss_index import has_explicit_ids, supports_removal
+        
+        if not self.vectorstore:
+            return self.create_vectorstore(documents, save_local=save_local)
+        
+        print("🔄 Sincronizando vector store...")
+        
+        try:
+            with metrics.timer("index_sync"):
+                indexed = self._indexed_rows()
+                
+                current = {}
+                for doc in documents:
+                    row_id = doc.metadata.get("row_id")
+                    if not row_id:
+                        raise ValueError("Todos los documentos deben tener metadata 'row_id'")
+                    current.setdefault(row_id, []).append(doc)
+                
+                to_delete = []
+                positions_to_delete = []
+                to_add = []
+                unchanged = 0
+                for row_id, docs in current.items():
+                    entry = indexed.get(row_id)
+                    if entry and entry["content_hash"] == docs[0].metadata.get("content_hash"):
+                        unchanged += 1
+                        continue
+                    if entry:
+                        to_delete.extend(entry["ids"])
+                        positions_to_delete.extend(entry["positions"])
+                    to_add.extend(docs)
+                removed = [row_id for row_id in indexed if row_id not in current]
+                for row_id in removed:
+                    to_delete.extend(indexed[row_id]["ids"])
+                    positions_to_delete.extend(indexed[row_id]["positions"])
+                
+                index = self.vectorstore.index
+                if (to_add or to_delete) and (
+                        self.index_read_only or not has_explicit_ids(index)
+                        or (to_delete and not supports_removal(index))):
+                    # Índices HNSW, mapeados en solo lectura o guardados sin ids estables
+                    print("⚠️  Este índice no permite actualizar vectores en su lugar: se reconstruye completo")
+                    return self.create_vectorstore(
+                        [doc for docs in current.values() for doc in docs], save_local=save_local
+                    )
+                
+                if (to_add or to_delete) and isinstance(self.vectorstore.docstore, SQLiteDocstore):
+                    # Los cambios van a una copia del docstore: el guardado no se
+                    # toca hasta que `save_vectorstore` reemplaza todos los archivos
+                    self.vectorstore.docstore.stage()
+                
+                if to_delete:
+                    self._remove_documents(positions_to_delete, to_delete)
+                if to_add:
+                    self._index_documents(to_add)
+                if to_add or to_delete:
+                    # Los temas, el BM25 y los selectores dependen de los vectores del índice
+                    self._refresh_search_structures()
+                    if config.FAQ_FAST_PATH:
+                        self._build_faq_index()
+                    self._new_index_version()
+            
+            print(f"✅ Sincronización completada: {len(to_add)} documentos indexados, "
+                  f"{len(removed)} filas eliminadas, {unchanged} sin cambios")
+            self.print_embedding_cache_stats()
+            
+            if save_local and (to_add or to_delete) and not self.save_vectorstore():
+                raise RuntimeError("no se pudo guardar el índice sincronizado")
+            
+            return True
+        except Exception as e:
+            print(f"❌ Error al sincronizar vector store: {str(e)}")
+            self._discard_unsaved_changes()
+            return False
+    
+    def _discard_unsaved_changes(self):
+        """
+        Vuelve al índice guardado tras una sincronización fallida.
+        
+        El índice en memoria puede haber quedado a medias (vectores borrados
+        sin sus reemplazos), así que se descarta la copia temporal del
+        docstore y se vuelve a cargar lo que hay en disco.
+        """
+        from docstore import SQLiteDocstore
+        
+        docstore = getattr(self.vectorstore, "docstore", None)
+        if isinstance(docstore, SQLiteDocstore) and docstore.path.endswith(".tmp"):
+            docstore.discard()
+        if os.path.exists(config.FAISS_INDEX_PATH):
+            self.load_vectorstore(mmap=self.index_read_only)
+    
+    def print_embedding_cache_stats(self):
+        """Muestra las estadísticas de la caché de embeddings, si está activa"""
+        if isinstance(self.embeddings, CachedEmbeddings):
+            stats = self.embeddings.cache.stats()
+            print(f"🗃️  Caché de embeddings: {stats['hits']} aciertos, "
+                  f"{stats['misses']} fallos ({stats['hit_rate']:.0%} de acierto)")
+    
+    def print_answer_cache_stats(self):
+        """Muestra las estadísticas de la caché de respuestas, si está activa"""
+        if self.answer_cache:
+            stats = self.answer_cache.stats()
+            print(f"🗃️  Caché de respuestas: {stats['exact_hits']} aciertos exactos, "
+                  f"{stats['semantic_hits']} semánticos, {stats['misses']} fallos "
+                  f"({stats['hit_rate']:.0%} de acierto)")
+    
+    @staticmethod
+    def index_status(fingerprint: Optional[Dict]) -> str:
+        """
+        Compara la huella actual de la fuente con la guardada en el índice.
+        
+        Solo lee `index_params.json`, sin cargar el índice ni descargar la hoja.
+        
+        Args:
+            fingerprint: Huella actual (ver `data_loader.get_source_fingerprint`)
+            
+        Returns:
+            "current" si el índice está al día, "stale" si la fuente cambió
+            (basta con sincronizar) o "rebuild" si no hay índice o cambió el
+            modelo o la configuración de chunks
+        """
+        from faiss_index import load_index_params
+        
+        if not os.path.exists(config.FAISS_INDEX_PATH):
+            return "rebuild"
+        stored = load_index_params(config.FAISS_INDEX_PATH).get("source_fingerprint")
+        if not fingerprint or not stored:
+            return "stale"
+        if any(stored.get(key) != fingerprint.get(key) for key in INDEX_BUILD_SETTINGS):
+            return "rebuild"
+        return "current" if stored == fingerprint else "stale"
+    
+    def save_source_fingerprint(self, fingerprint: Dict):
+        """
+        Guarda en el índice la huella de la fuente con la que está al día.
+        
+        Args:
+            fingerprint: Huella de la fuente
+        """
+        from faiss_index import save_index_params
+        
+        if self.index_params.get("source_fingerprint") == fingerprint:
+            return
+        self.index_params["source_fingerprint"] = fingerprint
+        save_index_params(config.FAISS_INDEX_PATH, self.index_params)
+    
+    def save_vectorstore(self) -> bool:
+        """
+        Guarda el vector store localmente.
+        
+        Todos los archivos se escriben primero en una carpeta temporal y
+        solo al final reemplazan a los guardados, así que un error a mitad
+        de camino deja intacto el índice anterior.
+        
+        Returns:
+            True si se guardó (o no había nada que guardar)
+        """
+        from bm25_index import BM25_FILE
+        from docstore import DOCSTORE_FILE, SQLiteDocstore
+        from faiss_index import (
+            commit_staged_files,
+            save_index_params,
+            save_local_vectorstore,
+            save_tema_ids,
+            staging_folder
+        )
+        from faq_index import FAQ_IDS_FILE, FAQ_INDEX_FILE
+        
+        folder = config.FAISS_INDEX_PATH
         try:
             if self.vectorstore:
-                self.vectorstore.save_local(config.FAISS_INDEX_PATH)
-                print(f"💾 Vector store guardado en: {config.FAISS_INDEX_PATH}")
+                with metrics.timer("index_save"):
+                    staging = staging_folder(folder)
+                    save_index_params(staging, self.index_params)
+                    save_tema_ids(staging, self.tema_ids)
+                    if self.bm25:
+                        self.bm25.save(staging)
+                    if self.faq_index:
+                        self.faq_index.save(staging)
+                    
+                    if isinstance(self.vectorstore.docstore, SQLiteDocstore):
+                        save_local_vectorstore(self.vectorstore, folder, staging_path=staging)
+                    else:
+                        self.vectorstore.save_local(staging)
+                        commit_staged_files(folder, staging)
+                        # El cargador prefiere el docstore SQLite, que ya no corresponde
+                        stale_docstore = os.path.join(folder, DOCSTORE_FILE)
+                        if os.path.exists(stale_docstore):
+                            os.remove(stale_docstore)
+                    
+                    # Estructuras desactivadas: sus archivos ya no corresponden al índice
+                    obsolete = [] if self.bm25 else [BM25_FILE]
+                    obsolete += [] if self.faq_index else [FAQ_INDEX_FILE, FAQ_IDS_FILE]
+                    for name in obsolete:
+                        if os.path.exists(os.path.join(folder, name)):
+                            os.remove(os.path.join(folder, name))
+                print(f"💾 Vector store guardado en: {folder}")
+            return True
         except Exception as e:
             print(f"⚠️  Advertencia al guardar vector store: {str(e)}")
+            return False
     
-    def load_vectorstore(self):
-        """Carga un vector store previamente guardado"""
+    def load_vectorstore(self, mmap: bool = None):
+        """
+        Carga un vector store previamente guardado.
+        
+        Args:
+            mmap: Si True, mapea el índice en memoria (solo lectura) en lugar de
+                copiarlo al heap. Por defecto se usa `config.FAISS_MMAP`.
+        """
+        from bm25_index import BM25Index
+        from faiss_index import apply_search_params, load_index_params, load_local_vectorstore, load_tema_ids
+        from faq_index import FAQ_TASK_TYPE, FAQIndex
+        
+        if mmap is None:
+            mmap = config.FAISS_MMAP
+        
         try:
             if os.path.exists(config.FAISS_INDEX_PATH):
                 print("📂 Cargando vector store existente...")
-                self.vectorstore = FAISS.load_local(
-                    config.FAISS_INDEX_PATH,
-                    self.embeddings,
-                    allow_dangerous_deserialization=True
-                )
+                with metrics.timer("index_load"):
+                    self.vectorstore = load_local_vectorstore(
+                        config.FAISS_INDEX_PATH,
+                        self.embeddings,
+                        mmap=mmap
+                    )
+                    self.index_params = load_index_params(config.FAISS_INDEX_PATH)
+                    apply_search_params(self.vectorstore.index, self.index_params)
+                    self.index_read_only = mmap
+                    self._next_position = self._max_position() + 1
+                    self.tema_ids = load_tema_ids(config.FAISS_INDEX_PATH)
+                    self._tema_selectors = {}
+                    self.bm25 = BM25Index.load(config.FAISS_INDEX_PATH) if config.HYBRID_SEARCH else None
+                    if self.vectorstore.index.ntotal and (
+                            not self.tema_ids or (config.HYBRID_SEARCH and self.bm25 is None)):
+                        # Índice guardado sin estas estructuras (versión anterior o sin búsqueda híbrida)
+                        self._refresh_search_structures()
+                    self.faq_index = FAQIndex.load(config.FAISS_INDEX_PATH) if config.FAQ_FAST_PATH else None
+                    if self.index_params.get("faq_task") != FAQ_TASK_TYPE:
+                        # Preguntas embebidas como documentos (versión anterior): se rehacen
+                        self.faq_index = None
+                    if config.FAQ_FAST_PATH and self.faq_index is None and self.vectorstore.index.ntotal:
+                        self._build_faq_index()
                 print("✅ Vector store cargado correctamente")
                 return True
             else:
@@ -98,11 +827,39 @@ class RAGSystem:
             print(f"❌ Error al cargar vector store: {str(e)}")
             return False
     
+    def set_search_params(self, nprobe: int = None, ef_search: int = None):
+        """
+        Ajusta los parámetros de búsqueda del índice en tiempo de consulta.
+        
+        Valores más altos dan más recall a cambio de más latencia.
+        
+        Args:
+            nprobe: Listas IVF a visitar por consulta (índices IVF)
+            ef_search: Tamaño de la lista de candidatos (índices HNSW)
+        """
+        from faiss_index import apply_search_params
+        
+        if nprobe is not None:
+            self.index_params["nprobe"] = nprobe
+        if ef_search is not None:
+            self.index_params["efSearch"] = ef_search
+        if self.vectorstore:
+            apply_search_params(self.vectorstore.index, self.index_params)
+    
     def setup_llm(self):
         """Configura el modelo de lenguaje Gemini"""
+        if config.OFFLINE_MODE:
+            from local_services import FakeChatModel
+            
+            self.llm = FakeChatModel()
+            print("🔌 Modo sin conexión: LLM local")
+            return True
+        
         print("🤖 Configurando modelo Gemini...")
         
         try:
+            from langchain_google_genai import ChatGoogleGenerativeAI
+            
             self.llm = ChatGoogleGenerativeAI(
                 model=config.MODEL_NAME,
                 temperature=config.TEMPERATURE,
@@ -118,6 +875,9 @@ class RAGSystem:
         """Configura la cadena de pregunta-respuesta"""
         print("🔗 Configurando cadena RAG...")
         
+        from langchain.chains import RetrievalQA
+        from langchain.prompts import PromptTemplate
+        
         # Crear el prompt template personalizado
         template = """Usa el siguiente contexto para responder la pregunta al final.
 Si no sabes la respuesta, simplemente di que no lo sabes, no intentes inventar una respuesta.
@@ -134,12 +894,11 @@ Respuesta útil:"""
             template=template,
             input_variables=["context", "question"]
         )
+        self.prompt = PROMPT
         
         try:
-            # Crear el retriever
-            retriever = self.vectorstore.as_retriever(
-                search_kwargs={"k": config.TOP_K_DOCUMENTS}
-            )
+            # Crear el retriever (vectorial o híbrido según la configuración)
+            retriever = self._build_retriever()
             
             # Crear la cadena de QA
             self.qa_chain = RetrievalQA.from_chain_type(
@@ -156,13 +915,220 @@ Respuesta útil:"""
             print(f"❌ Error al configurar cadena: {str(e)}")
             return False
     
-    def query(self, question: str, verbose: bool = True) -> Dict:
+    def _build_retriever(self, tema: str = None):
+        """
+        Crea el retriever según la configuración y el filtro de tema.
+        
+        Args:
+            tema: Si se indica, solo se recuperan documentos de ese tema
+            
+        Returns:
+            Retriever de LangChain
+        """
+        from faiss_index import make_selector
+        
+        from retrievers import (
+            HybridRetriever, SiblingMergingRetriever, TemaFilteredRetriever
+        )
+        
+        selector = None
+        positions = None
+        if tema:
+            positions = self.tema_ids.get(tema)
+            if positions is None:
+                raise ValueError(f"Tema desconocido: '{tema}'. Temas disponibles: "
+                                 f"{', '.join(self.get_temas())}")
+            if tema not in self._tema_selectors:
+                self._tema_selectors[tema] = make_selector(self.vectorstore.index, positions)
+            selector = self._tema_selectors[tema]
+        
+        if self.bm25 is not None:
+            retriever = HybridRetriever(
+                vectorstore=self.vectorstore,
+                bm25=self.bm25,
+                k=config.TOP_K_DOCUMENTS,
+                fetch_k=config.HYBRID_FETCH_K,
+                rrf_k=config.RRF_K,
+                index_params=self.index_params,
+                selector=selector,
+                allowed_positions=positions
+            )
+        elif selector is not None:
+            retriever = TemaFilteredRetriever(
+                vectorstore=self.vectorstore,
+                selector=selector,
+                k=config.TOP_K_DOCUMENTS,
+                index_params=self.index_params
+            )
+        else:
+            retriever = self.vectorstore.as_retriever(
+                search_kwargs={"k": config.TOP_K_DOCUMENTS}
+            )
+        
+        if config.MERGE_SIBLING_CHUNKS:
+            retriever = SiblingMergingRetriever(retriever=retriever)
+        return retriever
+    
+    def _chain_for_tema(self, tema: str) -> "RetrievalQA":
+        """
+        Devuelve una cadena de QA cuyo retriever solo busca en un tema.
+        
+        Reutiliza el prompt y el LLM de `self.qa_chain`; solo cambia el
+        retriever, que filtra dentro de la búsqueda de FAISS.
+        
+        Args:
+            tema: Tema por el que filtrar
+            
+        Returns:
+            Cadena RetrievalQA filtrada
+        """
+        from langchain.chains import RetrievalQA
+        
+        return RetrievalQA(
+            combine_documents_chain=self.qa_chain.combine_documents_chain,
+            retriever=self._build_retriever(tema),
+            return_source_documents=True
+        )
+    
+    def _shortcut_answer(self, question: str, tema: str,
+                         embed: Callable[[str], List[float]]) -> Optional[Dict]:
+        """
+        Busca una respuesta que no necesite al LLM.
+        
+        Args:
+            question: Pregunta del usuario
+            tema: Filtro de tema de la consulta
+            embed: Función para embeber la pregunta
+            
+        Returns:
+            Resultado desde la caché de respuestas o el índice de preguntas,
+            o None si hay que generar la respuesta
+        """
+        with metrics.timer("cache_lookup"):
+            # 1. Caché de respuestas (pregunta exacta o parafraseada)
+            result = None
+            if self.answer_cache:
+                result = self.answer_cache.get(question, tema, embed=embed)
+            
+            # 2. Atajo: si la pregunta casi coincide con una almacenada, no llamar al LLM
+            if result is None and self.faq_index:
+                result = self._faq_answer(question, tema, embed=embed)
+        
+        return result
+    
+    def _format_prompt(self, question: str, documents: List[Document]) -> str:
+        """Arma el prompt con los documentos recuperados (como la cadena "stuff")"""
+        context = "\n\n".join(doc.page_content for doc in documents)
+        return self.prompt.format(context=context, question=question)
+    
+    def stream_query(self, question: str, tema: str = None) -> Iterator[Dict]:
+        """
+        Realiza una consulta y entrega la respuesta a medida que se genera.
+        
+        Produce eventos en forma de diccionario:
+        - {"type": "token", "content": ...} por cada fragmento de la respuesta
+        - {"type": "end", "result": ..., "source_documents": [...]} al terminar
+        - {"type": "error", "error": ...} si algo falla
+        
+        Las respuestas desde caché o desde el índice de preguntas se entregan
+        como un único fragmento.
+        
+        Args:
+            question: Pregunta a realizar
+            tema: Si se indica, solo se recuperan documentos de ese tema
+            
+        Yields:
+            Eventos de la respuesta
+        """
+        if not self.qa_chain:
+            yield {"type": "error", "error": "El sistema RAG no está inicializado correctamente"}
+            return
+        
+        try:
+            embed = functools.lru_cache(maxsize=1)(self.embeddings.embed_query)
+            result = self._shortcut_answer(question, tema, embed)
+            if result is not None:
+                yield {"type": "token", "content": result["result"]}
+                yield {"type": "end", **result}
+                return
+            
+            with metrics.timer("retrieval"):
+                documents = self._build_retriever(tema).get_relevant_documents(question)
+            with metrics.timer("prompt_assembly"):
+                prompt = self._format_prompt(question, documents)
+            
+            # Generar la respuesta en streaming
+            tokens = []
+            with metrics.timer("generation"):
+                for chunk in self.llm.stream(prompt):
+                    content = getattr(chunk, "content", chunk)
+                    if content:
+                        tokens.append(content)
+                        yield {"type": "token", "content": content}
+            
+            result = {"query": question, "result": "".join(tokens), "source_documents": documents}
+            if self.answer_cache:
+                self.answer_cache.put(question, result, tema, embedding=embed(question))
+            yield {"type": "end", **result}
+            
+        except Exception as e:
+            print(f"❌ Error al procesar consulta: {str(e)}")
+            yield {"type": "error", "error": str(e)}
+    
+    async def astream_query(self, question: str, tema: str = None) -> AsyncIterator[Dict]:
+        """
+        Versión asíncrona de `stream_query` (mismos eventos).
+        
+        Args:
+            question: Pregunta a realizar
+            tema: Si se indica, solo se recuperan documentos de ese tema
+            
+        Yields:
+            Eventos de la respuesta
+        """
+        if not self.qa_chain:
+            yield {"type": "error", "error": "El sistema RAG no está inicializado correctamente"}
+            return
+        
+        try:
+            embed = functools.lru_cache(maxsize=1)(self.embeddings.embed_query)
+            result = await asyncio.to_thread(self._shortcut_answer, question, tema, embed)
+            if result is not None:
+                yield {"type": "token", "content": result["result"]}
+                yield {"type": "end", **result}
+                return
+            
+            retriever = self._build_retriever(tema)
+            with metrics.timer("retrieval"):
+                documents = await retriever.aget_relevant_documents(question)
+            with metrics.timer("prompt_assembly"):
+                prompt = self._format_prompt(question, documents)
+            
+            tokens = []
+            with metrics.timer("generation"):
+                async for chunk in self.llm.astream(prompt):
+                    content = getattr(chunk, "content", chunk)
+                    if content:
+                        tokens.append(content)
+                        yield {"type": "token", "content": content}
+            
+            result = {"query": question, "result": "".join(tokens), "source_documents": documents}
+            if self.answer_cache:
+                embedding = await asyncio.to_thread(embed, question)
+                self.answer_cache.put(question, result, tema, embedding=embedding)
+            yield {"type": "end", **result}
+            
+        except Exception as e:
+            yield {"type": "error", "error": str(e)}
+    
+    def query(self, question: str, verbose: bool = True, tema: str = None) -> Dict:
         """
         Realiza una consulta al sistema RAG.
         
         Args:
             question: Pregunta a realizar
             verbose: Si True, muestra información detallada
+            tema: Si se indica, solo se recuperan documentos de ese tema
             
         Returns:
             Diccionario con la respuesta y documentos fuente
@@ -177,11 +1143,28 @@ Respuesta útil:"""
                 print(f"\n❓ Pregunta: {question}")
                 print("🔍 Buscando información relevante...")
             
-            # Ejecutar la consulta
-            result = self.qa_chain.invoke({"query": question})
+            # El embedding de la pregunta se calcula una sola vez y se reutiliza
+            embed = functools.lru_cache(maxsize=1)(self.embeddings.embed_query)
+            
+            with metrics.timer("query"):
+                # 1-2. Caché de respuestas y atajo de preguntas frecuentes
+                result = self._shortcut_answer(question, tema, embed)
+                
+                # 3. Recuperación y generación
+                if result is None:
+                    chain = self._chain_for_tema(tema) if tema else self.qa_chain
+                    result = chain.invoke({"query": question},
+                                          config={"callbacks": metrics.chain_callbacks()})
+                    if self.answer_cache:
+                        self.answer_cache.put(question, result, tema, embedding=embed(question))
             
             if verbose:
-                print("✅ Respuesta generada\n")
+                if result.get("cache"):
+                    print(f"🗃️  Respuesta desde caché ({result['cache']})\n")
+                elif result.get("fast_path"):
+                    print(f"⚡ Respuesta directa (similitud {result['similarity']:.2f})\n")
+                else:
+                    print("✅ Respuesta generada\n")
                 self.print_result(result)
             
             return result
@@ -190,6 +1173,90 @@ Respuesta útil:"""
             print(f"❌ Error al procesar consulta: {str(e)}")
             return {"error": str(e)}
     
+    async def aquery(self, question: str, tema: str = None) -> Dict:
+        """
+        Versión asíncrona de `query` (sin salida por pantalla).
+        
+        La recuperación y la generación usan las variantes asíncronas de la
+        cadena, así que muchas consultas pueden esperar a la red a la vez sin
+        ocupar un hilo cada una. Los accesos a las cachés y el embedding de la
+        pregunta se ejecutan en el pool de hilos del event loop.
+        
+        Args:
+            question: Pregunta a realizar
+            tema: Si se indica, solo se recuperan documentos de ese tema
+            
+        Returns:
+            Diccionario con la respuesta y documentos fuente, o con `error`
+        """
+        if not self.qa_chain:
+            return {
+                "query": question,
+                "error": "El sistema RAG no está inicializado correctamente"
+            }
+        
+        try:
+            embed = functools.lru_cache(maxsize=1)(self.embeddings.embed_query)
+            with metrics.timer("query"):
+                result = await asyncio.to_thread(self._shortcut_answer, question, tema, embed)
+                
+                if result is None:
+                    chain = self._chain_for_tema(tema) if tema else self.qa_chain
+                    result = await chain.ainvoke({"query": question},
+                                                 config={"callbacks": metrics.chain_callbacks()})
+                    if self.answer_cache:
+                        embedding = await asyncio.to_thread(embed, question)
+                        self.answer_cache.put(question, result, tema, embedding=embedding)
+            
+            return result
+            
+        except Exception as e:
+            return {"query": question, "error": str(e)}
+    
+    async def aquery_batch(self, questions: List[str], max_concurrency: int = None,
+                           tema: str = None) -> List[Dict]:
+        """
+        Realiza varias consultas de forma concurrente.
+        
+        Como mucho `max_concurrency` consultas están en curso a la vez. Los
+        resultados se devuelven en el mismo orden que las preguntas y un
+        fallo en una consulta no interrumpe las demás: su resultado lleva
+        la clave `error`.
+        
+        Args:
+            questions: Preguntas a realizar
+            max_concurrency: Consultas simultáneas (por defecto QUERY_MAX_CONCURRENCY)
+            tema: Si se indica, solo se recuperan documentos de ese tema
+            
+        Returns:
+            Lista de resultados, uno por pregunta
+        """
+        semaphore = asyncio.Semaphore(max_concurrency or config.QUERY_MAX_CONCURRENCY)
+        
+        async def run(question: str) -> Dict:
+            async with semaphore:
+                return await self.aquery(question, tema=tema)
+        
+        return await asyncio.gather(*(run(question) for question in questions))
+    
+    def query_batch(self, questions: List[str], max_concurrency: int = None,
+                    tema: str = None) -> List[Dict]:
+        """
+        Versión síncrona de `aquery_batch`.
+        
+        No se puede llamar desde dentro de un event loop en ejecución; en ese
+        caso hay que usar `await aquery_batch(...)`.
+        
+        Args:
+            questions: Preguntas a realizar
+            max_concurrency: Consultas simultáneas (por defecto QUERY_MAX_CONCURRENCY)
+            tema: Si se indica, solo se recuperan documentos de ese tema
+            
+        Returns:
+            Lista de resultados, uno por pregunta
+        """
+        return asyncio.run(self.aquery_batch(questions, max_concurrency=max_concurrency, tema=tema))
+    
     def print_result(self, result: Dict):
         """
         Imprime el resultado de una consulta de manera formateada.
@@ -201,9 +1268,16 @@ Respuesta útil:"""
         print("💡 RESPUESTA:")
         print("="*70)
         print(result.get("result", "No se generó respuesta"))
+        self.print_sources(result.get("source_documents", []))
+    
+    def print_sources(self, source_docs: List[Document]):
+        """
+        Imprime los documentos fuente de una respuesta.
         
+        Args:
+            source_docs: Documentos recuperados
+        """
         # Mostrar documentos fuente
-        source_docs = result.get("source_documents", [])
         if source_docs:
             print("\n" + "="*70)
             print("📚 DOCUMENTOS FUENTE UTILIZADOS:")
@@ -215,13 +1289,20 @@ Respuesta útil:"""
                 print(f"   Contenido: {doc.page_content[:200]}...")
         print("="*70 + "\n")
     
-    def initialize(self, documents: List[Document] = None, use_existing_index: bool = False):
+    def initialize(self, documents: Iterable[Document] = None, use_existing_index: bool = False,
+                   sync: bool = False, fingerprint: Dict = None):
         """
         Inicializa todo el sistema RAG.
         
         Args:
-            documents: Documentos para crear el vector store (si no se usa índice existente)
+            documents: Documentos (lista o generador) para crear el vector store
+                (si no se usa índice existente)
             use_existing_index: Si True, intenta cargar un índice existente
+            sync: Si True, carga el índice existente y solo re-indexa las filas
+                que cambiaron respecto a `documents`
+            fingerprint: Huella de la fuente de la que se leyeron `documents`;
+                se guarda con el índice para saber en el próximo arranque si
+                sigue al día
             
         Returns:
             True si la inicialización fue exitosa
@@ -234,21 +1315,33 @@ Respuesta útil:"""
         if not self.setup_embeddings():
             return False
         
-        # 2. Crear o cargar vector store
-        if use_existing_index and self.load_vectorstore():
+        # 2. Crear, sincronizar o cargar vector store
+        if sync and documents:
+            # La sincronización modifica el índice, así que no puede usar mmap
+            self.load_vectorstore(mmap=False)
+            if not self.sync_vectorstore(documents):
+                return False
+            if fingerprint:
+                self.save_source_fingerprint(fingerprint)
+        elif use_existing_index and self.load_vectorstore():
             print("✅ Usando vector store existente")
         elif documents:
             if not self.create_vectorstore(documents):
                 return False
+            if fingerprint:
+                self.save_source_fingerprint(fingerprint)
         else:
             print("❌ No se proporcionaron documentos ni existe un índice previo")
             return False
         
-        # 3. Configurar LLM
+        # 3. Configurar caché de respuestas
+        self.setup_answer_cache()
+        
+        # 4. Configurar LLM
         if not self.setup_llm():
             return False
         
-        # 4. Configurar cadena
+        # 5. Configurar cadena
         if not self.setup_qa_chain():
             return False
         
@@ -263,6 +1356,7 @@ if __name__ == "__main__":
     """
     Script de prueba del sistema RAG
     """
+    config.print_warnings()
     print("🧪 Probando sistema RAG...\n")
     
     # Crear documentos de prueba
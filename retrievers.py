@@ -0,0 +1,151 @@
+"""
+Retrievers personalizados sobre el vector store FAISS
+"""
+from concurrent.futures import ThreadPoolExecutor
+from langchain_community.vectorstores import FAISS
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+)
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.documents import Document
+from bm25_index import BM25Index
+from faiss_index import make_selector, search_index
+from text_splitter import merge_sibling_chunks
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+
+
+# Hilos compartidos para lanzar la búsqueda léxica en paralelo a la vectorial
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retrieval")
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[int]], k: int = 60) -> List[int]:
+    """
+    Combina varios rankings con Reciprocal Rank Fusion.
+
+    Cada documento suma 1 / (k + rango) por cada ranking en el que aparece,
+    así que no hace falta que las puntuaciones de BM25 y de FAISS estén en
+    la misma escala.
+
+    Args:
+        rankings: Listas de posiciones, cada una ordenada de mejor a peor
+        k: Constante de suavizado de RRF
+
+    Returns:
+        Posiciones ordenadas por puntuación combinada
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, position in enumerate(ranking, 1):
+            scores[position] = scores.get(position, 0.0) + 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+def _documents_at(vectorstore: FAISS, positions) -> List[Document]:
+    """Obtiene del docstore los documentos de las posiciones indicadas"""
+    documents = []
+    for position in positions:
+        if position == -1:
+            # FAISS devuelve -1 cuando hay menos de k resultados
+            continue
+        doc_id = vectorstore.index_to_docstore_id[int(position)]
+        doc = vectorstore.docstore.search(doc_id)
+        if isinstance(doc, Document):
+            documents.append(doc)
+    return documents
+
+
+class TemaFilteredRetriever(BaseRetriever):
+    """
+    Retriever que solo devuelve documentos de un tema.
+
+    Usa los conjuntos de posiciones por tema calculados al crear el índice
+    para filtrar dentro de la búsqueda de FAISS (IDSelector), en lugar de
+    recuperar muchos documentos y descartar los de otros temas.
+    """
+
+    vectorstore: FAISS
+    selector: Any
+    k: int = 4
+    index_params: Dict = {}
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        embedding = self.vectorstore._embed_query(query)
+        vector = np.array([embedding], dtype=np.float32)
+        _, positions = search_index(
+            self.vectorstore.index, vector, self.k, self.index_params, self.selector
+        )
+        return _documents_at(self.vectorstore, positions)
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever híbrido: BM25 (léxico) + FAISS (vectorial) fusionados con RRF.
+
+    La búsqueda BM25 se ejecuta en otro hilo mientras se embebe la consulta
+    y se busca en FAISS. Opcionalmente ambas búsquedas se restringen a las
+    posiciones de un tema.
+    """
+
+    vectorstore: FAISS
+    bm25: BM25Index
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+    index_params: Dict = {}
+    selector: Any = None
+    allowed_positions: Optional[Any] = None
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        lexical = _executor.submit(self.bm25.search, query, self.fetch_k, self.allowed_positions)
+
+        embedding = self.vectorstore._embed_query(query)
+        vector = np.array([embedding], dtype=np.float32)
+        _, vector_positions = search_index(
+            self.vectorstore.index, vector, self.fetch_k, self.index_params, self.selector
+        )
+        lexical_positions, _ = lexical.result()
+
+        fused = reciprocal_rank_fusion(
+            [
+                [int(p) for p in vector_positions if p != -1],
+                [int(p) for p in lexical_positions]
+            ],
+            k=self.rrf_k
+        )
+        return _documents_at(self.vectorstore, fused[:self.k])
+
+
+class SiblingMergingRetriever(BaseRetriever):
+    """
+    Envuelve otro retriever y une los chunks recuperados de una misma fila.
+
+    Así el prompt recibe el texto de la fila una sola vez, sin la cabecera
+    ni la superposición repetidas en cada chunk.
+    """
+
+    retriever: BaseRetriever
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = self.retriever.get_relevant_documents(query, callbacks=run_manager.get_child())
+        return merge_sibling_chunks(documents)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        documents = await self.retriever.aget_relevant_documents(
+            query, callbacks=run_manager.get_child()
+        )
+        return merge_sibling_chunks(documents)
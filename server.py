@@ -0,0 +1,180 @@
+"""
+Servidor HTTP asíncrono para consultar el sistema RAG
+"""
+from aiohttp import web
+from langchain_core.documents import Document
+from rag_system import RAGSystem
+from typing import Dict, List
+import json
+import metrics
+
+
+RAG_KEY = web.AppKey("rag_system", RAGSystem)
+
+
+def serialize_sources(documents: List[Document]) -> List[Dict]:
+    """
+    Convierte los documentos fuente en diccionarios serializables a JSON.
+
+    Args:
+        documents: Documentos recuperados
+
+    Returns:
+        Lista con el contenido y la metadata de cada documento
+    """
+    return [{"page_content": doc.page_content, "metadata": doc.metadata} for doc in documents]
+
+
+def serialize_result(result: Dict) -> Dict:
+    """
+    Convierte el resultado de una consulta en la respuesta JSON de la API.
+
+    Args:
+        result: Resultado de `RAGSystem.aquery` o evento final del streaming
+
+    Returns:
+        Diccionario serializable a JSON
+    """
+    response = {
+        "query": result.get("query"),
+        "result": result.get("result"),
+        "source_documents": serialize_sources(result.get("source_documents", []))
+    }
+    for key in ("cache", "fast_path", "similarity"):
+        if key in result:
+            response[key] = result[key]
+    return response
+
+
+async def read_question(request: web.Request):
+    """
+    Lee y valida el cuerpo JSON de una consulta.
+
+    Returns:
+        Tupla (pregunta, tema)
+
+    Raises:
+        web.HTTPBadRequest: Si el cuerpo no es JSON, falta la pregunta o el
+            tema no existe
+    """
+    try:
+        body = await request.json()
+    except json.JSONDecodeError:
+        raise web.HTTPBadRequest(text=json.dumps({"error": "El cuerpo debe ser JSON"}),
+                                 content_type="application/json")
+    question = str(body.get("question") or "").strip() if isinstance(body, dict) else ""
+    if not question:
+        raise web.HTTPBadRequest(text=json.dumps({"error": "Falta el campo 'question'"}),
+                                 content_type="application/json")
+    tema = body.get("tema")
+    if tema is not None and (not isinstance(tema, str) or tema not in request.app[RAG_KEY].get_temas()):
+        raise web.HTTPBadRequest(text=json.dumps({"error": f"Tema desconocido: {tema}"}, ensure_ascii=False),
+                                 content_type="application/json")
+    return question, tema
+
+
+async def handle_query(request: web.Request) -> web.Response:
+    """POST /query: responde una pregunta y devuelve el resultado completo"""
+    question, tema = await read_question(request)
+    result = await request.app[RAG_KEY].aquery(question, tema=tema)
+    if "error" in result:
+        return web.json_response({"query": question, "error": result["error"]}, status=500)
+    return web.json_response(serialize_result(result))
+
+
+async def handle_query_stream(request: web.Request) -> web.StreamResponse:
+    """
+    POST /query/stream: responde una pregunta en streaming.
+
+    Cada línea de la respuesta (NDJSON) es un evento: `token` con un
+    fragmento del texto, `end` con el resultado final y las fuentes, o
+    `error`.
+    """
+    question, tema = await read_question(request)
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+
+    async for event in request.app[RAG_KEY].astream_query(question, tema=tema):
+        if event["type"] == "end":
+            event = {"type": "end", **serialize_result(event)}
+        await response.write((json.dumps(event, ensure_ascii=False) + "\n").encode("utf-8"))
+
+    await response.write_eof()
+    return response
+
+
+async def handle_health(request: web.Request) -> web.Response:
+    """GET /health: el proceso está vivo"""
+    return web.json_response({"status": "ok"})
+
+
+async def handle_ready(request: web.Request) -> web.Response:
+    """GET /ready: el sistema RAG está inicializado y puede responder"""
+    rag_system = request.app[RAG_KEY]
+    if not rag_system.qa_chain:
+        return web.json_response({"status": "loading"}, status=503)
+    return web.json_response({
+        "status": "ready",
+        "documents": rag_system.vectorstore.index.ntotal,
+        "index_version": rag_system.index_params.get("version")
+    })
+
+
+async def handle_metrics(request: web.Request) -> web.Response:
+    """
+    GET /metrics: latencias por etapa en formato Prometheus (o JSON con ?format=json).
+    
+    Con varios workers, cada proceso lleva sus propias métricas y responde
+    con las suyas.
+    """
+    if not metrics.enabled():
+        return web.json_response({"error": "Las métricas están desactivadas (usa --metrics)"},
+                                 status=404)
+    if request.query.get("format") == "json":
+        return web.json_response(metrics.REGISTRY.to_json())
+    return web.Response(text=metrics.REGISTRY.to_prometheus(),
+                        content_type="text/plain", charset="utf-8")
+
+
+def create_app(rag_system: RAGSystem) -> web.Application:
+    """
+    Crea la aplicación web sobre un sistema RAG ya inicializado.
+
+    Todas las peticiones comparten el mismo vector store, cliente del LLM y
+    cachés, así que el índice se carga una sola vez por proceso.
+
+    Args:
+        rag_system: Sistema RAG inicializado
+
+    Returns:
+        Aplicación aiohttp
+    """
+    app = web.Application()
+    app[RAG_KEY] = rag_system
+    app.router.add_post("/query", handle_query)
+    app.router.add_post("/query/stream", handle_query_stream)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/ready", handle_ready)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+
+def run_server(rag_system: RAGSystem, host: str, port: int):
+    """
+    Inicia el servidor HTTP y bloquea hasta que se detiene (Ctrl+C).
+
+    Args:
+        rag_system: Sistema RAG inicializado
+        host: Dirección en la que escuchar
+        port: Puerto en el que escuchar
+    """
+    print("\n" + "="*70)
+    print(f"🌐 SERVIDOR HTTP en http://{host}:{port}")
+    print("="*70)
+    print("   POST /query          {\"question\": ..., \"tema\": ...}")
+    print("   POST /query/stream   respuesta token a token (NDJSON)")
+    print("   GET  /health         estado del proceso")
+    print("   GET  /ready          el índice está cargado")
+    print("   GET  /metrics        latencia por etapa (Prometheus; ?format=json)")
+    print("="*70 + "\n")
+    web.run_app(create_app(rag_system), host=host, port=port, print=None)
@@ -0,0 +1,221 @@
+"""
+Clientes para leer hojas de cálculo: Google Sheets y archivos CSV locales
+"""
+from typing import List, Optional, Tuple
+import csv
+import functools
+import os
+import re
+import config
+
+
+# Permisos de solo lectura sobre las hojas y sus metadatos de Drive
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets.readonly",
+    "https://www.googleapis.com/auth/drive.readonly"
+]
+
+_A1_RANGE = re.compile(r"^([A-Z]*)(\d*)(?::([A-Z]*)(\d*))?$")
+
+
+def quote_sheet_name(sheet_name: str) -> str:
+    """
+    Escribe el nombre de una pestaña como rango A1 (la pestaña completa).
+
+    Args:
+        sheet_name: Nombre de la pestaña
+
+    Returns:
+        Nombre entre comillas simples, con las comillas internas duplicadas
+    """
+    return "'" + sheet_name.replace("'", "''") + "'"
+
+
+class GoogleSheetsClient:
+    """
+    Cliente de la API de Google Sheets que se autentica una sola vez.
+
+    Todas las peticiones comparten una sesión HTTP autorizada con un pool de
+    conexiones, así que varios hilos pueden leer a la vez reutilizando las
+    conexiones (y el token) en lugar de abrir una por llamada.
+    """
+
+    def __init__(self, credentials_path: str, pool_size: int = 10):
+        """
+        Args:
+            credentials_path: Archivo JSON de la cuenta de servicio
+            pool_size: Conexiones HTTP que se mantienen abiertas
+        """
+        # gspread y google-auth solo se cargan si hay que leer la hoja
+        import gspread
+        from google.auth.transport.requests import AuthorizedSession
+        from google.oauth2.service_account import Credentials
+        from requests.adapters import HTTPAdapter
+
+        credentials = Credentials.from_service_account_file(credentials_path, scopes=SCOPES)
+        session = AuthorizedSession(credentials)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("https://", adapter)
+        self.gspread = gspread.Client(auth=credentials, session=session)
+
+    def open_by_key(self, spreadsheet_id: str):
+        """
+        Abre un documento con gspread.
+
+        Returns:
+            gspread.Spreadsheet
+        """
+        return self.gspread.open_by_key(spreadsheet_id)
+
+    def worksheet_titles(self, spreadsheet_id: str) -> List[str]:
+        """Nombres de las pestañas de un documento, en orden"""
+        from gspread.urls import SPREADSHEET_URL
+
+        response = self.gspread.request(
+            "get", SPREADSHEET_URL % spreadsheet_id,
+            params={"fields": "sheets.properties.title"}
+        ).json()
+        return [sheet["properties"]["title"] for sheet in response.get("sheets", [])]
+
+    def values_batch_get(self, spreadsheet_id: str, ranges: List[str]) -> List[List[List[str]]]:
+        """
+        Lee varios rangos de un documento en una sola petición.
+
+        Args:
+            spreadsheet_id: Id del documento
+            ranges: Rangos en notación A1 (por ejemplo `'Hoja 1'` o `'Hoja 1'!A1:C500`)
+
+        Returns:
+            Por cada rango, sus filas como listas de textos
+        """
+        from gspread.urls import SPREADSHEET_VALUES_BATCH_URL
+
+        response = self.gspread.request(
+            "get", SPREADSHEET_VALUES_BATCH_URL % spreadsheet_id,
+            params={"ranges": ranges, "majorDimension": "ROWS"}
+        ).json()
+        return [value_range.get("values", []) for value_range in response.get("valueRanges", [])]
+
+    def last_update_time(self, spreadsheet_id: str) -> str:
+        """Fecha de última modificación del documento (metadatos de Drive)"""
+        return self.gspread.get_file_drive_metadata(spreadsheet_id)["modifiedTime"]
+
+
+class LocalSheetsClient:
+    """
+    Sustituto de `GoogleSheetsClient` que lee archivos CSV.
+
+    Cada documento es una carpeta dentro de `root` y cada pestaña un CSV:
+    `<root>/<spreadsheet_id>/<pestaña>.csv`. Permite probar la carga de
+    varias hojas sin conexión (ver `config.OFFLINE_SHEETS_DIR`).
+    """
+
+    def __init__(self, root: str):
+        """
+        Args:
+            root: Carpeta con una subcarpeta por documento
+        """
+        self.root = root
+
+    def _path(self, spreadsheet_id: str, sheet_name: str = None) -> str:
+        path = os.path.join(self.root, spreadsheet_id)
+        return os.path.join(path, f"{sheet_name}.csv") if sheet_name is not None else path
+
+    def worksheet_titles(self, spreadsheet_id: str) -> List[str]:
+        """Nombres de las pestañas (los CSV de la carpeta, en orden alfabético)"""
+        names = sorted(os.listdir(self._path(spreadsheet_id)))
+        return [name[:-len(".csv")] for name in names if name.endswith(".csv")]
+
+    def _read_range(self, spreadsheet_id: str, a1_range: str) -> List[List[str]]:
+        sheet_name, cells = _split_range(a1_range)
+        with open(self._path(spreadsheet_id, sheet_name), "r", encoding="utf-8", newline="") as f:
+            rows = list(csv.reader(f))
+        if cells is None:
+            return rows
+
+        first_col, first_row, last_col, last_row = cells
+        rows = rows[first_row - 1:last_row]
+        # Como la API, se omiten las filas vacías del final
+        rows = [row[first_col - 1:last_col] for row in rows]
+        while rows and not any(rows[-1]):
+            rows.pop()
+        return rows
+
+    def values_batch_get(self, spreadsheet_id: str, ranges: List[str]) -> List[List[List[str]]]:
+        """Igual que `GoogleSheetsClient.values_batch_get`, leyendo los CSV"""
+        return [self._read_range(spreadsheet_id, a1_range) for a1_range in ranges]
+
+    def last_update_time(self, spreadsheet_id: str) -> str:
+        """Fecha de modificación más reciente de los CSV del documento"""
+        folder = self._path(spreadsheet_id)
+        mtimes = [os.stat(os.path.join(folder, name)).st_mtime for name in os.listdir(folder)]
+        return str(max(mtimes, default=0.0))
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord("A") + 1
+    return number
+
+
+def _split_range(a1_range: str) -> Tuple[str, Optional[Tuple[int, Optional[int], int, Optional[int]]]]:
+    """
+    Separa un rango A1 en pestaña y celdas.
+
+    Returns:
+        (pestaña, (primera columna, primera fila, última columna, última fila)),
+        con None en lugar de las celdas si el rango es la pestaña completa
+        (los límites no indicados también son None)
+    """
+    if a1_range.startswith("'"):
+        end = a1_range.index("'!", 1) + 1 if "'!" in a1_range else len(a1_range)
+        sheet_name = a1_range[1:end - 1].replace("''", "'")
+        cells = a1_range[end + 1:]
+    else:
+        sheet_name, _, cells = a1_range.partition("!")
+    if not cells:
+        return sheet_name, None
+
+    match = _A1_RANGE.match(cells)
+    if match is None:
+        raise ValueError(f"Rango no válido: {a1_range}")
+    first_col, first_row, last_col, last_row = match.groups()
+    if last_col is None and last_row is None:
+        last_col, last_row = first_col, first_row
+    return sheet_name, (
+        _column_number(first_col) if first_col else 1,
+        int(first_row) if first_row else 1,
+        _column_number(last_col) if last_col else None,
+        int(last_row) if last_row else None
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def get_google_client() -> GoogleSheetsClient:
+    """
+    Cliente de Google Sheets compartido por todo el proceso.
+
+    Se autentica la primera vez que se pide; las siguientes llamadas
+    devuelven el mismo cliente (y su pool de conexiones).
+    """
+    return GoogleSheetsClient(config.CREDENTIALS_PATH, pool_size=config.SHEETS_POOL_SIZE)
+
+
+def get_sheets_client():
+    """
+    Cliente con el que leer las hojas configuradas.
+
+    Returns:
+        LocalSheetsClient en modo sin conexión si hay `config.OFFLINE_SHEETS_DIR`;
+        si no, el `GoogleSheetsClient` compartido
+    """
+    if config.OFFLINE_MODE and config.OFFLINE_SHEETS_DIR:
+        return LocalSheetsClient(config.OFFLINE_SHEETS_DIR)
+    return get_google_client()
+
+
+# Las conexiones del pool no se pueden compartir entre procesos: tras un fork,
+# el hijo crea su propio cliente (en Windows no hay fork)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=get_google_client.cache_clear)
@@ -0,0 +1,98 @@
+"""
+Medición del tiempo de importación de módulos durante el arranque
+"""
+from typing import Dict, List, Optional
+import builtins
+import sys
+import time
+
+
+class ImportProfiler:
+    """
+    Mide cuánto tarda en importarse cada módulo.
+
+    Envuelve `builtins.__import__` y, para cada módulo que se carga por
+    primera vez, registra el tiempo total (incluyendo los módulos que importa)
+    y el tiempo propio (sin ellos). Los imports de módulos ya cargados no
+    cuestan nada y no se registran.
+    """
+
+    def __init__(self):
+        self.records: Dict[str, Dict] = {}
+        self._stack: List[List[float]] = []
+        self._original_import = None
+        self._start = None
+
+    def start(self) -> "ImportProfiler":
+        """Empieza a medir"""
+        self._start = time.perf_counter()
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def stop(self):
+        """Deja de medir y restaura el import original"""
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        # [tiempo de los imports anidados]
+        self._stack.append([0.0])
+        start = time.perf_counter()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = self._stack.pop()[0]
+            if self._stack:
+                self._stack[-1][0] += elapsed
+            record = self.records.setdefault(name, {"total": 0.0, "self": 0.0, "depth": len(self._stack)})
+            record["total"] += elapsed
+            record["self"] += elapsed - children
+
+    def by_package(self) -> Dict[str, float]:
+        """
+        Agrupa el tiempo propio por paquete de primer nivel.
+
+        Returns:
+            Paquete -> segundos
+        """
+        packages = {}
+        for name, record in self.records.items():
+            package = name.split(".")[0]
+            packages[package] = packages.get(package, 0.0) + record["self"]
+        return packages
+
+    def print_report(self, top: int = 15, elapsed: Optional[float] = None):
+        """
+        Muestra los paquetes y módulos que más tardaron en importarse.
+
+        Args:
+            top: Número de filas de cada tabla
+            elapsed: Tiempo total del arranque (por defecto, desde `start()`)
+        """
+        if elapsed is None:
+            elapsed = time.perf_counter() - self._start
+        imports = sum(record["total"] for record in self.records.values() if record["depth"] == 0)
+
+        print("\n" + "="*70)
+        print("⏱️  PERFIL DE ARRANQUE")
+        print("="*70)
+        print(f"   Tiempo hasta aquí: {elapsed * 1000:.0f} ms "
+              f"(imports: {imports * 1000:.0f} ms, {len(self.records)} módulos)")
+
+        print("\n   Paquetes (tiempo propio):")
+        packages = sorted(self.by_package().items(), key=lambda item: item[1], reverse=True)
+        for package, seconds in packages[:top]:
+            print(f"   {seconds * 1000:8.1f} ms  {package}")
+
+        print("\n   Imports de primer nivel (tiempo total):")
+        direct = [(name, record) for name, record in self.records.items() if record["depth"] == 0]
+        direct.sort(key=lambda item: item[1]["total"], reverse=True)
+        for name, record in direct[:top]:
+            print(f"   {record['total'] * 1000:8.1f} ms  {name}")
+        print("="*70 + "\n")
@@ -0,0 +1,69 @@
+"""
+Pruebas de la caché semántica de respuestas
+"""
+import numpy as np
+from langchain_core.documents import Document
+
+
+RESULT = {
+    "result": "Una secuencia mutable.",
+    "source_documents": [Document(page_content="Tema: Python", metadata={"row_id": "abc"})]
+}
+
+
+def unit(*values):
+    vector = np.array(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def new_cache(tmp_path, **kwargs):
+    from answer_cache import AnswerCache
+
+    cache = AnswerCache(str(tmp_path / "respuestas.sqlite"), similarity_threshold=0.97, **kwargs)
+    cache.set_index_version("v1")
+    return cache
+
+
+def test_exact_and_semantic_hits(tmp_path):
+    cache = new_cache(tmp_path)
+    cache.put("¿Qué es una lista?", RESULT, tema="Python", embedding=unit(1, 0, 0))
+
+    # Mayúsculas y espacios no cuentan
+    exact = cache.get("  ¿qué es   una LISTA? ", tema="Python")
+    assert exact["cache"] == "exact"
+    assert exact["result"] == RESULT["result"]
+    assert exact["source_documents"][0].metadata["row_id"] == "abc"
+
+    semantic = cache.get("¿Qué son las listas?", tema="Python", embed=lambda q: unit(1, 0.05, 0))
+    assert semantic["cache"] == "semantic"
+    assert semantic["similarity"] >= 0.97
+
+    stats = cache.stats()
+    assert (stats["exact_hits"], stats["semantic_hits"], stats["misses"]) == (1, 1, 0)
+
+
+def test_misses(tmp_path):
+    cache = new_cache(tmp_path)
+    cache.put("¿Qué es una lista?", RESULT, tema="Python", embedding=unit(1, 0, 0))
+
+    # Pregunta distinta, otro tema, o la misma pregunta con otra versión del índice
+    assert cache.get("¿Qué es una tupla?", tema="Python", embed=lambda q: unit(0, 1, 0)) is None
+    assert cache.get("¿Qué es una lista?", tema="SQL", embed=lambda q: unit(1, 0, 0)) is None
+    cache.set_index_version("v2")
+    assert cache.get("¿Qué es una lista?", tema="Python") is None
+    assert cache.stats()["misses"] == 3
+
+
+def test_persists_and_evicts_least_recently_used(tmp_path):
+    cache = new_cache(tmp_path, max_entries=10)
+    for i in range(10):
+        cache.put(f"pregunta {i}", RESULT, embedding=unit(1, i, 0))
+    cache.get("pregunta 0")
+    cache.put("pregunta 10", RESULT, embedding=unit(1, 10, 0))
+
+    assert cache.stats()["entries"] <= 10
+    assert cache.get("pregunta 0") is not None
+    assert cache.get("pregunta 1") is None
+
+    reopened = new_cache(tmp_path, max_entries=10)
+    assert reopened.get("pregunta 10")["cache"] == "exact"
@@ -0,0 +1,82 @@
+"""
+Pruebas del modo por lotes: líneas no válidas y reanudación
+"""
+import asyncio
+import json
+
+
+class FakeRAG:
+    """Responde al instante; falla las preguntas indicadas en `failing`"""
+
+    def __init__(self, failing=()):
+        self.failing = set(failing)
+        self.asked = []
+
+    async def aquery(self, question, tema=None):
+        self.asked.append((question, tema))
+        await asyncio.sleep(0)
+        if question in self.failing:
+            return {"error": "fallo simulado"}
+        return {"result": f"respuesta a {question}", "source_documents": []}
+
+
+def write_lines(path, lines):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def read_records(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def run(rag, input_path, output_path, **kwargs):
+    from batch_runner import arun_batch
+
+    return asyncio.run(arun_batch(rag, str(input_path), str(output_path), progress_every=0, **kwargs))
+
+
+def test_invalid_lines_become_errors(tmp_path):
+    input_path = tmp_path / "preguntas.jsonl"
+    output_path = tmp_path / "respuestas.jsonl"
+    write_lines(input_path, [
+        json.dumps({"id": "a", "question": "¿Qué es una lista?", "tema": "Python"}),
+        "{no es json",
+        json.dumps(["no", "es", "un", "objeto"]),
+        json.dumps({"id": "d"}),
+        "",
+        json.dumps({"pregunta": "¿Qué es un índice?"}),
+    ])
+
+    rag = FakeRAG()
+    summary = run(rag, input_path, output_path, max_concurrency=3, tema="SQL")
+
+    assert (summary["answered"], summary["errors"], summary["skipped"]) == (2, 3, 0)
+    records = {str(record["id"]): record for record in read_records(output_path)}
+    assert set(records) == {"a", "2", "3", "d", "6"}
+    assert "JSON no válido" in records["2"]["error"]
+    assert "objeto" in records["3"]["error"]
+    assert "falta la pregunta" in records["d"]["error"]
+    # El tema por defecto solo se usa si la línea no trae uno
+    assert sorted(rag.asked) == [("¿Qué es un índice?", "SQL"), ("¿Qué es una lista?", "Python")]
+
+
+def test_resume_skips_answered_and_retries_errors(tmp_path):
+    from batch_runner import load_completed_ids
+
+    input_path = tmp_path / "preguntas.jsonl"
+    output_path = tmp_path / "respuestas.jsonl"
+    write_lines(input_path, [json.dumps({"id": i, "question": f"pregunta {i}"}) for i in range(10)])
+
+    first = run(FakeRAG(failing={"pregunta 4"}), input_path, output_path)
+    assert (first["answered"], first["errors"]) == (10, 1)
+    # Una escritura cortada a mitad de línea no impide reanudar
+    with open(output_path, "a", encoding="utf-8") as f:
+        f.write('{"id": 9, "quest')
+    assert load_completed_ids(str(output_path)) == {str(i) for i in range(10)} - {"4"}
+
+    rag = FakeRAG()
+    second = run(rag, input_path, output_path)
+    assert (second["answered"], second["errors"], second["skipped"]) == (1, 0, 9)
+    assert rag.asked == [("pregunta 4", None)]
+    assert load_completed_ids(str(output_path)) == {str(i) for i in range(10)}
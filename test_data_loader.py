@@ -0,0 +1,161 @@
+"""
+Pruebas de los cargadores de datos: todos deben producir los mismos documentos
+"""
+import json
+
+import pytest
+
+
+ROWS = [
+    ["tema", "pregunta", "respuesta"],
+    ["Python", "¿Qué es una lista?", "Una secuencia mutable."],
+    ["Python", "¿Pregunta sin respuesta?", ""],
+    ["", "", ""],
+    ["SQL", "007", "42"],
+    ["Python", "¿Qué es una lista?", "Una secuencia mutable."],
+]
+
+
+class FakeWorksheet:
+    """Hoja en memoria que responde como gspread (sin celdas vacías al final de cada fila)"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.row_count = len(rows)
+
+    def get_all_values(self):
+        width = max(len(row) for row in self.rows)
+        return [row + [""] * (width - len(row)) for row in self.rows]
+
+    def row_values(self, number):
+        return self._trim(self.rows[number - 1])
+
+    def get(self, a1_range):
+        first, last = a1_range.split(":")
+        start = int(first.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+        end = int(last.lstrip("ABCDEFGHIJKLMNOPQRSTUVWXYZ"))
+        return [self._trim(row) for row in self.rows[start - 1:end]]
+
+    @staticmethod
+    def _trim(row):
+        row = list(row)
+        while row and row[-1] == "":
+            row.pop()
+        return row
+
+
+@pytest.fixture
+def fake_sheet(monkeypatch):
+    import data_loader
+
+    sheet = FakeWorksheet(ROWS)
+    monkeypatch.setattr(data_loader, "open_worksheet", lambda: sheet)
+    return sheet
+
+
+def summary(documents):
+    return [(doc.page_content, doc.metadata["row_id"], doc.metadata["content_hash"])
+            for doc in documents]
+
+
+def test_paged_loader_matches_eager_and_columnar(fake_sheet):
+    from data_loader import (
+        documents_from_frame,
+        iter_documents_from_google_sheets,
+        load_data_from_google_sheets,
+        load_dataframe_from_google_sheets
+    )
+
+    eager = load_data_from_google_sheets()
+    paged = list(iter_documents_from_google_sheets(page_size=2))
+    columnar = documents_from_frame(load_dataframe_from_google_sheets())
+
+    assert len(eager) == 4
+    assert summary(paged) == summary(eager)
+    assert summary(columnar) == summary(eager)
+    # La celda vacía del final queda como texto vacío, no como 'N/A'
+    assert eager[1].page_content.endswith("Respuesta: ")
+
+
+def test_columnar_documents_match_row_to_document():
+    import pandas as pd
+    from data_loader import documents_from_frame, row_to_document
+
+    header, *rows = ROWS
+    seen_ids = {}
+    expected = [row_to_document(dict(zip(header, row)), seen_ids, source="prueba")
+                for row in rows if any(row)]
+    columnar = documents_from_frame(pd.DataFrame(rows, columns=header), source="prueba")
+
+    assert len(columnar) == len(expected)
+    # La fila repetida recibe el mismo sufijo de row_id en ambos caminos
+    assert expected[3].metadata["row_id"] != expected[0].metadata["row_id"]
+    for built, reference in zip(columnar, expected):
+        assert built.page_content == reference.page_content
+        assert built.metadata == reference.metadata
+    assert columnar[-1].metadata == expected[-1].metadata
+
+
+def write_source_files(directory):
+    import csv
+
+    header, *rows = ROWS
+    csv_path = directory / "datos.csv"
+    with open(csv_path, "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows(ROWS)
+    jsonl_path = directory / "datos.jsonl"
+    with open(jsonl_path, "w", encoding="utf-8") as f:
+        for row in rows:
+            record = dict(zip(header, row))
+            if record["pregunta"] == "007":
+                # Los JSONL pueden traer números y nulos
+                record.update(pregunta=7, respuesta=None)
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return csv_path, jsonl_path
+
+
+def test_file_loaders_agree(tmp_path):
+    from data_loader import iter_documents_from_file, load_columnar_documents, load_data_from_file
+
+    csv_path, jsonl_path = write_source_files(tmp_path)
+    for path in (str(csv_path), str(jsonl_path)):
+        eager = load_data_from_file(path)
+        chunked = list(iter_documents_from_file(path, chunk_rows=2))
+        columnar = load_columnar_documents(path)
+
+        assert len(eager) == 4
+        assert summary(chunked) == summary(eager)
+        assert summary(columnar) == summary(eager)
+
+    # Los valores no textuales del JSONL se leen como texto, y los nulos como vacío
+    sql = [doc for doc in load_data_from_file(str(jsonl_path)) if doc.metadata["tema"] == "SQL"]
+    assert sql[0].page_content == "Tema: SQL\nPregunta: 7\nRespuesta: "
+
+
+def test_check_data_file(tmp_path, monkeypatch):
+    import importlib.util
+    from data_loader import check_data_file
+
+    check_data_file(str(tmp_path / "datos.csv"))
+    check_data_file(str(tmp_path / "datos.JSONL"))
+    with pytest.raises(ValueError):
+        check_data_file(str(tmp_path / "datos.xlsx"))
+
+    monkeypatch.setattr(importlib.util, "find_spec", lambda name: None)
+    with pytest.raises(ImportError):
+        check_data_file(str(tmp_path / "datos.parquet"))
+
+
+def test_fingerprint_tracks_dedup_settings(tmp_path, monkeypatch):
+    import config
+    from data_loader import get_source_fingerprint
+
+    csv_path, _ = write_source_files(tmp_path)
+    monkeypatch.setattr(config, "DATA_SOURCE", str(csv_path))
+    monkeypatch.setattr(config, "DEDUP_ENABLED", True)
+    before = get_source_fingerprint()
+    monkeypatch.setattr(config, "DEDUP_BANDS", config.DEDUP_BANDS * 2)
+    after = get_source_fingerprint()
+
+    assert before["dedup_num_perm"] == config.DEDUP_NUM_PERM
+    assert after["dedup_bands"] != before["dedup_bands"]
@@ -0,0 +1,101 @@
+"""
+Pruebas de la eliminación de duplicados (hash exacto y MinHash + LSH)
+"""
+import random
+
+
+def make_documents(rows):
+    from data_loader import row_to_document
+
+    seen_ids = {}
+    return [row_to_document({"tema": tema, "pregunta": pregunta, "respuesta": respuesta}, seen_ids)
+            for tema, pregunta, respuesta in rows]
+
+
+def long_answer(seed: int, words: int = 120) -> str:
+    rng = random.Random(seed)
+    return " ".join(f"palabra{rng.randrange(5000)}" for _ in range(words))
+
+
+def test_exact_and_near_duplicates():
+    from dedup import Deduplicator
+
+    base = long_answer(1)
+    texts = [
+        base,
+        base.upper() + "!!",  # solo cambian mayúsculas y puntuación
+        base + " final",      # casi igual: una palabra más
+        long_answer(2),       # distinto
+    ]
+    deduplicator = Deduplicator(threshold=0.8)
+    assert deduplicator.find_duplicate_texts(texts) == [None, 0, 0, None]
+    stats = deduplicator.stats()
+    assert (stats["exact_duplicates"], stats["near_duplicates"], stats["output"]) == (1, 1, 2)
+
+
+def test_exact_only_skips_near_duplicates():
+    from dedup import Deduplicator
+
+    base = long_answer(1)
+    deduplicator = Deduplicator(exact_only=True)
+    assert deduplicator.find_duplicate_texts([base, base.lower(), base + " final"]) == [None, 0, None]
+
+
+def test_signature_similarity_tracks_jaccard():
+    from dedup import Deduplicator, normalize_text
+
+    deduplicator = Deduplicator(num_perm=128, bands=16)
+    a = long_answer(3, words=200)
+    b = " ".join(a.split()[:150] + long_answer(4, words=50).split())
+    signatures = deduplicator.signatures([normalize_text(a), normalize_text(b)])
+    estimate = (signatures[0] == signatures[1]).mean()
+
+    def shingles(text):
+        words = normalize_text(text).split()
+        return {tuple(words[i:i + 3]) for i in range(len(words) - 2)}
+
+    exact = len(shingles(a) & shingles(b)) / len(shingles(a) | shingles(b))
+    assert abs(estimate - exact) < 0.15
+
+
+def test_deduplicate_documents_merges_metadata():
+    from dedup import deduplicate_documents
+
+    answer = long_answer(5)
+    documents = make_documents([
+        ("Python", "¿Qué es una lista?", answer),
+        ("Python", "¿Qué es una lista?", answer + "."),
+        ("SQL", "¿Qué es un índice?", long_answer(6)),
+    ])
+    unique, stats = deduplicate_documents(documents)
+
+    assert len(unique) == 2
+    assert unique[0].metadata["duplicate_row_ids"] == [documents[1].metadata["row_id"]]
+    assert unique[0].metadata["content_hash"] != documents[0].metadata["content_hash"]
+    assert stats["embeddings_saved"] == 1
+
+
+def test_columnar_matches_list_path():
+    from data_loader import ColumnarDocuments
+    from dedup import deduplicate_documents
+    import pandas as pd
+
+    rows = [("Python", f"¿Pregunta {i % 5}?", long_answer(i % 5)) for i in range(12)]
+    documents = make_documents(rows)
+    frame = pd.DataFrame([{"page_content": doc.page_content, **doc.metadata} for doc in documents])
+
+    unique, _ = deduplicate_documents(documents)
+    columnar, _ = deduplicate_documents(ColumnarDocuments(frame))
+    assert [doc.metadata["row_id"] for doc in columnar] == [doc.metadata["row_id"] for doc in unique]
+    assert ([doc.metadata["content_hash"] for doc in columnar]
+            == [doc.metadata["content_hash"] for doc in unique])
+
+
+def test_streaming_yields_first_occurrences():
+    from dedup import iter_unique_documents
+
+    documents = make_documents([("A", "P", "R"), ("A", "p", "r"), ("B", "Q", "S")] * 3)
+    unique = list(iter_unique_documents(iter(documents), batch_size=2))
+    assert [doc.metadata["row_id"] for doc in unique] == [
+        documents[0].metadata["row_id"], documents[2].metadata["row_id"]
+    ]
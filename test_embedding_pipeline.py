@@ -0,0 +1,100 @@
+"""
+Pruebas del pipeline de embeddings contra un servicio local que responde con 429
+"""
+import threading
+import time
+
+import pytest
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+
+def make_documents(count: int):
+    return [Document(page_content=f"texto número {i}") for i in range(count)]
+
+
+def test_retries_rate_limited_batches():
+    from embedding_pipeline import EmbeddingPipeline
+    from local_services import FakeEmbeddingService
+
+    service = FakeEmbeddingService(size=8, rate_limit_probability=0.4, seed=3)
+    pipeline = EmbeddingPipeline(service, batch_size=10, max_concurrency=4,
+                                 max_retries=20, base_delay=0.001, max_delay=0.01)
+    documents = make_documents(200)
+
+    results = {}
+    for batch, vectors in pipeline.embed_documents(documents):
+        for doc, vector in zip(batch, vectors):
+            results[doc.page_content] = vector
+
+    # Todos los lotes llegan, con los mismos vectores que sin errores
+    assert service.rate_limited > 0
+    assert pipeline.retries == service.rate_limited
+    assert len(results) == len(documents)
+    reference = FakeEmbeddingService(size=8)
+    assert results["texto número 7"] == reference.embed_query("texto número 7")
+
+
+def test_gives_up_after_max_retries():
+    from embedding_pipeline import EmbeddingPipeline, RateLimitError
+    from local_services import FakeEmbeddingService
+
+    service = FakeEmbeddingService(size=8, rate_limit_probability=1.0)
+    pipeline = EmbeddingPipeline(service, batch_size=10, max_concurrency=2,
+                                 max_retries=2, base_delay=0.001)
+    with pytest.raises(RateLimitError):
+        list(pipeline.embed_documents(make_documents(20)))
+
+
+class SlowEmbeddings(Embeddings):
+    """Cuenta cuántas peticiones hay en curso a la vez"""
+
+    def __init__(self):
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.01)
+        with self._lock:
+            self.active -= 1
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text))]
+
+
+def test_limits_requests_and_batches_in_flight():
+    from embedding_pipeline import EmbeddingPipeline
+
+    embeddings = SlowEmbeddings()
+    pipeline = EmbeddingPipeline(embeddings, batch_size=5, max_concurrency=3)
+    read = 0
+
+    def documents():
+        nonlocal read
+        for doc in make_documents(300):
+            read += 1
+            yield doc
+
+    delivered = 0
+    for batch, vectors in pipeline.embed_documents(documents()):
+        delivered += len(batch)
+        # Nunca se leen más de 2 * max_concurrency lotes por delante de lo entregado
+        assert read - delivered <= 2 * 3 * 5
+    assert delivered == 300
+    assert embeddings.max_active <= 3
+
+
+def test_token_bucket_limits_rate():
+    from embedding_pipeline import TokenBucket
+
+    bucket = TokenBucket(requests_per_minute=600, capacity=1)  # 10 por segundo
+    start = time.monotonic()
+    for _ in range(4):
+        bucket.acquire()
+    # El primero sale de la ráfaga; los otros tres esperan 0,1 s cada uno
+    assert time.monotonic() - start >= 0.25
@@ -0,0 +1,63 @@
+"""
+Pruebas de la búsqueda léxica (BM25) y de la fusión de rankings (RRF)
+"""
+import numpy as np
+
+
+TEXTS = [
+    (0, "Python es un lenguaje de programación"),
+    (1, "FAISS indexa vectores para búsqueda por similitud"),
+    (2, "BM25 puntúa documentos por palabras clave: índice invertido y búsqueda léxica"),
+    (3, "La búsqueda híbrida combina búsqueda léxica y vectorial"),
+    (4, "Los índices de FAISS se guardan en disco"),
+]
+
+
+def test_bm25_ranks_matching_documents():
+    from bm25_index import BM25Index
+
+    bm25 = BM25Index.build(TEXTS)
+    positions, scores = bm25.search("búsqueda léxica", k=3)
+
+    assert set(positions.tolist()) == {1, 2, 3}
+    # El documento que repite los dos términos queda primero
+    assert positions[0] == 3
+    assert list(scores) == sorted(scores, reverse=True)
+
+    # Sin mayúsculas ni tildes también coincide
+    assert bm25.search("BUSQUEDA LEXICA", k=3)[0].tolist() == positions.tolist()
+    assert bm25.search("palabra inexistente", k=3)[0].size == 0
+
+
+def test_bm25_respects_allowed_positions():
+    from bm25_index import BM25Index
+
+    bm25 = BM25Index.build(TEXTS)
+    positions, _ = bm25.search("faiss búsqueda", k=5, allowed=np.array([2, 4]))
+    assert set(positions.tolist()) <= {2, 4}
+    assert len(positions) == 2
+
+
+def test_bm25_save_and_load(tmp_path):
+    from bm25_index import BM25Index
+
+    bm25 = BM25Index.build(TEXTS)
+    bm25.save(str(tmp_path))
+    loaded = BM25Index.load(str(tmp_path))
+    expected = bm25.search("índices de faiss", k=5)
+    found = loaded.search("índices de faiss", k=5)
+    assert found[0].tolist() == expected[0].tolist()
+    assert np.allclose(found[1], expected[1])
+
+
+def test_reciprocal_rank_fusion_ordering():
+    from retrievers import reciprocal_rank_fusion
+
+    vector = [10, 11, 12, 13]
+    lexical = [12, 10, 14]
+    fused = reciprocal_rank_fusion([vector, lexical], k=60)
+
+    # Los que aparecen en ambos rankings van primero (10 tiene mejores rangos que 12),
+    # después los que solo están en uno, por su rango
+    assert fused == [10, 12, 11, 14, 13]
+    assert reciprocal_rank_fusion([[1, 2, 3]]) == [1, 2, 3]
@@ -0,0 +1,100 @@
+"""
+Pruebas de la sincronización incremental del índice (modo sin conexión)
+"""
+import pytest
+
+
+@pytest.fixture
+def offline_config(tmp_path, monkeypatch):
+    """Configuración con servicios locales y el índice en una carpeta temporal"""
+    import config
+
+    monkeypatch.setenv("RAG_OFFLINE", "1")
+    config.get_settings.cache_clear()
+    monkeypatch.setattr(config, "FAISS_INDEX_PATH", str(tmp_path / "faiss_index"))
+    monkeypatch.setattr(config, "FAISS_TRAINING_SAMPLE_SIZE", 1000)
+    monkeypatch.setattr(config, "FAISS_MMAP", False)
+    monkeypatch.setattr(config, "ANSWER_CACHE_PATH", None)
+    monkeypatch.setattr(config, "EMBEDDING_CACHE_PATH", None)
+    monkeypatch.setattr(config, "DEDUP_ENABLED", False)
+    yield config
+    config.get_settings.cache_clear()
+
+
+def make_documents(count: int, changed=()):
+    from data_loader import row_to_document
+
+    seen_ids = {}
+    rows = [
+        {
+            "tema": f"tema{i % 4}",
+            "pregunta": f"¿Pregunta número {i}?",
+            "respuesta": f"Respuesta {'cambiada ' if i in changed else ''}número {i}."
+        }
+        for i in range(count)
+    ]
+    return [row_to_document(row, seen_ids) for row in rows]
+
+
+def new_system():
+    from local_services import FakeEmbeddingService
+    from rag_system import RAGSystem
+
+    rag = RAGSystem()
+    rag.embeddings = FakeEmbeddingService(size=32)
+    return rag
+
+
+def assert_consistent(rag, documents):
+    """Cada vector del índice apunta a su documento y cada documento se encuentra"""
+    vectorstore = rag.vectorstore
+    assert vectorstore.index.ntotal == len(documents)
+    assert len(vectorstore.index_to_docstore_id) == len(documents)
+    assert set(vectorstore.index_to_docstore_id.values()) == {doc.metadata["row_id"] for doc in documents}
+
+    for doc in documents[::25]:
+        found = vectorstore.similarity_search(doc.page_content, k=1)
+        assert found[0].page_content == doc.page_content
+
+    tema = documents[0].metadata["tema"]
+    results = rag._build_retriever(tema).get_relevant_documents(documents[0].page_content)
+    assert results and all(result.metadata["tema"] == tema for result in results)
+
+
+@pytest.mark.parametrize("factory", ["Flat", "IVF16,Flat", "HNSW32"])
+def test_sync_deletes_and_updates(offline_config, monkeypatch, factory):
+    monkeypatch.setattr(offline_config, "FAISS_INDEX_FACTORY", factory)
+    documents = make_documents(500)
+    assert new_system().create_vectorstore(documents)
+
+    # 50 filas eliminadas y una modificada
+    current = [doc for i, doc in enumerate(make_documents(500, changed={7})) if not 100 <= i < 150]
+    rag = new_system()
+    assert rag.load_vectorstore()
+    assert rag.sync_vectorstore(current)
+    assert_consistent(rag, current)
+
+    # El índice guardado también queda coherente
+    reloaded = new_system()
+    assert reloaded.load_vectorstore()
+    assert_consistent(reloaded, current)
+
+
+def test_failed_sync_keeps_saved_index(offline_config):
+    documents = make_documents(200)
+    assert new_system().create_vectorstore(documents)
+
+    rag = new_system()
+    assert rag.load_vectorstore()
+
+    def fail(texts):
+        raise RuntimeError("servicio de embeddings caído")
+
+    # Falla al embeber, después de haber borrado las filas modificadas y eliminadas
+    rag.embeddings.embed_documents = fail
+    assert not rag.sync_vectorstore(make_documents(150, changed={3}))
+    assert_consistent(rag, documents)
+
+    reloaded = new_system()
+    assert reloaded.load_vectorstore()
+    assert_consistent(reloaded, documents)
@@ -0,0 +1,67 @@
+"""
+Pruebas de la división en chunks y de la unión de chunks hermanos
+"""
+from langchain_core.documents import Document
+
+
+def long_document(words: int = 400) -> Document:
+    body = " ".join(f"palabra{i}." if i % 17 == 16 else f"palabra{i}" for i in range(words))
+    content = f"Tema: Python\nPregunta: ¿Qué es una lista?\nRespuesta: {body}"
+    return Document(page_content=content, metadata={
+        "row_id": "fila1", "tema": "Python", "respuesta": body
+    })
+
+
+def new_splitter():
+    from text_splitter import OffsetTextSplitter
+
+    return OffsetTextSplitter(300, 60, header_lines=2)
+
+
+def test_chunks_respect_size_and_repeat_header():
+    doc = long_document()
+    chunks = new_splitter().split_document(doc)
+
+    assert len(chunks) > 3
+    for index, chunk in enumerate(chunks):
+        assert len(chunk.page_content) <= 300
+        assert chunk.page_content.startswith("Tema: Python\nPregunta: ¿Qué es una lista?\n")
+        assert chunk.metadata["chunk_id"] == f"fila1#{index}"
+        assert chunk.metadata["chunk_index"] == index
+        # El contenido del chunk es exactamente el tramo que indica su metadata
+        start, end = chunk.metadata["chunk_start"], chunk.metadata["chunk_end"]
+        assert chunk.page_content.endswith(doc.page_content[start:end])
+    # La respuesta completa solo se guarda en el primer chunk
+    assert chunks[0].metadata["respuesta"] == doc.metadata["respuesta"]
+    assert all("respuesta" not in chunk.metadata for chunk in chunks[1:])
+
+
+def test_short_document_is_not_split():
+    doc = Document(page_content="Tema: A\nPregunta: B\nRespuesta: C", metadata={"row_id": "x"})
+    assert new_splitter().split_document(doc) == [doc]
+
+
+def test_merge_sibling_chunks_round_trip():
+    from text_splitter import merge_sibling_chunks
+
+    doc = long_document()
+    chunks = new_splitter().split_document(doc)
+    other = Document(page_content="otro documento", metadata={"row_id": "fila2"})
+
+    # Todos los chunks, en cualquier orden: se recupera el texto original
+    merged = merge_sibling_chunks(list(reversed(chunks)) + [other])
+    assert len(merged) == 2
+    assert merged[0].page_content == doc.page_content
+    assert merged[0].metadata["merged_chunks"] == list(range(len(chunks)))
+    assert merged[1] is other
+
+
+def test_merge_marks_gaps():
+    from text_splitter import GAP_MARKER, merge_sibling_chunks
+
+    chunks = new_splitter().split_document(long_document())
+    merged = merge_sibling_chunks([chunks[3], chunks[0]])
+    assert len(merged) == 1
+    assert GAP_MARKER in merged[0].page_content
+    assert merged[0].page_content.startswith(chunks[0].page_content)
+    assert merged[0].page_content.endswith(chunks[3].page_content[-20:])
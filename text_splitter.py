@@ -0,0 +1,224 @@
+"""
+División de documentos en chunks por posiciones, en una sola pasada
+"""
+from langchain_core.documents import Document
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+# Puntos de corte preferidos, de mejor a peor
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+# Texto entre dos chunks no consecutivos al volver a juntarlos
+GAP_MARKER = "\n[...]\n"
+
+
+class OffsetTextSplitter:
+    """
+    Divide textos en chunks de como máximo `chunk_size` caracteres.
+
+    A diferencia de los splitters recursivos de LangChain, que parten el
+    texto en trozos y los vuelven a unir con `join` varias veces, este
+    calcula primero las posiciones (inicio, fin) de cada chunk recorriendo
+    el texto una vez con `rfind`/`find`, y después copia cada chunk con un
+    único slice. Los cortes se hacen en el mejor separador disponible
+    (párrafo, línea, frase o palabra) y cada chunk repite los últimos
+    `chunk_overlap` caracteres del anterior, empezando en una palabra.
+
+    Las primeras `header_lines` líneas del texto (en los documentos de la
+    hoja, "Tema:" y "Pregunta:") se repiten al principio de cada chunk para
+    que cada uno se entienda por sí solo.
+    """
+
+    def __init__(self, chunk_size: int, chunk_overlap: int = 0,
+                 separators: Tuple[str, ...] = SEPARATORS, header_lines: int = 0):
+        """
+        Args:
+            chunk_size: Tamaño máximo de cada chunk en caracteres
+            chunk_overlap: Caracteres compartidos entre chunks consecutivos
+            separators: Separadores en los que cortar, de mejor a peor
+            header_lines: Líneas iniciales que se repiten en cada chunk
+        """
+        if chunk_size <= 0:
+            raise ValueError("chunk_size debe ser mayor que 0")
+        if not 0 <= chunk_overlap < chunk_size:
+            raise ValueError("chunk_overlap debe estar entre 0 y chunk_size - 1")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separators = separators
+        self.header_lines = header_lines
+
+    def _header_end(self, text: str) -> int:
+        """Posición donde termina la cabecera (0 si no hay o no cabe)"""
+        end = 0
+        for _ in range(self.header_lines):
+            newline = text.find("\n", end)
+            if newline == -1:
+                return 0
+            end = newline + 1
+        # La cabecera debe dejar sitio para el contenido y la superposición
+        if self.chunk_size - end <= self.chunk_overlap:
+            return 0
+        return end
+
+    def _find_cut(self, text: str, start: int, end: int) -> int:
+        """Último separador entre la mitad del chunk y `end`, o `end` si no hay"""
+        minimum = start + (end - start) // 2
+        for separator in self.separators:
+            position = text.rfind(separator, minimum, end)
+            if position != -1:
+                return position + len(separator)
+        return end
+
+    def split_offsets(self, text: str, start: int = 0, budget: int = None) -> List[Tuple[int, int]]:
+        """
+        Calcula las posiciones de los chunks sin copiar el texto.
+
+        Args:
+            text: Texto a dividir
+            start: Posición desde la que dividir
+            budget: Caracteres disponibles por chunk (por defecto `chunk_size`)
+
+        Returns:
+            Lista de tuplas (inicio, fin) dentro de `text`
+        """
+        budget = budget or self.chunk_size
+        length = len(text)
+        spans = []
+        while True:
+            end = start + budget
+            if end >= length:
+                spans.append((start, length))
+                return spans
+            cut = self._find_cut(text, start, end)
+            spans.append((start, cut))
+
+            next_start = cut - self.chunk_overlap
+            if self.chunk_overlap:
+                # Empezar la superposición al principio de una palabra
+                space = text.find(" ", next_start, cut)
+                if space != -1:
+                    next_start = space + 1
+            if next_start <= start:
+                next_start = cut
+            start = next_start
+
+    def split_document(self, doc: Document) -> List[Document]:
+        """
+        Divide un documento en chunks.
+
+        Un documento que cabe en un chunk se devuelve tal cual. Si no, cada
+        chunk conserva la metadata del original (incluido su `row_id`),
+        salvo la `respuesta`, que solo se guarda en el primero (ya está en el
+        texto de los chunks y el atajo de respuestas directas usa el
+        primero), y agrega:
+
+        - `chunk_id`: id único del chunk (`row_id#n`)
+        - `chunk_index`: número de chunk dentro del documento
+        - `chunk_start` / `chunk_end`: posición del contenido del chunk en
+          el texto original (sin contar la cabecera repetida)
+
+        Args:
+            doc: Documento a dividir
+
+        Returns:
+            Lista de documentos
+        """
+        text = doc.page_content
+        if len(text) <= self.chunk_size:
+            return [doc]
+
+        header_end = self._header_end(text)
+        header = text[:header_end]
+        spans = self.split_offsets(text, start=header_end, budget=self.chunk_size - header_end)
+        row_id = doc.metadata.get("row_id")
+
+        chunks = []
+        for index, (start, end) in enumerate(spans):
+            # El primer chunk ya empieza con la cabecera
+            content = text[:end] if index == 0 else header + text[start:end]
+            metadata = dict(doc.metadata)
+            metadata.update({
+                "chunk_id": f"{row_id}#{index}" if row_id else None,
+                "chunk_index": index,
+                "chunk_start": start,
+                "chunk_end": end
+            })
+            if index:
+                metadata.pop("respuesta", None)
+            chunks.append(Document(page_content=content, metadata=metadata))
+        return chunks
+
+    def split_documents(self, documents: Iterable[Document]) -> Iterator[Document]:
+        """
+        Divide los documentos a medida que se leen.
+
+        Args:
+            documents: Iterable (lista o generador) de documentos
+
+        Yields:
+            Documentos de como máximo `chunk_size` caracteres
+        """
+        for doc in documents:
+            yield from self.split_document(doc)
+
+
+def merge_sibling_chunks(documents: List[Document]) -> List[Document]:
+    """
+    Junta los chunks recuperados que vienen de la misma fila.
+
+    Los chunks de una fila se ordenan por posición y se unen sin repetir la
+    cabecera ni la superposición; si falta un chunk intermedio se marca el
+    hueco con `GAP_MARKER`. El documento resultante ocupa el lugar del chunk
+    de la fila mejor clasificado. Los documentos que no son chunks se
+    devuelven sin cambios.
+
+    Args:
+        documents: Documentos recuperados, de más a menos relevante
+
+    Returns:
+        Documentos con los chunks de cada fila unidos
+    """
+    groups: Dict[str, List[Document]] = {}
+    order = []
+    for doc in documents:
+        row_id = doc.metadata.get("row_id")
+        if row_id is None or "chunk_index" not in doc.metadata:
+            order.append(doc)
+            continue
+        if row_id not in groups:
+            groups[row_id] = []
+            order.append(row_id)
+        groups[row_id].append(doc)
+
+    merged = []
+    for item in order:
+        if isinstance(item, Document):
+            merged.append(item)
+            continue
+        chunks = groups[item]
+        if len(chunks) == 1:
+            merged.append(chunks[0])
+            continue
+
+        chunks = sorted(chunks, key=lambda chunk: chunk.metadata["chunk_index"])
+        first = chunks[0]
+        parts = [first.page_content]
+        position = first.metadata["chunk_end"]
+        for chunk in chunks[1:]:
+            start, end = chunk.metadata["chunk_start"], chunk.metadata["chunk_end"]
+            if end <= position:
+                continue
+            body = chunk.page_content[len(chunk.page_content) - (end - start):]
+            if start > position:
+                parts.append(GAP_MARKER)
+                parts.append(body)
+            else:
+                parts.append(body[position - start:])
+            position = end
+
+        metadata = dict(first.metadata)
+        metadata["merged_chunks"] = [chunk.metadata["chunk_index"] for chunk in chunks]
+        metadata.pop("chunk_id", None)
+        metadata["chunk_end"] = position
+        merged.append(Document(page_content="".join(parts), metadata=metadata))
+    return merged
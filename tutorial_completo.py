@@ -370,6 +370,8 @@ Para cada pregunta verás:
 
 def main():
     """Función principal del tutorial"""
+    config.print_warnings()
+    
     print_header("🎓 TUTORIAL COMPLETO DE RAG CON LANGCHAIN, FAISS Y GEMINI")
     
     print("""